@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""Local stand-in for GitHub REST API endpoints used by dependabot report.
+
+Serves a synthetic estate of repositories and their dependabot alerts:
+
+* GET /user
+* GET /user/repos
+* GET /orgs/<org>
+* GET /orgs/<org>/repos
+* GET /repos/<owner>/<name>/dependabot/alerts
+* GET /orgs/<org>/dependabot/alerts
+* GET /_stats - number of served requests, not counted itself
+
+Lists are paginated via `Link` header and conditional requests are supported
+via `ETag` header. Some repositories respond with 403 as if dependabot was
+disabled, and latency can be injected into every request. Alerts aren't kept
+in memory, they're generated on demand and the same parameters always
+produce the same estate.
+
+Usage: python3 -m benchmarks.fake_github --repos 1000 --max-alerts 50
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.parse
+import zlib
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+CREATED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+CWE_IDS = ["CWE-20", "CWE-22", "CWE-79", "CWE-89", "CWE-400", "CWE-1321"]
+ECOSYSTEMS = [
+    ("pip", "requirements.txt"),
+    ("npm", "package-lock.json"),
+    ("maven", "pom.xml"),
+    ("go", "go.sum"),
+]
+SEVERITIES = ["critical", "high", "medium", "low"]
+
+
+class Estate:
+    """Synthetic estate of repositories and their alerts."""
+
+    def __init__(
+        self,
+        repos=10,
+        min_alerts=0,
+        max_alerts=500,
+        forbidden_ratio=0.0,
+        repos_per_owner=100,
+        seed=0,
+        archived_ratio=0.0,
+    ):
+        """Init.
+
+        Repositories of the first owner are owned by a user, the rest by
+        organizations.
+        """
+        self.seed = seed
+        self.repos = []
+        self.owners = {}
+        for idx in range(repos):
+            owner_idx = idx // max(repos_per_owner, 1)
+            if owner_idx == 0:
+                owner = {"login": "bench-user", "type": "User"}
+            else:
+                owner = {
+                    "login": "bench-org-{:04d}".format(owner_idx),
+                    "type": "Organization",
+                }
+
+            name = "repo-{:06d}".format(idx)
+            rng = random.Random("{}:{}".format(seed, idx))
+            repo = {
+                "owner": owner,
+                "name": name,
+                "full_name": "{:s}/{:s}".format(owner["login"], name),
+                "alerts": rng.randint(min_alerts, max_alerts),
+                "forbidden": rng.random() < forbidden_ratio,
+                "archived": rng.random() < archived_ratio,
+            }
+            self.repos.append(repo)
+            self.owners.setdefault(owner["login"], [])
+            self.owners[owner["login"]].append(repo)
+
+        self.repos_by_name = {repo["full_name"]: repo for repo in self.repos}
+
+    def get_totals(self):
+        """Return dict with number of repos, alerts and forbidden repos."""
+        return {
+            "repos": len(self.repos),
+            "alerts": sum(
+                repo["alerts"] for repo in self.repos if not repo["forbidden"]
+            ),
+            "forbidden": sum(1 for repo in self.repos if repo["forbidden"]),
+        }
+
+    def get_org_alerts(self, org):
+        """Return list of (repo, alert number) of all alerts of org."""
+        return [
+            (repo, number)
+            for repo in self.owners.get(org, [])
+            if not repo["forbidden"]
+            for number in range(repo["alerts"], 0, -1)
+        ]
+
+
+def owner_json(base_url, owner):
+    """Return JSON(dict) of repository owner."""
+    return {
+        "login": owner["login"],
+        "id": zlib.crc32(owner["login"].encode("utf-8")),
+        "type": owner["type"],
+        "avatar_url": "https://avatars.githubusercontent.com/u/1?v=4",
+        "html_url": "https://github.com/{:s}".format(owner["login"]),
+        "url": "{:s}/{:s}/{:s}".format(
+            base_url,
+            "orgs" if owner["type"] == "Organization" else "users",
+            owner["login"],
+        ),
+    }
+
+
+def repo_json(base_url, repo):
+    """Return JSON(dict) of repository."""
+    return {
+        "id": zlib.crc32(repo["full_name"].encode("utf-8")),
+        "name": repo["name"],
+        "full_name": repo["full_name"],
+        "owner": owner_json(base_url, repo["owner"]),
+        "private": False,
+        "fork": False,
+        "archived": repo.get("archived", False),
+        "disabled": False,
+        "html_url": "https://github.com/{:s}".format(repo["full_name"]),
+        "url": "{:s}/repos/{:s}".format(base_url, repo["full_name"]),
+    }
+
+
+def alert_json(base_url, estate, repo, number):
+    """Return JSON(dict) of dependabot alert number of repository."""
+    rng = random.Random("{}:{}:{}".format(estate.seed, repo["name"], number))
+    ecosystem, manifest_path = rng.choice(ECOSYSTEMS)
+    package = {
+        "ecosystem": ecosystem,
+        "name": "package-{:d}".format(rng.randint(0, 999)),
+    }
+    severity = rng.choice(SEVERITIES)
+    created_at = (CREATED_AT + timedelta(hours=number)).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
+    ghsa_id = "GHSA-{:04x}-{:04x}-{:04x}".format(
+        rng.getrandbits(16), rng.getrandbits(16), rng.getrandbits(16)
+    )
+    advisory = {
+        "ghsa_id": ghsa_id,
+        "cve_id": "CVE-2024-{:05d}".format(rng.randint(0, 99999)),
+        "summary": "Synthetic vulnerability in {:s}".format(package["name"]),
+        # NOTE: real descriptions are rather long and make up a large part
+        # of the payload.
+        "description": "Lorem ipsum dolor sit amet. " * 40,
+        "severity": severity,
+        "identifiers": [{"type": "GHSA", "value": ghsa_id}],
+        "references": [{"url": "https://example.com/advisory"}],
+        "published_at": created_at,
+        "updated_at": created_at,
+        "withdrawn_at": None,
+        "vulnerabilities": [],
+        "cwes": [
+            {"cwe_id": cwe_id, "name": "Synthetic weakness"}
+            for cwe_id in rng.sample(CWE_IDS, rng.randint(0, 2))
+        ],
+    }
+    vulnerability = {
+        "package": package,
+        "severity": severity,
+        "vulnerable_version_range": "< 1.0.0",
+        "first_patched_version": {"identifier": "1.0.0"},
+    }
+    return {
+        "number": number,
+        "state": "open",
+        "dependency": {
+            "package": package,
+            "manifest_path": manifest_path,
+            "scope": "runtime",
+        },
+        "security_advisory": advisory,
+        "security_vulnerability": vulnerability,
+        "url": "{:s}/repos/{:s}/dependabot/alerts/{:d}".format(
+            base_url, repo["full_name"], number
+        ),
+        "html_url": "https://github.com/{:s}/security/dependabot/{:d}".format(
+            repo["full_name"], number
+        ),
+        "created_at": created_at,
+        "updated_at": created_at,
+        "dismissed_at": None,
+        "dismissed_by": None,
+        "dismissed_reason": None,
+        "dismissed_comment": None,
+        "fixed_at": None,
+        "auto_dismissed_at": None,
+    }
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    """Handle requests to fake GitHub API."""
+
+    # NOTE: keep-alive, the same as GitHub.
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # noqa: N802
+        """Handle GET request."""
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        parts = url.path.strip("/").split("/")
+        self.counted = False
+        if parts == ["_stats"]:
+            self.send_json(200, self.server.get_stats())
+            return
+
+        self.server.count_request()
+        self.counted = True
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        estate = self.server.estate
+        base_url = self.server.base_url
+        if parts == ["user"]:
+            self.send_json(
+                200,
+                owner_json(base_url, {"login": "bench-user", "type": "User"}),
+            )
+        elif parts == ["user", "repos"]:
+            self.send_page(
+                url.path,
+                query,
+                estate.repos,
+                lambda repo: repo_json(base_url, repo),
+            )
+        elif len(parts) == 2 and parts[0] == "orgs":
+            if parts[1] not in estate.owners:
+                self.send_json(404, {"message": "Not Found"})
+                return
+
+            self.send_json(
+                200, owner_json(base_url, estate.owners[parts[1]][0]["owner"])
+            )
+        elif len(parts) == 3 and parts[0] == "orgs" and parts[2] == "repos":
+            if parts[1] not in estate.owners:
+                self.send_json(404, {"message": "Not Found"})
+                return
+
+            self.send_page(
+                url.path,
+                query,
+                estate.owners[parts[1]],
+                lambda repo: repo_json(base_url, repo),
+            )
+        elif (
+            len(parts) == 5
+            and parts[0] == "repos"
+            and parts[3:] == ["dependabot", "alerts"]
+        ):
+            repo = estate.repos_by_name.get("/".join(parts[1:3]))
+            if repo is None:
+                self.send_json(404, {"message": "Not Found"})
+            elif repo["forbidden"]:
+                self.send_json(
+                    403,
+                    {
+                        "message": (
+                            "Dependabot alerts are disabled for this "
+                            "repository."
+                        )
+                    },
+                )
+            else:
+                self.send_page(
+                    url.path,
+                    query,
+                    range(repo["alerts"], 0, -1),
+                    lambda number: alert_json(base_url, estate, repo, number),
+                )
+        elif (
+            len(parts) == 4
+            and parts[0] == "orgs"
+            and parts[2:] == ["dependabot", "alerts"]
+        ):
+            if parts[1] not in estate.owners:
+                self.send_json(404, {"message": "Not Found"})
+                return
+
+            def org_alert_json(item):
+                repo, number = item
+                data = alert_json(base_url, estate, repo, number)
+                data["repository"] = repo_json(base_url, repo)
+                return data
+
+            self.send_page(
+                url.path,
+                query,
+                estate.get_org_alerts(parts[1]),
+                org_alert_json,
+            )
+        else:
+            self.send_json(404, {"message": "Not Found"})
+
+    def send_page(self, path, query, items, to_json):
+        """Send one page of items with pagination Link header."""
+        per_page = min(int(query.get("per_page", 30)), 100)
+        page = int(query.get("page", 1))
+        start = (page - 1) * per_page
+        data = [to_json(item) for item in items[start:][:per_page]]
+        headers = {}
+        if start + per_page < len(items):
+            query["page"] = str(page + 1)
+            headers["Link"] = '<{:s}{:s}?{:s}>; rel="next"'.format(
+                self.server.base_url, path, urllib.parse.urlencode(query)
+            )
+
+        self.send_json(200, data, headers)
+
+    def send_json(self, status, data, headers=None):
+        """Send JSON response.
+
+        Successful responses carry ETag and 304 is sent when request's
+        If-None-Match matches it, the same as GitHub does. Rate limit
+        headers are sent if server has rate limit, 304 doesn't count against
+        it.
+        """
+        body = json.dumps(data).encode("utf-8")
+        headers = dict(headers or {})
+        if status == 200:
+            headers["ETag"] = '"{:08x}"'.format(zlib.crc32(body))
+            if self.headers.get("If-None-Match") == headers["ETag"]:
+                status = 304
+                body = b""
+
+        if self.counted and self.server.rate_limit:
+            headers.update(self.server.get_rate_limit_headers(status != 304))
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        """Don't log requests."""
+
+
+class FakeGitHubServer(ThreadingHTTPServer):
+    """HTTP server serving fake GitHub API."""
+
+    daemon_threads = True
+
+    def __init__(
+        self, estate, host="127.0.0.1", port=0, latency=0.0, rate_limit=0
+    ):
+        """Init.
+
+        :param latency: seconds to sleep before responding to request.
+        :param rate_limit: requests per hour announced in X-RateLimit-*
+            headers, 0 means that no such headers are sent. Requests aren't
+            rejected once it's exhausted.
+        """
+        super().__init__((host, port), FakeGitHubHandler)
+        self.estate = estate
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_used = 0
+        self.rate_limit_reset = int(time.time()) + 3600
+        self.base_url = "http://{:s}:{:d}".format(*self.server_address[:2])
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count_request(self):
+        """Count served request."""
+        with self._lock:
+            self.requests += 1
+
+    def get_rate_limit_headers(self, charge):
+        """Return X-RateLimit-* headers(dict) of a response.
+
+        :param charge: whether response counts against rate limit.
+        """
+        with self._lock:
+            if charge:
+                self.rate_limit_used += 1
+
+            return {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Remaining": str(
+                    max(self.rate_limit - self.rate_limit_used, 0)
+                ),
+                "X-RateLimit-Reset": str(self.rate_limit_reset),
+                "X-RateLimit-Used": str(self.rate_limit_used),
+                "X-RateLimit-Resource": "core",
+            }
+
+    def get_stats(self):
+        """Return stats(dict) of the server."""
+        with self._lock:
+            return {"requests": self.requests}
+
+
+def main():
+    """Start fake GitHub API server."""
+    args = parse_args()
+    estate = Estate(
+        repos=args.repos,
+        min_alerts=args.min_alerts,
+        max_alerts=args.max_alerts,
+        forbidden_ratio=args.forbidden_ratio,
+        repos_per_owner=args.repos_per_owner,
+        seed=args.seed,
+        archived_ratio=args.archived_ratio,
+    )
+    server = FakeGitHubServer(
+        estate, args.host, args.port, args.latency, args.rate_limit
+    )
+    # NOTE: first line of output is read by benchmark runner.
+    print(server.base_url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def parse_args() -> argparse.Namespace:
+    """Return parsed CLI args."""
+    parser = argparse.ArgumentParser(allow_abbrev=False)
+    parser.add_argument(
+        "--repos",
+        type=int,
+        default=10,
+        help="Number of repositories. Default is %(default)s.",
+    )
+    add_estate_args(parser)
+    parser.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="Address to listen on. Default is %(default)s.",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=0,
+        help="Port to listen on, 0 means any free port.",
+    )
+    return parser.parse_args()
+
+
+def add_estate_args(parser):
+    """Add CLI args describing estate and server to parser."""
+    parser.add_argument(
+        "--min-alerts",
+        type=int,
+        default=0,
+        help="Min. number of alerts per repository. Default is %(default)s.",
+    )
+    parser.add_argument(
+        "--max-alerts",
+        type=int,
+        default=500,
+        help="Max. number of alerts per repository. Default is %(default)s.",
+    )
+    parser.add_argument(
+        "--forbidden-ratio",
+        type=float,
+        default=0.05,
+        help=(
+            "Ratio of repositories which respond with 403. "
+            "Default is %(default)s."
+        ),
+    )
+    parser.add_argument(
+        "--archived-ratio",
+        type=float,
+        default=0.0,
+        help="Ratio of archived repositories. Default is %(default)s.",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds of latency injected into every request.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=0,
+        help=(
+            "Requests per hour announced in X-RateLimit-* headers, e.g. "
+            "5000 as GitHub does for a token. Default is %(default)s, which "
+            "means no such headers."
+        ),
+    )
+    parser.add_argument(
+        "--repos-per-owner",
+        type=int,
+        default=100,
+        help="Number of repositories per owner. Default is %(default)s.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the estate. Default is %(default)s.",
+    )
+
+
+if __name__ == "__main__":
+    main()
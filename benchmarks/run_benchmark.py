@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Benchmark fetching and rendering of dependabot report.
+
+Fake GitHub API(benchmarks/fake_github.py) is started in a separate process
+for each estate size, so it doesn't skew measurements. Data are fetched via
+get_dependabot_data() and rendered via render_template(). Wall time, number
+of API requests and peak memory(tracemalloc) are reported for each phase
+separately.
+
+Usage: python3 -m benchmarks.run_benchmark --repos 10 --repos 1000
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+
+import dependabot_report
+from benchmarks import fake_github
+from lib.repofilter import RepoFilter
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+MIB = 1024 * 1024
+
+
+def start_server(repos, args):
+    """Start fake GitHub API server and return tuple (process, base URL)."""
+    cmd = [
+        sys.executable,
+        "-m",
+        "benchmarks.fake_github",
+        "--repos",
+        str(repos),
+        "--min-alerts",
+        str(args.min_alerts),
+        "--max-alerts",
+        str(args.max_alerts),
+        "--forbidden-ratio",
+        str(args.forbidden_ratio),
+        "--archived-ratio",
+        str(args.archived_ratio),
+        "--latency",
+        str(args.latency),
+        "--rate-limit",
+        str(args.rate_limit),
+        "--repos-per-owner",
+        str(args.repos_per_owner),
+        "--seed",
+        str(args.seed),
+    ]
+    proc = subprocess.Popen(
+        cmd, cwd=ROOT_PATH, stdout=subprocess.PIPE, text=True
+    )
+    base_url = proc.stdout.readline().strip()
+    if not base_url:
+        proc.wait()
+        raise RuntimeError("Fake GitHub API server failed to start")
+
+    return proc, base_url
+
+
+def get_request_count(base_url):
+    """Return number of requests served by fake GitHub API server."""
+    with urllib.request.urlopen(base_url + "/_stats") as response:
+        return json.loads(response.read())["requests"]
+
+
+def measure(func, trace_memory):
+    """Call func and return tuple (result, wall time, peak memory in MiB)."""
+    if trace_memory:
+        tracemalloc.reset_peak()
+
+    timer_start = time.perf_counter()
+    result = func()
+    wall_sec = time.perf_counter() - timer_start
+    peak_mib = None
+    if trace_memory:
+        peak_mib = tracemalloc.get_traced_memory()[1] / MIB
+
+    return result, wall_sec, peak_mib
+
+
+def run_benchmark(repos, args):
+    """Run benchmark with estate of given size and return results(dict)."""
+    trace_memory = not args.no_tracemalloc
+    proc, base_url = start_server(repos, args)
+    try:
+        requests_start = get_request_count(base_url)
+        context, fetch_sec, fetch_peak_mib = measure(
+            lambda: dependabot_report.get_dependabot_data(
+                "benchmark-token",
+                "owner,collaborator,organization_member",
+                None,
+                False,
+                workers=args.workers,
+                bulk_fetch=args.bulk_fetch,
+                backend=args.backend,
+                base_url=base_url,
+                repo_filter=RepoFilter(skip_archived=args.skip_archived),
+            ),
+            trace_memory,
+        )
+        requests = get_request_count(base_url) - requests_start
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    context["report_mtime"] = dependabot_report.get_report_mtime()
+    context["timing_sec"] = "0"
+    with tempfile.TemporaryFile("w", encoding="utf-8") as fhandle:
+        _, render_sec, render_peak_mib = measure(
+            lambda: dependabot_report.render_template(
+                context, dependabot_report.TEMPLATE_FNAME, fhandle
+            ),
+            trace_memory,
+        )
+        output_mib = fhandle.tell() / MIB
+
+    alerts = 0
+    for namespace_data in context["namespaces"].values():
+        for repo_detail in namespace_data["repos"].values():
+            alerts += len(repo_detail["alerts"])
+
+    return {
+        "repos": repos,
+        "alerts": alerts,
+        "fetch": {
+            "wall_sec": round(fetch_sec, 3),
+            "requests": requests,
+            "peak_mib": round_or_none(fetch_peak_mib),
+        },
+        "render": {
+            "wall_sec": round(render_sec, 3),
+            "peak_mib": round_or_none(render_peak_mib),
+            "output_mib": round(output_mib, 3),
+        },
+    }
+
+
+def round_or_none(value):
+    """Return value rounded to 3 decimal places or None."""
+    if value is None:
+        return None
+
+    return round(value, 3)
+
+
+def format_change(value, baseline_value):
+    """Return change of value against baseline formatted as percentage."""
+    if value is None or not baseline_value:
+        return ""
+
+    return " ({:+.1f}%)".format((value - baseline_value) * 100 / baseline_value)
+
+
+def format_result(result, baseline=None):
+    """Return result of benchmark formatted for output."""
+    lines = ["repos={:d} alerts={:d}".format(result["repos"], result["alerts"])]
+    for phase in ("fetch", "render"):
+        baseline_phase = (baseline or {}).get(phase, {})
+        items = []
+        for key, value in result[phase].items():
+            if value is None:
+                continue
+
+            items.append(
+                "{:s}={}{:s}".format(
+                    key, value, format_change(value, baseline_phase.get(key))
+                )
+            )
+
+        lines.append("  {:s}: {:s}".format(phase, " ".join(items)))
+
+    return "\n".join(lines)
+
+
+def main():
+    """Run benchmarks and print results."""
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    baselines = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fhandle:
+            for result in json.load(fhandle):
+                baselines[result["repos"]] = result
+
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+
+    results = []
+    for repos in args.repos or [10, 1000]:
+        result = run_benchmark(repos, args)
+        results.append(result)
+        print(format_result(result, baselines.get(repos)), flush=True)
+
+    if args.output_json:
+        with open(args.output_json, "w", encoding="utf-8") as fhandle:
+            json.dump(results, fhandle, indent=2)
+
+
+def parse_args() -> argparse.Namespace:
+    """Return parsed CLI args."""
+    parser = argparse.ArgumentParser(allow_abbrev=False)
+    parser.add_argument(
+        "--repos",
+        type=int,
+        action="append",
+        help=(
+            "Number of repositories in estate. Can be passed multiple times. "
+            "Default is 10 and 1000."
+        ),
+    )
+    fake_github.add_estate_args(parser)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of workers passed to fetch. Default is %(default)s.",
+    )
+    parser.add_argument(
+        "--bulk-fetch",
+        action="store_true",
+        default=False,
+        help="Fetch alerts via organization endpoint.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["pygithub", "rest"],
+        default="pygithub",
+        help="Backend passed to fetch. Default is %(default)s.",
+    )
+    parser.add_argument(
+        "--skip-archived",
+        action="store_true",
+        default=False,
+        help="Skip alerts of archived repositories.",
+    )
+    parser.add_argument(
+        "--no-tracemalloc",
+        action="store_true",
+        default=False,
+        help=(
+            "Don't measure peak memory. tracemalloc slows down Python "
+            "considerably, wall time is more accurate without it."
+        ),
+    )
+    parser.add_argument(
+        "--output-json",
+        type=str,
+        help="Write results as JSON into given file.",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        help="Compare results against results in given JSON file.",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env bash
+# Check that startup of dependabot_report stays within import time budget and
+# that heavy modules aren't imported at startup.
+set -e
+set -u
+
+# Budget of cumulative import time of dependabot_report in microseconds.
+BUDGET_US=${IMPORT_TIME_BUDGET_US:-100000}
+HEAVY_MODULES="github jinja2"
+RUNS=5
+
+cd "$(dirname "${0}")/.."
+
+best_us=""
+for _ in $(seq 1 "${RUNS}"); do
+    output=$(python3 -X importtime -c "import dependabot_report" 2>&1)
+    for module in ${HEAVY_MODULES}; do
+        if printf "%s\n" "${output}" | grep -E -q "\| +${module}$"; then
+            printf "Module '%s' is imported at startup.\n" "${module}" 1>&2
+            exit 1
+        fi
+    done
+
+    import_us=$(
+        printf "%s\n" "${output}" | \
+            awk -F '|' '$3 == " dependabot_report" { print $2 + 0 }'
+    )
+    if [ -z "${best_us}" ] || [ "${import_us}" -lt "${best_us}" ]; then
+        best_us="${import_us}"
+    fi
+done
+
+printf "Import time of dependabot_report is %s us, budget is %s us.\n" \
+    "${best_us}" "${BUDGET_US}"
+if [ "${best_us}" -gt "${BUDGET_US}" ]; then
+    printf "Import time budget exceeded.\n" 1>&2
+    exit 1
+fi
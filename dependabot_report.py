@@ -8,25 +8,53 @@ Copyright (c) 2024 Zdenek Styblik
 See LICENSE for details.
 """
 import argparse
+import collections
+import contextlib
+import functools
+import itertools
 import logging
 import os
+import queue
+import signal
 import sys
+import threading
 import time
+import types
 from datetime import datetime
 from datetime import timezone
 
-import github
-from jinja2 import Environment
-from jinja2 import FileSystemLoader
-from jinja2 import select_autoescape
+from lib import atomic
+from lib import catalogs
+from lib import formats
+from lib import fragments
+from lib import graphql
+from lib import pages
+from lib import rest
+from lib import snapshot
+from lib.alert import Alert
+from lib.metrics import Metrics
+from lib.ratelimit import RateLimiter
+from lib.ratelimit import TokenPool
+from lib.repofilter import RepoFilter
 
-from lib.cisa import CWE_CISA_KEV_2023
-from lib.owasp import CWE_OWASP_2021
+# NOTE: PyGithub, Jinja2 and other heavy modules are imported only in code
+# paths which need them, so `--help` or rendering of already fetched data
+# starts fast. See ci/run-import-time-check.sh.
 
 SCRIPT_PATH = os.path.dirname(os.path.realpath(__file__))
 TEMPLATE_FNAME = os.path.join(
     SCRIPT_PATH, "templates", "dependabot_report.html"
 )
+INDEX_TEMPLATE_FNAME = os.path.join(
+    SCRIPT_PATH, "templates", "dependabot_report_index.html"
+)
+# NOTE: template of repository fragment is looked up next to the template.
+REPO_TEMPLATE_NAME = "dependabot_report_repo.html"
+# NOTE: how often(seconds) to check whether to stop while waiting for events.
+WEBHOOK_POLL_INTERVAL = 1.0
+# NOTE: repos whose alerts are being fetched at once per worker, so workers
+# don't wait for listing of repos.
+FETCH_WINDOW_PER_WORKER = 4
 
 
 class GitHubProviderException(Exception):
@@ -38,6 +66,41 @@ class GitHubProviderException(Exception):
         self.message = kwargs.get("message")
 
 
+class LazyValue:
+    """Value for jinja2 template which is computed when it's rendered."""
+
+    def __init__(self, func):
+        """Init."""
+        self.func = func
+
+    def __str__(self):
+        """Compute and return value."""
+        return str(self.func())
+
+
+class NamespaceStream:
+    """Namespaces for jinja2 template which are fetched as they're rendered.
+
+    Output rendered so far is flushed before the next namespace is fetched,
+    therefore only one namespace is held in memory at a time.
+    """
+
+    def __init__(self, namespaces, flush):
+        """Init.
+
+        :param namespaces: iterable of tuples (namespace, namespace data).
+        :param flush: callable which flushes the output.
+        """
+        self.namespaces = namespaces
+        self.flush = flush
+
+    def values(self):
+        """Yield namespace data."""
+        for _, namespace_data in self.namespaces:
+            yield namespace_data
+            self.flush()
+
+
 def calc_log_level(count: int) -> int:
     """Return logging log level as int based on count."""
     log_level = 40 - max(count, 0) * 10
@@ -48,178 +111,1529 @@ def calc_log_level(count: int) -> int:
 def get_github_token(input_data: str) -> str:
     """Return GH Token parsed out of input_data.
 
+    :raises GitHubProviderException: if there is an error.
+    """
+    return get_secret(input_data, "GitHub Token")
+
+
+def get_secret(input_data: str, name: str) -> str:
+    """Return secret parsed out of input_data.
+
+    :param name: name of the secret used in error messages.
     :raises GitHubProviderException: if there is an error.
     """
     provider = input_data.split(":")[0]
     provider = provider.lower()
-    token_path = ":".join(input_data.split(":")[1:])
+    secret_path = ":".join(input_data.split(":")[1:])
     if not provider:
-        raise GitHubProviderException(message="GitHub Token Provider is empty")
+        raise GitHubProviderException(
+            message="{:s} Provider is empty".format(name)
+        )
 
-    if not token_path:
-        raise GitHubProviderException(message="GitHub Token Path is empty")
+    if not secret_path:
+        raise GitHubProviderException(message="{:s} Path is empty".format(name))
 
     # NOTE(zstyblik): in case of eg. AWS SSM, branch these off into functions.
     if provider == "file":
         try:
-            with open(token_path, mode="r", encoding="utf-8") as fhandle:
-                token = fhandle.read()
+            with open(secret_path, mode="r", encoding="utf-8") as fhandle:
+                secret = fhandle.read()
         except OSError as exc:
-            message = "Error reading GitHub Token from '{:s}': {}".format(
-                token_path, exc.strerror
+            message = "Error reading {:s} from '{:s}': {}".format(
+                name, secret_path, exc.strerror
             )
             raise GitHubProviderException(message=message) from exc
 
     elif provider == "env":
-        token = os.environ.get(token_path, "")
+        secret = os.environ.get(secret_path, "")
     else:
         raise GitHubProviderException(
-            message="GitHub Token Provider '{}' is not supported".format(
-                provider
-            )
+            message="{:s} Provider '{}' is not supported".format(name, provider)
         )
 
-    return token.strip()
+    return secret.strip()
 
 
-def get_dependabot_data(
-    token, repo_affiliation, exclude_github_owner, exclude_forks
-):
+def get_dependabot_data(*args, **kwargs):
     """Get data from GitHub and return it as context(dict) for jinja2.
 
-    * Auth
-    * Get repos
-    * Get dependabot alerts for repos
-    * Transform and return as ctx(dict)
+    See iter_dependabot_data() for arguments.
+    """
+    return merge_namespaces(iter_dependabot_data(*args, **kwargs))
+
+
+def merge_namespaces(namespaces):
+    """Return context(dict) for jinja2 with given namespaces.
+
+    :param namespaces: iterable of tuples (namespace, namespace data).
     """
-    auth = github.Auth.Token(token)
-    ghub = github.Github(auth=auth)
-    guser = ghub.get_user()
-    logging.info(
-        "Authentication to GitHub successful - authenticated as '%s'.",
-        guser.login,
-    )
     context = {
         "namespaces": {},
         "report_mtime": 0,
         "timing_sec": "0",
     }
-    # NOTE(zstyblik): we want only repos user has access to, not the whole GH!
-    repos = guser.get_repos(
-        affiliation=repo_affiliation, sort="full_name", direction="asc"
+    for namespace, namespace_data in namespaces:
+        # NOTE: repos of one namespace might not be listed consecutively.
+        if namespace in context["namespaces"]:
+            context["namespaces"][namespace]["repos"].update(
+                namespace_data["repos"]
+            )
+        else:
+            context["namespaces"][namespace] = namespace_data
+
+    return context
+
+
+def iter_dependabot_data(
+    token,
+    repo_affiliation,
+    exclude_github_owner,
+    exclude_forks,
+    workers=1,
+    bulk_fetch=False,
+    github_enterprise=None,
+    cache=None,
+    store=None,
+    rate_limiter=None,
+    backend="pygithub",
+    base_url=None,
+    metrics=None,
+    ghub=None,
+    repo_filter=None,
+    github_orgs=None,
+    error_cache=None,
+    checkpoint=None,
+):
+    """Get data from GitHub and yield it namespace by namespace.
+
+    * Auth
+    * Get repos
+    * Get dependabot alerts of repos as they're listed, up to `workers` repos
+      at once regardless of their namespace. If `bulk_fetch` is enabled,
+      alerts of organization-owned repos are fetched via organization-wide
+      (or enterprise-wide) endpoint instead.
+    * If `cache` is given, API responses are cached and conditional requests
+      are used
+    * If `store` is given, alerts are synced incrementally into the store
+      and repo details are built from the store
+    * If `backend` is "graphql", alerts are fetched in batches via GraphQL API
+    * If `backend` is "rest", JSON of REST API is parsed directly by
+      lib.rest.RestClient instead of PyGithub
+    * All requests are scheduled by `rate_limiter`, default one is used if
+      none is given. lib.ratelimit.TokenPool spreads requests across several
+      tokens, `token` is then used only until the first request is scheduled
+    * `base_url` of GitHub API can be given, e.g. for benchmarks
+    * Phases, latency of repos and API requests are recorded in `metrics`
+    * Client created by new_github_client() can be passed as `ghub` in order
+      to be reused, `token`, `cache`, `rate_limiter` and `base_url` are then
+      ignored
+    * Repos are excluded or skipped by `repo_filter`(lib.repofilter.RepoFilter)
+      while they're listed, `exclude_github_owner` and `exclude_forks` are
+      then ignored. Skipped repos are reported without alerts
+    * If `github_orgs` are given, repos of these organizations are listed
+      instead of repos user has access to
+    * If `error_cache`(lib.errorcache.ErrorCache) is given, repos whose
+      alerts failed to be fetched recently are reported as errors without
+      any request. Cache is saved once all namespaces are fetched
+    * If `checkpoint`(lib.checkpoint.Checkpoint) is given, each fetched repo
+      is recorded in it and repos restored from it aren't fetched again.
+      Checkpoint is removed once all namespaces are fetched
+    * Transform and yield tuples (namespace, namespace data)
+    """
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+
+    if metrics is None:
+        metrics = Metrics()
+
+    if repo_filter is None:
+        repo_filter = RepoFilter(
+            exclude_owners=exclude_github_owner, exclude_forks=exclude_forks
+        )
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    if ghub is None:
+        ghub = new_github_client(
+            token, workers, cache, rate_limiter, backend, base_url, metrics
+        )
+
+    with metrics.phase("auth"):
+        guser = ghub.get_user()
+        logging.info(
+            "Authentication to GitHub successful - authenticated as '%s'.",
+            guser.login,
+        )
+
+    repos = iter_repos(ghub, guser, repo_affiliation, github_orgs)
+    enterprise_alerts = {}
+    if github_enterprise:
+        with metrics.phase("alerts"):
+            enterprise_alerts = get_enterprise_alerts(ghub, github_enterprise)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            pipeline = FetchPipeline(
+                ghub,
+                executor,
+                max(workers, 1) * FETCH_WINDOW_PER_WORKER,
+                bulk_fetch,
+                github_enterprise,
+                enterprise_alerts,
+                store,
+                backend,
+                metrics,
+                error_cache,
+                checkpoint,
+            )
+            try:
+                for owner, repo, skip_reason in filter_repos(
+                    metrics.iter_phase("repo_listing", repos), repo_filter
+                ):
+                    if repo is None:
+                        pipeline.start_namespace(owner.login, owner)
+                    else:
+                        pipeline.add_repo(repo, skip_reason)
+                        yield from pipeline.iter_done()
+
+                yield from pipeline.iter_done(finish=True)
+            finally:
+                pipeline.cancel()
+
+        if error_cache is not None:
+            error_cache.save()
+
+        if checkpoint is not None:
+            checkpoint.finish()
+    finally:
+        # NOTE: checkpoint of interrupted fetch is kept for --resume.
+        if checkpoint is not None:
+            checkpoint.close()
+
+
+def new_github_client(
+    token,
+    workers=1,
+    cache=None,
+    rate_limiter=None,
+    backend="pygithub",
+    base_url=None,
+    metrics=None,
+):
+    """Return GitHub client for given backend.
+
+    Client is either PyGithub's Github or lib.rest.RestClient. See
+    iter_dependabot_data() for arguments.
+    """
+    import github
+    from urllib3.util import Retry
+
+    from lib import connection
+
+    # NOTE: rate limits are handled by rate_limiter, retry only on server
+    # errors here.
+    retry = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[500, 502, 503, 504],
+        raise_on_status=False,
     )
+    if backend == "rest":
+        return rest.RestClient(
+            token,
+            base_url=base_url,
+            pool_size=max(workers, 1),
+            cache=cache,
+            rate_limiter=rate_limiter,
+            metrics=metrics,
+            retry=retry,
+        )
+
+    connection.install(cache, rate_limiter, metrics)
+    auth = github.Auth.Token(token)
+    return github.Github(
+        auth=auth,
+        base_url=base_url or github.Consts.DEFAULT_BASE_URL,
+        per_page=100,
+        retry=retry,
+        pool_size=max(workers, 1),
+        # NOTE: fixed delay between requests would serialize workers.
+        seconds_between_requests=None if workers > 1 else 0.25,
+        # NOTE: GraphQL queries are POST requests, but not writes.
+        seconds_between_writes=None,
+    )
+
+
+class PendingNamespace:
+    """Namespace whose repos are being fetched.
+
+    Each entry is a list [repo, repo detail, future]. Repo detail is None
+    until alerts of the repo are fetched, future is None unless fetch has
+    been submitted to executor.
+    """
+
+    def __init__(self, namespace, owner):
+        """Init."""
+        self.namespace = namespace
+        self.owner = owner
+        self.entries = []
+        self.graphql_entries = []
+        self.bulk_alerts = None
+        self.bulk_checked = False
+        self.closed = False
+
+    def is_done(self):
+        """Return True if all repos have been listed and fetched."""
+        return self.closed and all(
+            entry[1] is not None or entry[2].done() for entry in self.entries
+        )
+
+    def get_namespace_data(self):
+        """Return namespace data."""
+        return {
+            "owner": self.owner,
+            "repos": {entry[0].full_name: entry[1] for entry in self.entries},
+        }
+
+
+class FetchPipeline:
+    """Fetch alerts of repos as they're listed and yield whole namespaces.
+
+    Alerts of up to `window` repos are fetched at once regardless of
+    namespace boundaries, therefore neither change of owner nor listing of
+    repos stalls workers. Namespaces are yielded in listing order once
+    alerts of all their repos are fetched. Fetched repos are recorded in
+    error cache and checkpoint by the thread which consumes namespaces.
+
+    See iter_dependabot_data() for arguments.
+    """
+
+    def __init__(
+        self,
+        ghub,
+        executor,
+        window,
+        bulk_fetch,
+        github_enterprise,
+        enterprise_alerts,
+        store,
+        backend,
+        metrics,
+        error_cache=None,
+        checkpoint=None,
+    ):
+        """Init.
+
+        :param window: max. number of repos whose alerts are being fetched
+            at once.
+        """
+        self.ghub = ghub
+        self.executor = executor
+        self.window = max(window, 1)
+        self.bulk_fetch = bulk_fetch
+        self.github_enterprise = github_enterprise
+        self.enterprise_alerts = enterprise_alerts
+        self.store = store
+        self.backend = backend
+        self.metrics = metrics
+        self.error_cache = error_cache
+        self.checkpoint = checkpoint
+        self.pending = collections.deque()
+        self.in_flight = {}
+        if backend == "rest":
+            self.fetch_repo = functools.partial(get_rest_repo_alerts, ghub)
+        elif store is not None:
+            self.fetch_repo = functools.partial(sync_repo_alerts, store)
+        else:
+            self.fetch_repo = get_repo_alerts
+
+        self.fetch_repo = metrics.repo_timer(self.fetch_repo)
+
+    def start_namespace(self, namespace, owner):
+        """Start namespace whose repos are listed next."""
+        self.close_namespace()
+        self.pending.append(PendingNamespace(namespace, owner))
+
+    def close_namespace(self):
+        """Mark the last namespace as listed completely."""
+        if not self.pending or self.pending[-1].closed:
+            return
+
+        pending = self.pending[-1]
+        pending.closed = True
+        if pending.graphql_entries:
+            repos = [entry[0] for entry in pending.graphql_entries]
+            with self.metrics.phase("alerts"):
+                repo_details = get_graphql_repo_details(
+                    self.ghub, repos, self.executor
+                )
+                for entry, repo_detail in zip(
+                    pending.graphql_entries, repo_details
+                ):
+                    entry[1] = repo_detail
+                    self.record(entry[0].full_name, repo_detail)
+
+    def add_repo(self, repo, skip_reason=None):
+        """Add repo of the last namespace and start fetch of its alerts."""
+        pending = self.pending[-1]
+        entry = [repo, None, None]
+        pending.entries.append(entry)
+        repo_detail = None
+        if self.checkpoint is not None:
+            repo_detail = self.checkpoint.pop_repo(repo.full_name)
+
+        if skip_reason:
+            entry[1] = new_skipped_repo_detail(repo, skip_reason)
+        elif repo_detail is not None:
+            logging.debug("Restore '%s' from checkpoint.", repo.full_name)
+            entry[1] = repo_detail
+            # NOTE: restored repos were fetched by interrupted run, whose
+            # error cache hasn't been saved.
+            if self.error_cache is not None:
+                self.error_cache.update(
+                    repo.full_name, repo_detail["alerts_error"]
+                )
+        elif self.error_cache is not None and self.error_cache.has_error(
+            repo.full_name
+        ):
+            logging.debug("Use cached error of '%s'.", repo.full_name)
+            entry[1] = new_error_repo_detail(repo)
+        elif self.get_bulk_alerts(pending) is not None:
+            entry[1] = build_repo_detail(
+                repo, pending.bulk_alerts.get(repo.full_name, [])
+            )
+            self.record(repo.full_name, entry[1])
+        elif self.backend == "graphql":
+            pending.graphql_entries.append(entry)
+        else:
+            while len(self.in_flight) >= self.window:
+                self.reap(block=True)
+
+            entry[2] = self.executor.submit(self.fetch_repo, repo)
+            self.in_flight[entry[2]] = entry
+
+    def get_bulk_alerts(self, pending):
+        """Return alerts of organization by repo or None.
+
+        Alerts are fetched with the first repo of namespace which needs
+        them.
+        """
+        is_org = pending.owner.type == "Organization"
+        if not (self.bulk_fetch or self.github_enterprise) or not is_org:
+            return None
+
+        if not pending.bulk_checked:
+            pending.bulk_checked = True
+            with self.metrics.phase("alerts"):
+                pending.bulk_alerts = get_org_alerts(
+                    self.ghub, pending.namespace, self.enterprise_alerts
+                )
+
+        return pending.bulk_alerts
+
+    def record(self, full_name, repo_detail):
+        """Record fetched repo in error cache and checkpoint."""
+        if self.error_cache is not None:
+            self.error_cache.update(full_name, repo_detail["alerts_error"])
+
+        if self.checkpoint is not None:
+            self.checkpoint.add(full_name, repo_detail)
+
+    def reap(self, block=False):
+        """Collect results of finished fetches.
+
+        :param block: wait until at least one fetch is finished.
+        :raises Exception: if fetch of any repo has failed.
+        """
+        import concurrent.futures
+
+        if not self.in_flight:
+            return
+
+        with self.metrics.phase("alerts"):
+            done, _ = concurrent.futures.wait(
+                self.in_flight,
+                timeout=None if block else 0,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+
+        # NOTE: record in submission order, so checkpoint follows listing.
+        for future in [future for future in self.in_flight if future in done]:
+            entry = self.in_flight.pop(future)
+            entry[1] = future.result()
+            self.record(entry[0].full_name, entry[1])
+
+    def iter_done(self, finish=False):
+        """Yield tuples (namespace, namespace data) of finished namespaces.
+
+        :param finish: listing is finished, wait for all namespaces.
+        """
+        if finish:
+            self.close_namespace()
+
+        self.reap()
+        while self.pending:
+            if finish:
+                while not self.pending[0].is_done():
+                    self.reap(block=True)
+            elif not self.pending[0].is_done():
+                return
+
+            # NOTE: results of fetches which finished in the meantime.
+            self.reap()
+            pending = self.pending.popleft()
+            yield pending.namespace, pending.get_namespace_data()
+
+    def cancel(self):
+        """Cancel fetches which haven't started yet."""
+        for future in self.in_flight:
+            future.cancel()
+
+
+def filter_repos(repos, repo_filter):
+    """Apply filters to repositories as they're listed.
+
+    Yield tuples (owner, repo, skip reason) of repos which aren't excluded.
+    Tuple (owner, None, None) is yielded whenever repos of another owner
+    start, even if all of them are excluded later.
+
+    :param repo_filter: lib.repofilter.RepoFilter
+    """
+    namespace = None
+    excluded = False
     for repo in repos:
-        namespace = repo.owner.login
-        if exclude_github_owner and namespace in exclude_github_owner:
-            logging.debug("Skip '%s' based on GitHub owner filter.", namespace)
+        if repo.owner.login != namespace:
+            namespace = repo.owner.login
+            excluded = repo_filter.is_owner_excluded(namespace)
+            if excluded:
+                logging.debug(
+                    "Skip '%s' based on GitHub owner filter.", namespace
+                )
+            else:
+                yield repo.owner, None, None
+
+        if excluded:
             continue
 
-        if namespace not in context["namespaces"]:
-            context["namespaces"][namespace] = {
-                "owner": repo.owner,
-                "repos": {},
-            }
+        reason = repo_filter.get_exclude_reason(repo)
+        if reason:
+            logging.debug(
+                "Skip repository '%s' because %s.", repo.full_name, reason
+            )
+            continue
+
+        reason = repo_filter.get_skip_reason(repo)
+        if reason:
+            logging.debug(
+                "Skip alerts of '%s' because it's %s.", repo.full_name, reason
+            )
+
+        yield repo.owner, repo, reason
+
+
+def iter_repos(ghub, guser, repo_affiliation, github_orgs):
+    """Return iterable of repositories authenticated user has access to.
+
+    Repositories of given organizations are listed instead if any is given.
+    """
+    if not github_orgs:
+        # NOTE(zstyblik): we want only repos user has access to, not the
+        # whole GH!
+        return guser.get_repos(
+            affiliation=repo_affiliation, sort="full_name", direction="asc"
+        )
+
+    return itertools.chain.from_iterable(
+        get_org_repos(ghub, org) for org in github_orgs
+    )
+
+
+def get_org_repos(ghub, org):
+    """Return iterable of repositories of given organization."""
+    if isinstance(ghub, rest.RestClient):
+        return ghub.get_org_repos(org)
+
+    return ghub.get_organization(org).get_repos(
+        type="all", sort="full_name", direction="asc"
+    )
+
+
+def get_enterprise_alerts(ghub, github_enterprise):
+    """Get alerts via enterprise endpoint grouped by namespace and repository.
+
+    Return dict with namespace as a key and dict as returned by
+    get_alerts_by_repo() as a value.
+    """
+    url = "/enterprises/{:s}/dependabot/alerts".format(github_enterprise)
+    alerts_by_repo = get_alerts_by_repo(ghub, url)
+    if alerts_by_repo is None:
+        logging.warning(
+            "Unable to get alerts of enterprise '%s', fall back to "
+            "organization endpoints.",
+            github_enterprise,
+        )
+        return {}
+
+    enterprise_alerts = {}
+    for full_name, alerts in alerts_by_repo.items():
+        namespace = full_name.split("/")[0]
+        enterprise_alerts.setdefault(namespace, {})
+        enterprise_alerts[namespace][full_name] = alerts
+
+    return enterprise_alerts
+
+
+def get_org_alerts(ghub, namespace, enterprise_alerts):
+    """Get alerts of organization-owned repos via org/enterprise endpoints.
+
+    Return dict as returned by get_alerts_by_repo() or None, if alerts have
+    to be fetched repo by repo.
+    """
+    if namespace in enterprise_alerts:
+        return enterprise_alerts.pop(namespace)
+
+    # NOTE: organizations without any alert in enterprise-wide listing might
+    # not be part of the enterprise at all.
+    url = "/orgs/{:s}/dependabot/alerts".format(namespace)
+    alerts_by_repo = get_alerts_by_repo(ghub, url)
+    if alerts_by_repo is None:
+        logging.warning(
+            "Unable to get alerts of organization '%s', fall back to "
+            "fetching alerts repo by repo.",
+            namespace,
+        )
+
+    return alerts_by_repo
+
+
+def get_alerts_by_repo(ghub, url):
+    """Get open alerts from org/enterprise endpoint grouped by repository.
+
+    Return dict with repository full name as a key and list of its alerts as
+    a value or None when endpoint isn't accessible(403) or doesn't
+    exist(404).
+    """
+    logging.debug("Fetch dependabot alerts from '%s'.", url)
+    if isinstance(ghub, rest.RestClient):
+        return ghub.get_alerts_by_repo(url)
+
+    import github
+
+    dependabot_alerts = github.PaginatedList.PaginatedList(
+        github.OrganizationDependabotAlert.OrganizationDependabotAlert,
+        ghub.requester,
+        url,
+        {"state": "open"},
+    )
+    alerts_by_repo = {}
+    try:
+        for alert in dependabot_alerts:
+            alerts_by_repo.setdefault(alert.repository.full_name, [])
+            alerts_by_repo[alert.repository.full_name].append(
+                Alert.from_dependabot_alert(alert)
+            )
+    except github.GithubException as exception:
+        if exception.status in (403, 404):
+            return None
+
+        raise
+
+    return alerts_by_repo
+
+
+def get_graphql_repo_details(ghub, repos, executor):
+    """Get dependabot alerts of given repos via GraphQL API.
+
+    Yield repo details in the same order as repos are given.
+    """
+    alerts_by_repo = graphql.get_alerts(
+        ghub.requester, [repo.full_name for repo in repos], executor
+    )
+    for repo in repos:
+        nodes, error = alerts_by_repo[repo.full_name]
+        repo_detail = new_repo_detail(repo)
+        if error:
+            repo_detail["alerts_error"] = True
+            repo_detail["html_filters"].add("github-repo-error")
+
+        # NOTE: order alerts the same way as REST API does.
+        nodes = sorted(
+            nodes,
+            key=lambda node: (node["createdAt"], node["number"]),
+            reverse=True,
+        )
+        for node in nodes:
+            add_repo_alert(
+                repo_detail, graphql.node_to_alert(node, repo.html_url)
+            )
+
+        set_html_filters(repo_detail)
+        yield repo_detail
+
+
+def build_repo_detail(repo, alerts):
+    """Return repo detail built out of already fetched alerts."""
+    repo_detail = new_repo_detail(repo)
+    for alert in alerts:
+        add_repo_alert(repo_detail, alert)
+
+    set_html_filters(repo_detail)
+    return repo_detail
+
+
+def get_repo_alerts(repo):
+    """Get dependabot alerts of given repository and return repo detail."""
+    import github
+
+    logging.debug("Fetch dependabot alerts of '%s'.", repo.full_name)
+    repo_detail = new_repo_detail(repo)
+    try:
+        dependabot_alerts = repo.get_dependabot_alerts(state="open")
+        for alert in dependabot_alerts:
+            add_repo_alert(repo_detail, Alert.from_dependabot_alert(alert))
+    except github.GithubException as exception:
+        if exception.status == 403:
+            # NOTE(zstyblik): 403 most likely means that dependabot
+            # is disabled.
+            repo_detail["alerts_error"] = True
+            repo_detail["html_filters"].add("github-repo-error")
+        else:
+            raise
+
+    set_html_filters(repo_detail)
+    return repo_detail
+
+
+def get_rest_repo_alerts(client, repo):
+    """Get dependabot alerts of repository via lib.rest.RestClient.
+
+    Return repo detail.
+    """
+    logging.debug("Fetch dependabot alerts of '%s'.", repo.full_name)
+    repo_detail = new_repo_detail(repo)
+    try:
+        for alert in client.get_repo_alerts(repo.full_name):
+            add_repo_alert(repo_detail, alert)
+    except rest.RestException as exception:
+        if exception.status == 403:
+            # NOTE(zstyblik): 403 most likely means that dependabot
+            # is disabled.
+            repo_detail["alerts_error"] = True
+            repo_detail["html_filters"].add("github-repo-error")
+        else:
+            raise
+
+    set_html_filters(repo_detail)
+    return repo_detail
+
+
+def sync_repo_alerts(store, repo):
+    """Sync dependabot alerts of given repository and return repo detail.
+
+    Repo detail is built from alerts in the store.
+    """
+    import github
+
+    logging.debug("Sync dependabot alerts of '%s'.", repo.full_name)
+    try:
+        count = store.sync_repo(repo)
+        logging.debug("Merged %i alert(s) of '%s'.", count, repo.full_name)
+    except github.GithubException as exception:
+        if exception.status == 403:
+            store.set_alerts_error(repo.full_name)
+        else:
+            raise
+
+    repo_detail = new_repo_detail(repo)
+    if store.has_alerts_error(repo.full_name):
+        repo_detail["alerts_error"] = True
+        repo_detail["html_filters"].add("github-repo-error")
+    else:
+        for alert in store.get_open_alerts(repo.full_name):
+            add_repo_alert(repo_detail, alert)
+
+    set_html_filters(repo_detail)
+    return repo_detail
+
+
+def new_repo_detail(repo):
+    """Return empty repo detail for given repository."""
+    return {
+        "alerts": {},
+        "alerts_error": False,
+        "alerts_stats": {
+            "critical": 0,
+            "high": 0,
+            "medium": 0,
+            "low": 0,
+        },
+        "fork": repo.fork,
+        "html_url": repo.html_url,
+        "html_filters": set(),
+    }
+
+
+def new_skipped_repo_detail(repo, reason):
+    """Return repo detail of repository whose alerts aren't fetched."""
+    repo_detail = new_repo_detail(repo)
+    repo_detail["skip_reason"] = reason
+    repo_detail["html_filters"].add("github-repo-skipped")
+    if repo_detail["fork"]:
+        repo_detail["html_filters"].add("github-repo-fork")
+
+    return repo_detail
+
+
+def new_error_repo_detail(repo):
+    """Return repo detail of repository whose alerts can't be fetched."""
+    repo_detail = new_repo_detail(repo)
+    repo_detail["alerts_error"] = True
+    repo_detail["html_filters"].add("github-repo-error")
+    set_html_filters(repo_detail)
+    return repo_detail
+
+
+def add_repo_alert(repo_detail, alert):
+    """Add alert(lib.alert.Alert) to repo detail and update alert stats."""
+    repo_detail["alerts"][alert.number] = alert
+    stats_key = str(alert.severity).lower()
+    repo_detail["alerts_stats"][stats_key] += 1
+
+
+def set_html_filters(repo_detail):
+    """Set HTML filters of repo detail based on its content."""
+    if not repo_detail["alerts"]:
+        repo_detail["html_filters"].add("github-repo-empty")
+
+    if repo_detail["fork"]:
+        repo_detail["html_filters"].add("github-repo-fork")
+
+
+def apply_alert_event(context, payload):
+    """Apply payload of `dependabot_alert` webhook event to report data.
+
+    Open alert is added to(or replaced in) its repository, alert in any other
+    state is removed. Events of repositories which aren't in the report or
+    whose alerts weren't fetched, i.e. skipped ones and those with error, and
+    malformed events are ignored. Return namespace of affected repository or
+    None.
+
+    :param context: context(dict) as returned by get_dependabot_data().
+    """
+    try:
+        full_name = payload["repository"]["full_name"]
+        alert = rest.alert_from_json(payload["alert"])
+        state = payload["alert"].get("state")
+    except (KeyError, TypeError, ValueError, AttributeError):
+        logging.warning("Ignored malformed dependabot_alert event.")
+        return None
+
+    namespace = full_name.split("/")[0]
+    namespace_data = context["namespaces"].get(namespace)
+    if namespace_data is None or full_name not in namespace_data["repos"]:
+        logging.debug("Ignored event of repo '%s' not in report.", full_name)
+        return None
+
+    old_detail = namespace_data["repos"][full_name]
+    if old_detail.get("skip_reason") or old_detail["alerts_error"]:
+        logging.debug(
+            "Ignored event of repo '%s' whose alerts weren't fetched.",
+            full_name,
+        )
+        return None
+
+    repo_detail = new_repo_detail(
+        types.SimpleNamespace(
+            fork=old_detail["fork"], html_url=old_detail["html_url"]
+        )
+    )
+    if str(alert.severity).lower() not in repo_detail["alerts_stats"]:
+        logging.warning(
+            "Ignored event of alert %i of repo '%s' with severity '%s'.",
+            alert.number,
+            full_name,
+            alert.severity,
+        )
+        return None
+
+    logging.debug(
+        "Applying '%s' of alert %i of repo '%s'.",
+        payload.get("action"),
+        alert.number,
+        full_name,
+    )
+    alerts = dict(old_detail["alerts"])
+    alerts.pop(alert.number, None)
+    if state == "open":
+        alerts[alert.number] = alert
+
+    # NOTE: alerts are listed from the newest one just like GitHub does.
+    for number in sorted(alerts, reverse=True):
+        add_repo_alert(repo_detail, alerts[number])
+
+    set_html_filters(repo_detail)
+    namespace_data["repos"][full_name] = repo_detail
+    return namespace
+
+
+def has_cisa_cwe(alert):
+    """Check whether alert's CWE are in CISA KEV catalog."""
+    return bool(alert.tags & catalogs.get_registry().get_mask("cisa_kev_2023"))
+
+
+def has_owasp_cwe(alert):
+    """Check whether alert's CWE are in OWASP catalog."""
+    return bool(alert.tags & catalogs.get_registry().get_mask("owasp_2021"))
+
+
+def catalog_labels(tags):
+    """Return labels of CWE catalogs in tags(bitmask) of alert."""
+    return catalogs.get_registry().get_labels(tags)
+
+
+def catalog_names(tags):
+    """Return names of CWE catalogs in tags(bitmask) of alert."""
+    return catalogs.get_registry().get_names(tags)
+
+
+def get_cwe_catalogs():
+    """Return CWE catalogs of active registry."""
+    return catalogs.get_registry().catalogs
+
+
+def main():
+    """Initialize, fetch data from GH and render HTML report."""
+    timer_start = time.perf_counter()
+    args = parse_args()
+    logging.basicConfig(level=args.log_level, stream=sys.stdout)
+
+    tokens = []
+    if not args.from_snapshot:
+        try:
+            tokens = [
+                get_github_token(token_provider)
+                for token_provider in args.github_token_provider
+            ]
+        except GitHubProviderException as exception:
+            logging.error("%s", exception.message)
+            sys.exit(1)
+
+    try:
+        catalogs.set_registry(catalogs.load_registry(args.cwe_catalog))
+    except catalogs.CatalogException as exception:
+        logging.error("%s", exception.message)
+        sys.exit(1)
+
+    if args.fragment_cache_dir:
+        fragments.set_cache(
+            fragments.FragmentCache(
+                args.fragment_cache_dir, args.cache_max_size * 1024 * 1024
+            )
+        )
+
+    server = None
+    if args.webhook_listen:
+        try:
+            secret = get_secret(args.webhook_secret_provider, "Webhook Secret")
+        except GitHubProviderException as exception:
+            logging.error("%s", exception.message)
+            sys.exit(1)
+
+        if not secret:
+            logging.error("Webhook Secret is empty")
+            sys.exit(1)
+
+        from lib import webhook
+
+        try:
+            server = webhook.WebhookServer(args.webhook_listen, secret)
+        except OSError as exception:
+            logging.error(
+                "Failed to listen on '%s:%i': %s",
+                *args.webhook_listen,
+                exception.strerror,
+            )
+            sys.exit(1)
+
+    metrics = Metrics()
+    with contextlib.ExitStack() as stack:
+        fetcher = None
+        if not args.from_snapshot:
+            fetcher = new_fetcher(args, tokens, metrics, stack)
+
+        try:
+            if server is not None:
+                stack.callback(server.server_close)
+                serve_webhooks(args, fetcher, metrics, server)
+            elif args.watch:
+                watch(args, fetcher, metrics)
+            else:
+                run_report(args, fetcher, metrics, timer_start)
+        except snapshot.SnapshotException as exception:
+            logging.error("%s", exception.message)
+            sys.exit(1)
+
+
+class Fetcher:
+    """Fetch of report data with state which is kept between runs.
+
+    GitHub client along with its connection pool, rate limiter, cache of
+    responses and alert store are created only once, therefore subsequent
+    runs(see --watch) reuse them and only what has changed is fetched again.
+    """
+
+    def __init__(
+        self,
+        args,
+        token,
+        cache,
+        store,
+        rate_limiter,
+        metrics,
+        base_url=None,
+        error_cache=None,
+    ):
+        """Init."""
+        self.args = args
+        self.token = token
+        self.cache = cache
+        self.store = store
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.base_url = base_url
+        self.error_cache = error_cache
+        self.resume = args.resume
+        self.ghub = None
+
+    def iter_namespaces(self):
+        """Yield tuples (namespace, namespace data) fetched from GitHub."""
+        if self.ghub is None:
+            self.ghub = new_github_client(
+                self.token,
+                self.args.workers,
+                self.cache,
+                self.rate_limiter,
+                self.args.backend,
+                self.base_url,
+                self.metrics,
+            )
+
+        checkpoint = None
+        if self.args.checkpoint:
+            from lib.checkpoint import Checkpoint
+
+            checkpoint = Checkpoint(self.args.checkpoint, self.resume)
+            # NOTE: checkpoint of finished run is removed, subsequent runs(see
+            # --watch) start from scratch.
+            self.resume = False
+
+        return iter_dependabot_data(
+            self.token,
+            self.args.repo_affiliation,
+            self.args.exclude_github_owner,
+            self.args.exclude_forks,
+            self.args.workers,
+            self.args.bulk_fetch,
+            self.args.github_enterprise,
+            self.cache,
+            self.store,
+            self.rate_limiter,
+            self.args.backend,
+            self.base_url,
+            self.metrics,
+            self.ghub,
+            new_repo_filter(self.args),
+            self.args.github_org,
+            self.error_cache,
+            checkpoint,
+        )
+
+
+def new_repo_filter(args):
+    """Return lib.repofilter.RepoFilter for given args."""
+    return RepoFilter(
+        include_owners=args.include_github_owner,
+        exclude_owners=args.exclude_github_owner,
+        include_repos=args.include_repo_pattern,
+        exclude_repos=args.exclude_repo_pattern,
+        exclude_forks=args.exclude_forks,
+        skip_archived=args.skip_archived,
+        skip_disabled=args.skip_disabled,
+    )
+
+
+def new_fetcher(args, tokens, metrics, stack):
+    """Return Fetcher for given args.
+
+    :param stack: contextlib.ExitStack which closes resources of fetcher.
+    """
+    cache = None
+    if args.cache_dir:
+        from lib.cache import HTTPCache
+
+        cache = HTTPCache(args.cache_dir, args.cache_max_size * 1024 * 1024)
+    elif args.watch:
+        from lib.cache import MemoryCache
+
+        cache = MemoryCache(args.cache_max_size * 1024 * 1024)
+
+    if len(tokens) > 1:
+        rate_limiter = TokenPool(tokens, reserve=args.rate_limit_reserve)
+    else:
+        rate_limiter = RateLimiter(reserve=args.rate_limit_reserve)
+
+    store = None
+    if args.alert_store:
+        from lib.store import AlertStore
+
+        store = AlertStore(args.alert_store)
+        stack.callback(store.close)
+
+    error_cache = None
+    if args.error_cache:
+        from lib.errorcache import ErrorCache
+
+        error_cache = ErrorCache(
+            args.error_cache, args.error_cache_ttl, args.recheck_errors
+        )
+
+    return Fetcher(
+        args,
+        tokens[0],
+        cache,
+        store,
+        rate_limiter,
+        metrics,
+        error_cache=error_cache,
+    )
+
+
+def run_report(args, fetcher, metrics, timer_start):
+    """Fetch(or load from snapshot) report data and write report.
+
+    :param fetcher: Fetcher or None if report is generated from snapshot.
+    :raises snapshot.SnapshotException: if snapshot can't be read.
+    """
+    with contextlib.ExitStack() as stack:
+        namespaces, report_mtime = open_namespaces(args, fetcher, stack)
+        write_report(args, namespaces, report_mtime, timer_start, metrics)
+
+    finish_run(args, fetcher, metrics)
+
+
+def open_namespaces(args, fetcher, stack):
+    """Return tuple (namespaces, report mtime) of fetched or loaded data.
+
+    Namespaces are also saved into snapshot if requested.
+
+    :param fetcher: Fetcher or None if report is generated from snapshot.
+    :param stack: contextlib.ExitStack which closes snapshot files.
+    :raises snapshot.SnapshotException: if snapshot can't be read.
+    """
+    if fetcher is None:
+        reader = stack.enter_context(
+            snapshot.SnapshotReader(args.from_snapshot)
+        )
+        namespaces = reader.iter_namespaces()
+        report_mtime = reader.report_mtime
+    else:
+        namespaces = fetcher.iter_namespaces()
+        report_mtime = get_report_mtime()
+
+    if args.save_snapshot:
+        writer = stack.enter_context(
+            snapshot.SnapshotWriter(args.save_snapshot, report_mtime)
+        )
+        namespaces = writer.tee(namespaces)
+
+    return namespaces, report_mtime
+
+
+def finish_run(args, fetcher, metrics):
+    """Log remaining rate limit budget and write metrics of the run."""
+    if fetcher is not None:
+        fetcher.rate_limiter.log_budget()
+
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
+
+
+@contextlib.contextmanager
+def stop_on_sigterm(stop):
+    """Set stop(threading.Event) when SIGTERM is received."""
+    prev_handler = signal.signal(
+        signal.SIGTERM, lambda signum, frame: stop.set()
+    )
+    try:
+        yield stop
+    finally:
+        signal.signal(signal.SIGTERM, prev_handler)
+
+
+def watch(args, fetcher, metrics, stop=None):
+    """Write report every `args.watch` seconds until SIGTERM is received.
+
+    Failed run is logged and the previous report is kept in place.
+
+    :param stop: optional threading.Event which stops watching when set.
+    """
+    if stop is None:
+        stop = threading.Event()
+
+    with stop_on_sigterm(stop):
+        while not stop.is_set():
+            timer_start = time.perf_counter()
+            metrics.reset()
+            try:
+                run_report(args, fetcher, metrics, timer_start)
+            except Exception:
+                logging.exception("Failed to write report, keeping old one.")
+
+            delay = max(args.watch - (time.perf_counter() - timer_start), 0)
+            logging.info("Next report in %.0fs.", delay)
+            stop.wait(delay)
+
+
+def fetch_report_data(args, fetcher, metrics):
+    """Return context(dict) with report data held in memory.
+
+    :raises snapshot.SnapshotException: if snapshot can't be read.
+    """
+    with contextlib.ExitStack() as stack:
+        namespaces, report_mtime = open_namespaces(args, fetcher, stack)
+        # NOTE: repos read from snapshot are lazy and must be read out before
+        # the snapshot is closed.
+        context = merge_namespaces(
+            (
+                namespace,
+                dict(
+                    namespace_data, repos=dict(namespace_data["repos"].items())
+                ),
+            )
+            for namespace, namespace_data in namespaces
+        )
+
+    context["report_mtime"] = report_mtime
+    finish_run(args, fetcher, metrics)
+    return context
+
+
+def serve_webhooks(args, fetcher, metrics, server, stop=None):
+    """Keep report data in memory and update report on webhook events.
+
+    Report data is fetched(or loaded from snapshot) and written first. Then
+    `dependabot_alert` events received by server are applied to the data and
+    report is written again without any request to GitHub. Events received
+    in the meantime are applied together. When HTML report is sharded, only
+    pages of affected namespaces and the index are written again. Data is
+    fetched again every `args.watch` seconds if given. Runs until SIGTERM is
+    received.
+
+    :param server: lib.webhook.WebhookServer which receives events.
+    :param stop: optional threading.Event which stops serving when set.
+    :raises snapshot.SnapshotException: if snapshot can't be read.
+    """
+    if stop is None:
+        stop = threading.Event()
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    logging.info(
+        "Listening for webhook events on '%s:%i'.", *server.server_address[:2]
+    )
+    context = None
+    written = {}
+    next_fetch = None
+    try:
+        with stop_on_sigterm(stop):
+            while not stop.is_set():
+                if context is None or (
+                    next_fetch is not None and time.monotonic() >= next_fetch
+                ):
+                    if args.watch:
+                        next_fetch = time.monotonic() + args.watch
+                    timer_start = time.perf_counter()
+                    metrics.reset()
+                    try:
+                        new_context = fetch_report_data(args, fetcher, metrics)
+                    except Exception:
+                        if context is None:
+                            raise
+
+                        logging.exception("Failed to fetch, keeping old data.")
+                        continue
+
+                    context = new_context
+                    written = {}
+                    write_context(args, context, timer_start, metrics, written)
+
+                dirty = apply_queued_events(
+                    server.events, context, stop, next_fetch
+                )
+                if dirty:
+                    logging.info(
+                        "Updating report of %s.", ", ".join(sorted(dirty))
+                    )
+                    context["report_mtime"] = get_report_mtime()
+                    write_context(
+                        args,
+                        context,
+                        time.perf_counter(),
+                        metrics,
+                        written,
+                        dirty,
+                    )
+    finally:
+        server.shutdown()
+
+
+def apply_queued_events(events, context, stop, next_fetch):
+    """Wait for webhook events and apply all queued ones to context.
+
+    Return set of affected namespaces, which is empty if no event arrived
+    before the next fetch is due or stop is set.
+
+    :param next_fetch: time.monotonic() of the next fetch or None.
+    """
+    dirty = set()
+    while not dirty and not stop.is_set():
+        timeout = WEBHOOK_POLL_INTERVAL
+        if next_fetch is not None:
+            timeout = min(max(next_fetch - time.monotonic(), 0), timeout)
+            if timeout <= 0:
+                break
+
+        try:
+            payload = events.get(timeout=timeout)
+        except queue.Empty:
+            continue
+
+        while True:
+            namespace = apply_alert_event(context, payload)
+            if namespace is not None:
+                dirty.add(namespace)
+
+            try:
+                payload = events.get_nowait()
+            except queue.Empty:
+                break
+
+    return dirty
+
+
+def write_context(args, context, timer_start, metrics, written, dirty=None):
+    """Write report out of report data held in memory.
+
+    Write failure is logged and the previous report is kept in place.
+    """
+    try:
+        write_report(
+            args,
+            context["namespaces"].items(),
+            context["report_mtime"],
+            timer_start,
+            metrics,
+            written,
+            dirty,
+        )
+    except Exception:
+        logging.exception("Failed to write report, keeping old one.")
+
+
+def write_report(
+    args,
+    namespaces,
+    report_mtime,
+    timer_start,
+    metrics,
+    written=None,
+    dirty=None,
+):
+    """Render report out of namespaces and write it in requested formats.
+
+    Namespaces are rendered as they're fetched(or loaded from snapshot) in
+    streaming mode, otherwise they're merged before rendering. Formats other
+    than HTML are written by lib.formats writers from the same namespaces.
+    Files are replaced only when they're complete, see lib.atomic.
+
+    See write_sharded_html() for `written` and `dirty`.
+    """
+    streaming = args.stream or args.from_snapshot
+    with contextlib.ExitStack() as stack:
+        writers = []
+        for output_format in args.output_format:
+            if output_format == "html":
+                continue
 
-        if exclude_forks is True and repo.fork is True:
-            logging.debug(
-                "Skip repository '%s' because it's a fork.", repo.full_name
+            fhandle = stack.enter_context(
+                atomic.open_atomic(
+                    get_output_fname(args.output_file, output_format),
+                    newline="",
+                )
             )
-            continue
+            writer = formats.WRITERS[output_format](fhandle)
+            writer.begin(report_mtime)
+            writers.append(writer)
 
-        repo_detail = {
-            "alerts": {},
-            "alerts_error": False,
-            "alerts_stats": {
-                "critical": 0,
-                "high": 0,
-                "medium": 0,
-                "low": 0,
-            },
-            "fork": repo.fork,
-            "html_url": repo.html_url,
-            "html_filters": set(),
-        }
-        try:
-            dependabot_alerts = repo.get_dependabot_alerts(state="open")
-            for alert in dependabot_alerts:
-                repo_detail["alerts"][alert.number] = alert
-                stats_key = str(alert.security_advisory.severity).lower()
-                repo_detail["alerts_stats"][stats_key] += 1
-        except github.GithubException as exception:
-            if exception.status == 403:
-                # NOTE(zstyblik): 403 most likely means that dependabot
-                # is disabled.
-                repo_detail["alerts_error"] = True
-                repo_detail["html_filters"].add("github-repo-error")
-            else:
-                raise
+        if streaming:
+            namespaces = formats.tee(writers, namespaces)
+        else:
+            context = merge_namespaces(namespaces)
+            context["report_mtime"] = report_mtime
+            context["timing_sec"] = get_timing_sec(timer_start)
+            with metrics.phase("write"):
+                for namespace, namespace_data in context["namespaces"].items():
+                    for writer in writers:
+                        writer.write_namespace(namespace, namespace_data)
 
-        if not repo_detail["alerts"]:
-            repo_detail["html_filters"].add("github-repo-empty")
+        if "html" in args.output_format and (
+            args.shard_by_namespace or args.shard_rows
+        ):
+            if not streaming:
+                namespaces = context["namespaces"].items()
 
-        if repo_detail["fork"]:
-            repo_detail["html_filters"].add("github-repo-fork")
+            with metrics.phase("render"):
+                write_sharded_html(
+                    args,
+                    namespaces,
+                    report_mtime,
+                    timer_start,
+                    written,
+                    dirty,
+                )
+        elif "html" in args.output_format:
+            with atomic.open_atomic(args.output_file) as fhandle:
+                if streaming:
+                    context = {
+                        "namespaces": NamespaceStream(
+                            namespaces, fhandle.flush
+                        ),
+                        "report_mtime": report_mtime,
+                        "timing_sec": LazyValue(
+                            functools.partial(get_timing_sec, timer_start)
+                        ),
+                    }
 
-        context["namespaces"][namespace]["repos"][repo.full_name] = repo_detail
+                # NOTE: in streaming mode fetch is interleaved with rendering,
+                # therefore render phase includes alerts phase.
+                with metrics.phase("render"):
+                    render_template(
+                        context,
+                        args.template_fname,
+                        fhandle,
+                        args.template_cache_dir,
+                    )
 
-    return context
+                with metrics.phase("write"):
+                    fhandle.flush()
+        elif streaming:
+            for _ in namespaces:
+                pass
 
+        with metrics.phase("write"):
+            for writer in writers:
+                writer.end()
 
-def has_cisa_cwe(alert):
-    """Check whether alert's CWE are in CISA KEV lookup table."""
-    if not alert.security_advisory:
-        return False
 
-    if not alert.security_advisory.cwes:
-        return False
+def write_sharded_html(
+    args, namespaces, report_mtime, timer_start, written=None, dirty=None
+):
+    """Write HTML report as several pages and index of namespaces.
+
+    Index is written into output file, pages are written next to it. Only one
+    page is held in memory at a time.
 
-    for cwe in alert.security_advisory.cwes:
-        cwe_id = str(cwe.cwe_id).upper()
-        if cwe_id in CWE_CISA_KEV_2023:
-            return True
+    :param written: optional dict which maps file names of pages to their
+        repos. It's updated with each written page.
+    :param dirty: optional set of namespaces whose pages are written. Other
+        pages are skipped as long as their repos are the same as in written.
+        All pages are written if None.
+    """
+    index = pages.Index()
+    root, ext = os.path.splitext(args.output_file)
+    prev_page_fname = None
+    page_iter = pages.iter_pages(
+        namespaces, args.shard_by_namespace, args.shard_rows
+    )
+    for page_num, page in enumerate(page_iter, start=1):
+        page_fname = "{:s}-{:04d}{:s}".format(root, page_num, ext)
+        index.add_page(os.path.basename(page_fname), page)
+        if written is not None:
+            page_repos = [
+                (namespace, list(namespace_data["repos"]))
+                for namespace, namespace_data in page
+            ]
+            if (
+                dirty is not None
+                and written.get(page_fname) == page_repos
+                and not any(namespace in dirty for namespace, _ in page)
+            ):
+                prev_page_fname = os.path.basename(page_fname)
+                continue
 
-    return False
+        context = merge_namespaces(page)
+        context.update(
+            {
+                "report_mtime": report_mtime,
+                "timing_sec": get_timing_sec(timer_start),
+                "index_fname": os.path.basename(args.output_file),
+                "prev_page_fname": prev_page_fname,
+                "page_num": page_num,
+            }
+        )
+        with atomic.open_atomic(page_fname) as fhandle:
+            render_template(
+                context,
+                args.template_fname,
+                fhandle,
+                args.template_cache_dir,
+            )
 
+        if written is not None:
+            written[page_fname] = page_repos
 
-def has_owasp_cwe(alert):
-    """Check whether alert's CWE are in OWASP lookup table."""
-    if not alert.security_advisory:
-        return False
+        prev_page_fname = os.path.basename(page_fname)
 
-    if not alert.security_advisory.cwes:
-        return False
+    context = {
+        "namespaces": index.namespaces,
+        "totals": index.totals,
+        "report_mtime": report_mtime,
+        "timing_sec": get_timing_sec(timer_start),
+    }
+    with atomic.open_atomic(args.output_file) as fhandle:
+        render_template(
+            context,
+            INDEX_TEMPLATE_FNAME,
+            fhandle,
+            args.template_cache_dir,
+        )
 
-    for cwe in alert.security_advisory.cwes:
-        cwe_id = str(cwe.cwe_id).upper()
-        if cwe_id in CWE_OWASP_2021:
-            return True
 
-    return False
+def get_output_fname(output_file, output_format):
+    """Return file name of output in given format.
 
+    HTML is written into output_file, other formats into the file of the same
+    name with extension of the format.
+    """
+    if output_format == "html":
+        return output_file
 
-def main():
-    """Initialize, fetch data from GH and render HTML report."""
-    timer_start = time.perf_counter()
-    args = parse_args()
-    logging.basicConfig(level=args.log_level, stream=sys.stdout)
+    root, _ = os.path.splitext(output_file)
+    return root + formats.WRITERS[output_format].extension
 
-    try:
-        token = get_github_token(args.github_token_provider)
-    except GitHubProviderException as exception:
-        logging.error("%s", exception.message)
-        sys.exit(1)
 
-    context = get_dependabot_data(
-        token,
-        args.repo_affiliation,
-        args.exclude_github_owner,
-        args.exclude_forks,
-    )
+def get_report_mtime():
+    """Return current time formatted for the report."""
     dt_now = datetime.now(timezone.utc)
-    context["report_mtime"] = dt_now.strftime("%Y-%m-%d %H:%M:%S%z")
-    context["timing_sec"] = "{:.2f}".format(time.perf_counter() - timer_start)
-    with open(args.output_file, "w", encoding="utf-8") as fhandle:
-        render_template(context, args.template_fname, fhandle)
+    return dt_now.strftime("%Y-%m-%d %H:%M:%S%z")
+
+
+def get_timing_sec(timer_start):
+    """Return seconds elapsed since timer_start formatted for the report."""
+    return "{:.2f}".format(time.perf_counter() - timer_start)
 
 
 def parse_args() -> argparse.Namespace:
@@ -227,24 +1641,106 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(allow_abbrev=False)
     parser.add_argument(
         "--github-token-provider",
-        required=True,
         type=str,
+        action="append",
         help=(
             "Provider which will provide GitHub token. "
             "Supported providers are 'file' or 'env'. "
-            "Example usage: %(prog)s --github-token-provider 'file:token.txt'"
+            "Example usage: %(prog)s --github-token-provider 'file:token.txt'. "
+            "Can be passed multiple times, requests are then spread across "
+            "tokens according to their remaining rate limit. Tokens should "
+            "have access to the same repositories. "
+            "Required unless --from-snapshot is given."
         ),
     )
     parser.add_argument(
         "--output-file",
         required=True,
         type=str,
-        help="Write HTML report into given file.",
+        help=(
+            "Write HTML report into given file. Reports in other formats "
+            "are written into the file of the same name with extension of "
+            "the format, e.g. report.csv."
+        ),
+    )
+    parser.add_argument(
+        "--output-format",
+        action="append",
+        choices=["html", "json", "csv", "sarif"],
+        help=(
+            "Format of the report. Can be passed multiple times in order to "
+            "write the report in several formats at once from a single "
+            "fetch. Default is html."
+        ),
     )
     parser.add_argument(
         "--exclude-github-owner",
         action="append",
-        help="Exclude repositories owned by given owner.",
+        help=(
+            "Exclude repositories owned by given owner. Shell-style "
+            "wildcards are supported, e.g. 'archive-*'. Can be passed "
+            "multiple times."
+        ),
+    )
+    parser.add_argument(
+        "--include-github-owner",
+        action="append",
+        help=(
+            "Include only repositories owned by owners matching given "
+            "pattern. Can be passed multiple times."
+        ),
+    )
+    parser.add_argument(
+        "--include-repo-pattern",
+        action="append",
+        help=(
+            "Include only repositories whose full name matches given "
+            "pattern, e.g. 'my-org/api-*'. Can be passed multiple times."
+        ),
+    )
+    parser.add_argument(
+        "--exclude-repo-pattern",
+        action="append",
+        help=(
+            "Exclude repositories whose full name matches given pattern. "
+            "Can be passed multiple times."
+        ),
+    )
+    parser.add_argument(
+        "--skip-archived",
+        action="store_true",
+        default=False,
+        help=(
+            "Don't fetch alerts of archived repositories. They're listed in "
+            "the report as skipped."
+        ),
+    )
+    parser.add_argument(
+        "--skip-disabled",
+        action="store_true",
+        default=False,
+        help=(
+            "Don't fetch alerts of disabled repositories. They're listed in "
+            "the report as skipped."
+        ),
+    )
+    parser.add_argument(
+        "--github-org",
+        action="append",
+        help=(
+            "List repositories of given organization instead of "
+            "repositories user has access to. Can be passed multiple times. "
+            "Can't be combined with --include-repo-* options."
+        ),
+    )
+    parser.add_argument(
+        "--cwe-catalog",
+        action="append",
+        help=(
+            "Load additional CWE catalog from given file. Alerts with CWE "
+            "from the catalog are tagged in the report. Can be passed "
+            "multiple times."
+        ),
     )
     parser.add_argument(
         "--exclude-forks",
@@ -282,12 +1778,244 @@ def parse_args() -> argparse.Namespace:
             "a member of an organization."
         ),
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=False,
+        help=(
+            "Fetch, render and write the report namespace by namespace "
+            "instead of fetching all data first. Keeps memory usage bounded."
+        ),
+    )
     parser.add_argument(
         "--template-fname",
         default=TEMPLATE_FNAME,
         type=str,
         help="Path and filename of jinja2 template to use.",
     )
+    parser.add_argument(
+        "--backend",
+        choices=["pygithub", "graphql", "rest"],
+        default="pygithub",
+        help=(
+            "Backend used to fetch dependabot alerts. 'graphql' fetches "
+            "alerts of many repositories in one request. 'rest' parses "
+            "JSON of REST API directly without PyGithub objects. "
+            "Default is %(default)s."
+        ),
+    )
+    parser.add_argument(
+        "--bulk-fetch",
+        action="store_true",
+        default=False,
+        help=(
+            "Fetch alerts of organization-owned repositories via "
+            "organization-wide endpoint instead of repo by repo. Requires "
+            "organization owner or security manager role, otherwise falls "
+            "back to fetching alerts repo by repo. Note that repositories "
+            "with disabled dependabot are reported as having no alerts."
+        ),
+    )
+    parser.add_argument(
+        "--github-enterprise",
+        default=None,
+        type=str,
+        help=(
+            "Fetch alerts via enterprise-wide endpoint of given enterprise "
+            "slug. Implies --bulk-fetch."
+        ),
+    )
+    parser.add_argument(
+        "--alert-store",
+        default=None,
+        type=str,
+        help=(
+            "Keep alerts in given SQLite database and fetch only alerts "
+            "updated since the last sync."
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        type=str,
+        help=(
+            "Cache GitHub API responses in given directory and use "
+            "conditional requests in order to save rate limit."
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        default=None,
+        type=int,
+        metavar="INTERVAL",
+        help=(
+            "Keep running and write report every INTERVAL seconds. GitHub "
+            "session, compiled template, rate limit budget and responses "
+            "are kept between runs, therefore only what has changed is "
+            "fetched again. Responses are kept in memory unless --cache-dir "
+            "is given. Stops on SIGTERM."
+        ),
+    )
+    parser.add_argument(
+        "--webhook-listen",
+        default=None,
+        type=parse_listen_address,
+        metavar="HOST:PORT",
+        help=(
+            "Keep running and receive GitHub webhook events of dependabot "
+            "alerts on given address. Report is written again within "
+            "seconds of an alert change without any request to GitHub. "
+            "Requires --webhook-secret-provider. Combine with --watch in "
+            "order to fetch all data periodically. Stops on SIGTERM."
+        ),
+    )
+    parser.add_argument(
+        "--webhook-secret-provider",
+        default=None,
+        type=str,
+        help=(
+            "Provider of webhook secret which signatures of events are "
+            "verified with. Same providers as --github-token-provider are "
+            "supported."
+        ),
+    )
+    parser.add_argument(
+        "--error-cache",
+        default=None,
+        type=str,
+        help=(
+            "Remember repositories whose alerts can't be fetched, e.g. "
+            "because dependabot is disabled, in given JSON file. They're "
+            "reported as errors without any request until "
+            "--error-cache-ttl expires."
+        ),
+    )
+    parser.add_argument(
+        "--error-cache-ttl",
+        default=86400,
+        type=int,
+        help=(
+            "Seconds for which repository whose alerts can't be fetched is "
+            "remembered. Default is %(default)s."
+        ),
+    )
+    parser.add_argument(
+        "--recheck-errors",
+        action="store_true",
+        default=False,
+        help=(
+            "Fetch alerts of repositories remembered in --error-cache "
+            "anyway and remember fresh results."
+        ),
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        type=str,
+        help=(
+            "Record each repository in given file as soon as its alerts are "
+            "fetched. File is removed once all repositories are fetched."
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help=(
+            "Report repositories recorded in --checkpoint by interrupted "
+            "run without fetching them again and fetch the rest."
+        ),
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        default=256,
+        type=int,
+        help="Max. size of cache in MiB. Default is %(default)s.",
+    )
+    parser.add_argument(
+        "--rate-limit-reserve",
+        default=0,
+        type=int,
+        help=(
+            "Number of GitHub API requests which should be left unused in "
+            "rate limit window. Default is %(default)s."
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        default=1,
+        type=int,
+        help=(
+            "Number of repositories to fetch dependabot alerts for "
+            "concurrently. Default is %(default)s."
+        ),
+    )
+    parser.add_argument(
+        "--template-cache-dir",
+        default=None,
+        type=str,
+        help=(
+            "Persist compiled jinja2 templates in given directory, so "
+            "template is compiled only once after it has changed."
+        ),
+    )
+    parser.add_argument(
+        "--fragment-cache-dir",
+        default=None,
+        type=str,
+        help=(
+            "Keep rendered HTML of each repository in given directory and "
+            "reuse it while alerts of the repository don't change. Size is "
+            "capped by --cache-max-size."
+        ),
+    )
+    parser.add_argument(
+        "--shard-by-namespace",
+        action="store_true",
+        default=False,
+        help=(
+            "Write HTML report as one page per namespace and index page "
+            "with totals of namespaces into --output-file."
+        ),
+    )
+    parser.add_argument(
+        "--shard-rows",
+        type=int,
+        help=(
+            "Write HTML report as pages of at most given number of rows and "
+            "index page with totals of namespaces into --output-file. Can be "
+            "combined with --shard-by-namespace."
+        ),
+    )
+    parser.add_argument(
+        "--save-snapshot",
+        type=str,
+        help=(
+            "Save fetched data into given snapshot file, so the report can be "
+            "rendered again without fetching."
+        ),
+    )
+    parser.add_argument(
+        "--from-snapshot",
+        type=str,
+        help=(
+            "Render the report from given snapshot file instead of fetching "
+            "data from GitHub. No network access is required."
+        ),
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=str,
+        help="Write timing and API metrics of the run into given JSON file.",
+    )
+    parser.add_argument(
+        "--metrics-prom",
+        type=str,
+        help=(
+            "Write timing and API metrics of the run into given file in "
+            "Prometheus textfile collector format."
+        ),
+    )
     parser.add_argument(
         "--verbose",
         "-v",
@@ -297,19 +2025,89 @@ def parse_args() -> argparse.Namespace:
     )
     args = parser.parse_args()
     args.log_level = calc_log_level(args.verbose)
+    if not args.output_format:
+        args.output_format = ["html"]
 
-    if (
-        not args.include_repo_owner
-        and not args.include_repo_collaborator
-        and not args.include_repo_org_member
-    ):
+    args.output_format = list(dict.fromkeys(args.output_format))
+    output_fnames = {}
+    for output_format in args.output_format:
+        output_fname = get_output_fname(args.output_file, output_format)
+        if output_fname in output_fnames:
+            parser.error(
+                "--output-format {:s} and {:s} would both be written into "
+                "'{:s}'".format(
+                    output_fnames[output_fname], output_format, output_fname
+                )
+            )
+
+        output_fnames[output_fname] = output_format
+
+    if args.from_snapshot and args.save_snapshot:
+        parser.error("--from-snapshot can't be combined with --save-snapshot")
+
+    if not args.from_snapshot and not args.github_token_provider:
+        parser.error("--github-token-provider is required")
+
+    has_affiliation = (
+        args.include_repo_owner
+        or args.include_repo_collaborator
+        or args.include_repo_org_member
+    )
+    if args.github_org and has_affiliation:
+        parser.error("--github-org can't be combined with --include-repo-*")
+
+    if not args.from_snapshot and not args.github_org and not has_affiliation:
         message = (
             "at least one of --include-repo-owner, "
-            "--include-repo-collaborator or --include-repo-org-member "
-            "must be given"
+            "--include-repo-collaborator, --include-repo-org-member or "
+            "--github-org must be given"
         )
         parser.error(message)
 
+    if args.alert_store and (args.bulk_fetch or args.github_enterprise):
+        parser.error(
+            "--alert-store can't be combined with --bulk-fetch or "
+            "--github-enterprise"
+        )
+
+    if args.backend == "graphql" and (
+        args.alert_store or args.bulk_fetch or args.github_enterprise
+    ):
+        parser.error(
+            "--backend graphql can't be combined with --alert-store, "
+            "--bulk-fetch or --github-enterprise"
+        )
+
+    if args.backend == "rest" and args.alert_store:
+        parser.error("--backend rest can't be combined with --alert-store")
+
+    if args.watch is not None and args.watch < 1:
+        parser.error("--watch must be at least 1")
+
+    if args.watch and args.from_snapshot:
+        parser.error("--watch can't be combined with --from-snapshot")
+
+    if args.webhook_listen and not args.webhook_secret_provider:
+        parser.error("--webhook-listen requires --webhook-secret-provider")
+
+    if args.error_cache_ttl < 0:
+        parser.error("--error-cache-ttl must be at least 0")
+
+    if args.recheck_errors and not args.error_cache:
+        parser.error("--recheck-errors requires --error-cache")
+
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+
+    if args.checkpoint and args.from_snapshot:
+        parser.error("--checkpoint can't be combined with --from-snapshot")
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    if args.shard_rows is not None and args.shard_rows < 1:
+        parser.error("--shard-rows must be at least 1")
+
     args.repo_affiliation = ",".join(
         [
             args.include_repo_owner,
@@ -320,20 +2118,104 @@ def parse_args() -> argparse.Namespace:
     return args
 
 
-def render_template(context, template_fname, fhandle):
-    """Render jinja2 template and write it into fhandle."""
-    base_path = os.path.dirname(template_fname)
-    logging.debug("Template base path: '%s'.", base_path)
-    filename = os.path.basename(template_fname)
-    logging.debug("Template file name: '%s'.", filename)
+def parse_listen_address(value):
+    """Return tuple (host, port) parsed out of `HOST:PORT`.
+
+    :raises argparse.ArgumentTypeError: if value isn't valid.
+    """
+    host, _, port = value.rpartition(":")
+    try:
+        port = int(port)
+    except ValueError:
+        port = -1
+
+    if not host or not 0 <= port <= 65535:
+        raise argparse.ArgumentTypeError(
+            "invalid address '{:s}', expected HOST:PORT".format(value)
+        )
+
+    return host.strip("[]"), port
+
+
+@functools.lru_cache(maxsize=None)
+def get_jinja_env(base_path, bytecode_cache_dir=None):
+    """Return jinja2 Environment for templates in base_path.
+
+    Environment is created only once per base path and compiled templates are
+    kept in it. If `bytecode_cache_dir` is given, compiled templates are also
+    persisted there and reused by subsequent runs. Cached bytecode is keyed
+    by a checksum of template source, therefore it's invalidated whenever
+    template changes.
+    """
+    from jinja2 import Environment
+    from jinja2 import FileSystemBytecodeCache
+    from jinja2 import FileSystemLoader
+    from jinja2 import select_autoescape
+
+    bytecode_cache = None
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+
     jinja_env = Environment(
         loader=FileSystemLoader(base_path),
         autoescape=select_autoescape(),
+        bytecode_cache=bytecode_cache,
     )
     jinja_env.tests["has_cisa_cwe"] = has_cisa_cwe
     jinja_env.tests["has_owasp_cwe"] = has_owasp_cwe
+    jinja_env.filters["catalog_labels"] = catalog_labels
+    jinja_env.filters["catalog_names"] = catalog_names
+    jinja_env.globals["get_cwe_catalogs"] = get_cwe_catalogs
+    jinja_env.globals["render_repo"] = functools.partial(render_repo, jinja_env)
+    return jinja_env
+
+
+def render_repo(jinja_env, repo_name, repo_detail, ecosystems):
+    """Return rendered `<tbody>` of repository.
+
+    Fragment is taken from active lib.fragments.FragmentCache if it's set and
+    repository hasn't changed since it was rendered.
+    """
+    from markupsafe import Markup
+
+    template = jinja_env.get_template(REPO_TEMPLATE_NAME)
+    cache = fragments.get_cache()
+    if cache is None:
+        return Markup(
+            template.render(
+                repo_name=repo_name, repo=repo_detail, ecosystems=ecosystems
+            )
+        )
+
+    # NOTE: template is a new object once its source changes, therefore its
+    # version is computed only once.
+    version = getattr(template, "fragment_version", None)
+    if version is None:
+        version = fragments.get_template_version(template.filename)
+        template.fragment_version = version
+
+    key = fragments.get_key(version, ecosystems, repo_name, repo_detail)
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = template.render(
+            repo_name=repo_name, repo=repo_detail, ecosystems=ecosystems
+        )
+        cache.put(key, fragment)
+
+    return Markup(fragment)
+
+
+def render_template(context, template_fname, fhandle, bytecode_cache_dir=None):
+    """Render jinja2 template and write it into fhandle."""
+    base_path = os.path.dirname(template_fname)
+    logging.debug("Template base path: '%s'.", base_path)
+    filename = os.path.basename(template_fname)
+    logging.debug("Template file name: '%s'.", filename)
+    jinja_env = get_jinja_env(base_path, bytecode_cache_dir)
     template = jinja_env.get_template(filename)
-    fhandle.write(template.render(context))
+    # NOTE: output is written as it's being rendered, see NamespaceStream.
+    template.stream(context).dump(fhandle)
 
 
 if __name__ == "__main__":
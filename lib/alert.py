@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Compact record of dependabot alert.
+
+PyGithub's DependabotAlert keeps its raw JSON, reference to requester and
+lazily created nested objects alive. Alerts are converted into Alert records
+at ingest instead and only fields used by the report are retained. Repeating
+values like severities, ecosystems and package names are interned. CWE IDs
+are stored as integers and classified into bitmask of CWE catalogs, see
+lib/catalogs.py.
+
+Measured with tracemalloc on 10,000 alerts, see README.md.
+
+Templates written for PyGithub's DependabotAlert can still access
+`alert.security_advisory` and `alert.dependency`, which are read-only views
+built out of the flat fields.
+"""
+import collections
+import sys
+
+from lib import catalogs
+
+
+def _intern(value):
+    """Return interned string or value as is if it isn't a string."""
+    if isinstance(value, str):
+        return sys.intern(value)
+
+    return value
+
+
+SecurityAdvisory = collections.namedtuple(
+    "SecurityAdvisory", ["severity", "summary", "cwes"]
+)
+Cwe = collections.namedtuple("Cwe", ["cwe_id"])
+Dependency = collections.namedtuple("Dependency", ["package", "manifest_path"])
+Package = collections.namedtuple("Package", ["name", "ecosystem"])
+
+
+class Alert:
+    """Dependabot alert with only fields used by the report."""
+
+    __slots__ = (
+        "number",
+        "severity",
+        "summary",
+        "html_url",
+        "package",
+        "ecosystem",
+        "manifest_path",
+        "created_at",
+        "cwes",
+        "tags",
+    )
+
+    def __init__(
+        self,
+        number,
+        severity,
+        summary,
+        html_url,
+        package,
+        ecosystem,
+        manifest_path,
+        created_at,
+        cwes,
+    ):
+        """Init.
+
+        :param cwes: iterable of CWE IDs, eg. ["CWE-79"] or [79]. Invalid
+            ones are skipped.
+        """
+        self.number = number
+        self.severity = _intern(
+            severity.lower() if isinstance(severity, str) else severity
+        )
+        self.summary = summary
+        self.html_url = html_url
+        self.package = _intern(package)
+        self.ecosystem = _intern(
+            ecosystem.lower() if isinstance(ecosystem, str) else ecosystem
+        )
+        self.manifest_path = _intern(manifest_path)
+        self.created_at = created_at
+        self.cwes = tuple(
+            cwe_id
+            for cwe_id in map(catalogs.parse_cwe_id, cwes)
+            if cwe_id is not None
+        )
+        self.tags = catalogs.classify(self.cwes)
+
+    def __eq__(self, other):
+        """Compare alerts field by field."""
+        if not isinstance(other, Alert):
+            return NotImplemented
+
+        return self.astuple() == other.astuple()
+
+    def __repr__(self):
+        """Return representation of alert."""
+        return "Alert({:s})".format(
+            ", ".join(
+                "{:s}={!r}".format(name, getattr(self, name))
+                for name in self.__slots__
+            )
+        )
+
+    @property
+    def security_advisory(self):
+        """Return SecurityAdvisory, compatible with PyGithub's alert."""
+        return SecurityAdvisory(
+            self.severity,
+            self.summary,
+            [Cwe("CWE-{:d}".format(cwe_id)) for cwe_id in self.cwes],
+        )
+
+    @property
+    def dependency(self):
+        """Return Dependency, compatible with PyGithub's alert."""
+        return Dependency(
+            Package(self.package, self.ecosystem), self.manifest_path
+        )
+
+    def astuple(self):
+        """Return alert as a tuple of its fields."""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @classmethod
+    def from_dependabot_alert(cls, alert):
+        """Create Alert from PyGithub's DependabotAlert."""
+        advisory = alert.security_advisory
+        dependency = alert.dependency
+        package = dependency.package if dependency else None
+        return cls(
+            number=alert.number,
+            severity=advisory.severity if advisory else None,
+            summary=advisory.summary if advisory else None,
+            html_url=alert.html_url,
+            package=package.name if package else None,
+            ecosystem=package.ecosystem if package else None,
+            manifest_path=dependency.manifest_path if dependency else None,
+            created_at=alert.created_at,
+            cwes=[
+                cwe.cwe_id
+                for cwe in (advisory.cwes if advisory else None) or []
+            ],
+        )
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Atomic writes of files.
+
+Data are written into a temporary file in the same directory, which replaces
+the target file only when it's complete. Readers, e.g. web server serving
+the report or Prometheus collector, therefore never see partially written
+file and the previous file is kept when writing fails.
+"""
+import contextlib
+import os
+import tempfile
+
+
+@contextlib.contextmanager
+def open_atomic(fname, encoding="utf-8", newline=None):
+    """Open temporary file for writing and move it to fname when closed.
+
+    Temporary file is removed if an exception is raised in the block.
+    """
+    dirname, basename = os.path.split(os.path.abspath(fname))
+    fd, tmp_fname = tempfile.mkstemp(
+        dir=dirname, prefix=".{:s}.".format(basename), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding=encoding, newline=newline) as fhandle:
+            yield fhandle
+
+        # NOTE: mkstemp() creates file readable only by owner, however
+        # web server or collector might run as a different user.
+        os.chmod(tmp_fname, 0o644)
+        os.replace(tmp_fname, fname)
+    except BaseException:
+        os.unlink(tmp_fname)
+        raise
+
+
+def write_atomic(fname, data):
+    """Write data into temporary file and rename it to fname."""
+    with open_atomic(fname) as fhandle:
+        fhandle.write(data)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Cache of GitHub API responses for conditional requests.
+
+Responses are stored along with their ETag/Last-Modified headers. When
+the same URL is requested again, If-None-Match/If-Modified-Since headers are
+sent and cached response is used in case of 304 Not Modified. GitHub doesn't
+count 304 responses against the rate limit.
+
+HTTPCache keeps responses on disk, MemoryCache keeps them in memory of
+long-running process(see --watch).
+"""
+import collections
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zlib
+
+
+class CachedResponse:
+    """Response served from cache, mimics github.Requester.RequestsResponse."""
+
+    def __init__(self, status, headers, body):
+        """Init."""
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def getheaders(self):
+        """Return response headers."""
+        return self.headers.items()
+
+    def read(self):
+        """Return response body."""
+        return self.body
+
+
+class HTTPCache:
+    """Size capped on-disk cache of HTTP responses with LRU eviction."""
+
+    extension = ".json"
+
+    def __init__(self, cache_dir, max_size):
+        """Init.
+
+        :param cache_dir: directory where responses are stored.
+        :param max_size: max. size of cache in bytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        for fname in os.listdir(cache_dir):
+            if not fname.endswith(self.extension):
+                continue
+
+            stat = os.stat(os.path.join(cache_dir, fname))
+            key = fname[: -len(self.extension)]
+            self._entries[key] = (stat.st_mtime, stat.st_size)
+
+    @staticmethod
+    def get_key(host, url, headers):
+        """Return cache key for given request.
+
+        Authorization header is part of the key, because different tokens
+        might see different data. Tokens of lib.ratelimit.TokenPool see the
+        same data, therefore requests are keyed by token of the client
+        rather than by the token each request is sent with.
+        """
+        data = "\n".join([headers.get("Authorization", ""), host, url])
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return cached entry(dict) or None."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+
+        fname = self._get_fname(key)
+        try:
+            with open(fname, "r", encoding="utf-8") as fhandle:
+                entry = self._load(fhandle)
+
+            # NOTE: mtime is used to track recency of use.
+            os.utime(fname)
+            stat = os.stat(fname)
+        except (OSError, ValueError) as exception:
+            logging.debug("Failed to read cache entry '%s': %s", key, exception)
+            self._remove(key)
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries[key] = (stat.st_mtime, stat.st_size)
+
+        return entry
+
+    def put(self, key, headers, body):
+        """Store response in cache if it has a validator."""
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if not etag and not last_modified:
+            return
+
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": dict(headers),
+            "body": body,
+        }
+        self._store(key, entry)
+
+    def _store(self, key, entry):
+        """Write entry into cache and evict entries over max_size."""
+        fd, tmp_fname = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fhandle:
+            self._dump(entry, fhandle)
+
+        fname = self._get_fname(key)
+        os.replace(tmp_fname, fname)
+        stat = os.stat(fname)
+        with self._lock:
+            self._entries[key] = (stat.st_mtime, stat.st_size)
+            self._evict()
+
+    def get_conditional_headers(self, entry):
+        """Return headers for conditional request based on cached entry."""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        return headers
+
+    def get_response(self, entry, headers):
+        """Return cached response updated with headers of 304 response."""
+        response_headers = dict(entry["headers"])
+        # NOTE: 304 response carries fresh rate limit headers.
+        response_headers.update(
+            {key.lower(): value for key, value in headers.items()}
+        )
+        return CachedResponse(200, response_headers, entry["body"])
+
+    def _evict(self):
+        """Remove least recently used entries until cache fits max_size.
+
+        Must be called with lock held.
+        """
+        total_size = sum(size for _, size in self._entries.values())
+        if total_size <= self.max_size:
+            return
+
+        by_mtime = sorted(self._entries.items(), key=lambda item: item[1][0])
+        for key, (_, size) in by_mtime:
+            if total_size <= self.max_size:
+                break
+
+            try:
+                os.unlink(self._get_fname(key))
+            except OSError:
+                pass
+
+            del self._entries[key]
+            total_size -= size
+
+    def _get_fname(self, key):
+        """Return file name of cache entry."""
+        return os.path.join(
+            self.cache_dir, "{:s}{:s}".format(key, self.extension)
+        )
+
+    @staticmethod
+    def _load(fhandle):
+        """Return entry read from file."""
+        return json.load(fhandle)
+
+    @staticmethod
+    def _dump(entry, fhandle):
+        """Write entry into file."""
+        json.dump(entry, fhandle)
+
+    def _remove(self, key):
+        """Remove entry from cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+        try:
+            os.unlink(self._get_fname(key))
+        except OSError:
+            pass
+
+
+class MemoryCache(HTTPCache):
+    """Size capped in-memory cache of HTTP responses with LRU eviction.
+
+    Bodies are kept zlib-compressed, JSON of alerts compresses very well.
+    """
+
+    def __init__(self, max_size):
+        """Init.
+
+        :param max_size: max. size of compressed bodies in bytes.
+        """
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._size = 0
+
+    def get(self, key):
+        """Return cached entry(dict) or None."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+
+            self._entries.move_to_end(key)
+            entry, body = self._entries[key]
+
+        return dict(entry, body=zlib.decompress(body).decode("utf-8"))
+
+    def put(self, key, headers, body):
+        """Store response in cache if it has a validator."""
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if not etag and not last_modified:
+            return
+
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": dict(headers),
+        }
+        compressed = zlib.compress(body.encode("utf-8"))
+        with self._lock:
+            self._remove_entry(key)
+            self._entries[key] = (entry, compressed)
+            self._size += len(compressed)
+            while self._size > self.max_size and self._entries:
+                self._remove_entry(next(iter(self._entries)))
+
+    def _remove_entry(self, key):
+        """Remove entry from cache.
+
+        Must be called with lock held.
+        """
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key)[1])
+
+    def _remove(self, key):
+        """Remove entry from cache."""
+        with self._lock:
+            self._remove_entry(key)
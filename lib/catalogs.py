@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""CWE catalogs and classification of alerts.
+
+Catalog is a text file with one CWE ID per line, eg. "CWE-79" or just "79".
+Lines starting with '#' are comments, except for "# label: <label>" which
+sets label shown in the report. Catalog name is file name without suffix.
+
+Each catalog gets one bit and alerts are classified once at ingest into
+a bitmask of catalogs their CWEs belong to. Lookup is done in a table which
+maps CWE ID to a bitmask of all catalogs, therefore classification costs
+the same regardless of number of catalogs.
+"""
+import os
+import threading
+
+CATALOG_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "catalogs"
+)
+DEFAULT_CATALOGS = [
+    os.path.join(CATALOG_DIR, "cisa_kev_2023.txt"),
+    os.path.join(CATALOG_DIR, "owasp_2021.txt"),
+]
+
+
+class CatalogException(Exception):
+    """Custom exception in order to signal problem with CWE catalog."""
+
+    def __init__(self, *args, **kwargs):
+        """Init."""
+        super().__init__(*args)
+        self.message = kwargs.get("message")
+
+
+class Catalog:
+    """CWE catalog."""
+
+    __slots__ = ("name", "label", "mask", "cwe_ids")
+
+    def __init__(self, name, label, mask, cwe_ids):
+        """Init."""
+        self.name = name
+        self.label = label
+        self.mask = mask
+        self.cwe_ids = frozenset(cwe_ids)
+
+
+class CatalogRegistry:
+    """Registry of CWE catalogs."""
+
+    def __init__(self):
+        """Init."""
+        self.catalogs = []
+        self._cwe_masks = {}
+        self._labels = {}
+        self._names = {}
+
+    def add(self, name, label, cwe_ids):
+        """Add catalog and return it.
+
+        :raises CatalogException: if catalog of the same name exists.
+        """
+        if name in [catalog.name for catalog in self.catalogs]:
+            raise CatalogException(
+                message="CWE catalog '{:s}' is already loaded".format(name)
+            )
+
+        catalog = Catalog(name, label, 1 << len(self.catalogs), cwe_ids)
+        self.catalogs.append(catalog)
+        for cwe_id in catalog.cwe_ids:
+            self._cwe_masks[cwe_id] = (
+                self._cwe_masks.get(cwe_id, 0) | catalog.mask
+            )
+
+        self._labels = {}
+        self._names = {}
+        return catalog
+
+    def load_file(self, fname):
+        """Load catalog from file and return it.
+
+        :raises CatalogException: if catalog can't be loaded.
+        """
+        name = os.path.splitext(os.path.basename(fname))[0]
+        label = name
+        cwe_ids = set()
+        try:
+            with open(fname, "r", encoding="utf-8") as fhandle:
+                for line_no, line in enumerate(fhandle, start=1):
+                    line = line.strip()
+                    if line.startswith("#"):
+                        directive = line.lstrip("#").strip()
+                        if directive.lower().startswith("label:"):
+                            label = directive.split(":", 1)[1].strip()
+
+                        continue
+
+                    if not line:
+                        continue
+
+                    cwe_id = parse_cwe_id(line)
+                    if cwe_id is None:
+                        raise CatalogException(
+                            message="Invalid CWE ID '{:s}' at {:s}:{:d}".format(
+                                line, fname, line_no
+                            )
+                        )
+
+                    cwe_ids.add(cwe_id)
+        except OSError as exc:
+            message = "Error reading CWE catalog '{:s}': {}".format(
+                fname, exc.strerror
+            )
+            raise CatalogException(message=message) from exc
+
+        return self.add(name, label, cwe_ids)
+
+    def classify(self, cwe_ids):
+        """Return bitmask of catalogs given CWE IDs(int) belong to."""
+        mask = 0
+        for cwe_id in cwe_ids:
+            mask |= self._cwe_masks.get(cwe_id, 0)
+
+        return mask
+
+    def get_mask(self, name):
+        """Return bitmask of catalog with given name or 0."""
+        for catalog in self.catalogs:
+            if catalog.name == name:
+                return catalog.mask
+
+        return 0
+
+    def get_labels(self, mask):
+        """Return tuple of labels of catalogs in bitmask."""
+        if mask not in self._labels:
+            self._labels[mask] = tuple(
+                catalog.label
+                for catalog in self.catalogs
+                if mask & catalog.mask
+            )
+
+        return self._labels[mask]
+
+    def get_names(self, mask):
+        """Return tuple of names of catalogs in bitmask."""
+        if mask not in self._names:
+            self._names[mask] = tuple(
+                catalog.name for catalog in self.catalogs if mask & catalog.mask
+            )
+
+        return self._names[mask]
+
+
+def parse_cwe_id(value):
+    """Return CWE ID as int, eg. 79 for "CWE-79", or None if it's invalid.
+
+    Note that GitHub uses pseudo-IDs like "NVD-CWE-Other" too.
+    """
+    if isinstance(value, int):
+        return value
+
+    value = str(value).strip().upper()
+    if value.startswith("CWE-"):
+        value = value[4:]
+
+    if not value.isdigit():
+        return None
+
+    return int(value)
+
+
+_REGISTRY = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_registry():
+    """Return active registry, default catalogs are loaded if none is set."""
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = load_registry([])
+
+        return _REGISTRY
+
+
+def set_registry(registry):
+    """Set active registry."""
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        _REGISTRY = registry
+
+
+def load_registry(fnames):
+    """Return registry with default catalogs and catalogs from given files.
+
+    :raises CatalogException: if catalog can't be loaded.
+    """
+    registry = CatalogRegistry()
+    for fname in DEFAULT_CATALOGS + list(fnames or []):
+        registry.load_file(fname)
+
+    return registry
+
+
+def classify(cwe_ids):
+    """Return bitmask of catalogs in active registry CWE IDs belong to."""
+    return get_registry().classify(cwe_ids)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Checkpoint of repositories whose alerts have already been fetched.
+
+Fetch of large estate takes long and any failure, e.g. network outage or
+exhausted rate limit, would mean starting from scratch. Repo detail of each
+repository is therefore appended into checkpoint file as soon as its alerts
+are fetched. Checkpoint file is a JSON Lines file:
+
+* the first line is a header with format name, version and alert fields
+* repo line of each fetched repository, the same as in snapshot
+
+Each line is flushed as soon as it's written, therefore at most the last
+line is lost when the process is killed. When run is resumed, repositories
+found in checkpoint are reported from it without any request. Checkpoint
+file is removed once all repositories are fetched.
+"""
+import json
+import logging
+import os
+
+from lib.snapshot import ALERT_FIELDS
+from lib.snapshot import line_to_repo
+from lib.snapshot import repo_to_line
+
+FORMAT = "dependabot-report-checkpoint"
+VERSION = 1
+
+
+class Checkpoint:
+    """Append-only record of fetched repositories."""
+
+    def __init__(self, fname, resume=False):
+        """Init.
+
+        :param fname: JSON Lines file where checkpoint is kept.
+        :param resume: load repositories from existing checkpoint file and
+            append to it, otherwise checkpoint starts empty.
+        """
+        self.fname = fname
+        self._repos = {}
+        offset = 0
+        if resume and os.path.exists(fname):
+            offset = self._load()
+
+        if offset:
+            logging.info(
+                "Resume with %i repo(s) from checkpoint '%s'.",
+                len(self._repos),
+                fname,
+            )
+            # NOTE: drop partially written line, if any, before appending.
+            os.truncate(fname, offset)
+            self.fhandle = open(fname, "a", encoding="utf-8")
+        else:
+            self.fhandle = open(fname, "w", encoding="utf-8")
+            self._write_line(
+                {
+                    "format": FORMAT,
+                    "version": VERSION,
+                    "alert_fields": ALERT_FIELDS,
+                }
+            )
+
+    def _load(self):
+        """Load repositories from checkpoint file.
+
+        Return offset of the end of the last valid line, 0 if header is
+        invalid.
+        """
+        offset = 0
+        alert_fields = None
+        with open(self.fname, "rb") as fhandle:
+            for raw_line in fhandle:
+                if not raw_line.endswith(b"\n"):
+                    logging.warning(
+                        "Ignore truncated line in checkpoint '%s'.",
+                        self.fname,
+                    )
+                    break
+
+                try:
+                    line = json.loads(raw_line)
+                    if alert_fields is None:
+                        if (line.get("format"), line.get("version")) != (
+                            FORMAT,
+                            VERSION,
+                        ):
+                            raise ValueError("unsupported header")
+
+                        alert_fields = line["alert_fields"]
+                    else:
+                        self._repos[line["full_name"]] = line_to_repo(
+                            alert_fields, line
+                        )
+                except (
+                    ValueError,
+                    KeyError,
+                    TypeError,
+                    AttributeError,
+                ) as exception:
+                    logging.warning(
+                        "Ignore invalid line in checkpoint '%s': %s",
+                        self.fname,
+                        exception,
+                    )
+                    break
+
+                offset += len(raw_line)
+
+        if alert_fields is None:
+            return 0
+
+        return offset
+
+    def _write_line(self, data):
+        """Write line and flush it."""
+        self.fhandle.write(json.dumps(data))
+        self.fhandle.write("\n")
+        self.fhandle.flush()
+
+    def pop_repo(self, full_name):
+        """Return restored repo detail of repository or None."""
+        return self._repos.pop(full_name, None)
+
+    def add(self, full_name, repo_detail):
+        """Record fetched repo detail of repository."""
+        self._write_line(repo_to_line(full_name, repo_detail))
+
+    def close(self):
+        """Close checkpoint file, it's kept for resume."""
+        if not self.fhandle.closed:
+            self.fhandle.close()
+
+    def finish(self):
+        """Close and remove checkpoint file once fetch is complete."""
+        self.close()
+        try:
+            os.unlink(self.fname)
+        except FileNotFoundError:
+            pass
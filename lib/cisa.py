@@ -1,30 +0,0 @@
-#!/usr/bin/env python3
-"""CISA CWEs."""
-# NOTE(zstyblik): CISA KEV TOP25 2023
-CWE_CISA_KEV_2023 = {
-    "CWE-787",
-    "CWE-79",
-    "CWE-89",
-    "CWE-416",
-    "CWE-78",
-    "CWE-20",
-    "CWE-125",
-    "CWE-22",
-    "CWE-352",
-    "CWE-434",
-    "CWE-862",
-    "CWE-476",
-    "CWE-287",
-    "CWE-190",
-    "CWE-502",
-    "CWE-77",
-    "CWE-119",
-    "CWE-798",
-    "CWE-918",
-    "CWE-306",
-    "CWE-362",
-    "CWE-269",
-    "CWE-94",
-    "CWE-863",
-    "CWE-276",
-}
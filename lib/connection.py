@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Thread-safe HTTP connection classes for PyGithub.
+
+PyGithub's Requester shares one connection object and stores request
+parameters on it between request() and getresponse() calls. That's fine for
+a single thread, but requests issued from worker threads would step on each
+other. Classes below keep pending request in thread-local storage instead
+while still sharing one pooled requests.Session.
+
+Connection classes are also the place where every request to GitHub API
+passes through, therefore requests are sent via lib.transport, e.g. as
+conditional requests backed by lib.cache.HTTPCache or scheduled by
+lib.ratelimit.RateLimiter.
+"""
+import threading
+
+from github.Requester import HTTPRequestsConnectionClass
+from github.Requester import HTTPSRequestsConnectionClass
+from github.Requester import Requester
+from github.Requester import RequestsResponse
+
+from lib.transport import send_request
+
+
+class ThreadLocalRequestMixin:
+    """Keep pending request in thread-local storage."""
+
+    cache = None
+    rate_limiter = None
+    metrics = None
+
+    def __init__(self, *args, **kwargs):
+        """Init."""
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+
+    def request(self, verb, url, input, headers, stream=False):  # noqa: A002
+        """Store request parameters for current thread."""
+        self._local.request = (verb, url, input, headers)
+
+    def getresponse(self):
+        """Perform pending request of current thread and return response."""
+        verb, url, data, headers = self._local.request
+        return send_request(
+            lambda *args: RequestsResponse(self.send(*args)),
+            self.host,
+            verb,
+            url,
+            data,
+            headers,
+            self.cache,
+            self.rate_limiter,
+            self.metrics,
+        )
+
+    def send(self, verb, url, data, headers):
+        """Send request via shared session and return requests.Response."""
+        method = getattr(self.session, verb.lower())
+        response = method(
+            "{:s}://{:s}:{:d}{:s}".format(
+                self.protocol, self.host, self.port, url
+            ),
+            headers=headers,
+            data=data,
+            timeout=self.timeout,
+            verify=self.verify,
+            allow_redirects=False,
+        )
+        if self.metrics is not None:
+            self.metrics.record_response(
+                response.status_code, response.headers, len(response.content)
+            )
+
+        return response
+
+
+class HTTPConnection(ThreadLocalRequestMixin, HTTPRequestsConnectionClass):
+    """Thread-safe HTTP connection."""
+
+
+class HTTPSConnection(ThreadLocalRequestMixin, HTTPSRequestsConnectionClass):
+    """Thread-safe HTTPS connection."""
+
+
+def get_connection_classes(cache=None, rate_limiter=None, metrics=None):
+    """Return tuple of HTTP and HTTPS connection classes.
+
+    :param cache: optional lib.cache.HTTPCache for conditional requests.
+    :param rate_limiter: optional lib.ratelimit.RateLimiter.
+    :param metrics: optional lib.metrics.Metrics.
+    """
+    attrs = {"cache": cache, "rate_limiter": rate_limiter, "metrics": metrics}
+    return (
+        type("HTTPConnection", (HTTPConnection,), attrs),
+        type("HTTPSConnection", (HTTPSConnection,), attrs),
+    )
+
+
+def install(cache=None, rate_limiter=None, metrics=None):
+    """Make PyGithub use thread-safe connection classes."""
+    Requester.injectConnectionClasses(
+        *get_connection_classes(cache, rate_limiter, metrics)
+    )
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Negative cache of repositories whose alerts can't be fetched.
+
+Request for alerts of repository with dependabot disabled ends with 403
+every time. Such repositories are remembered along with time of the check
+and reported as errors without any request until TTL expires. Cache is kept
+in a JSON file which maps full name of repository to UNIX time of the check.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from lib.atomic import write_atomic
+
+
+class ErrorCache:
+    """TTL-based cache of repositories whose alerts failed to be fetched."""
+
+    def __init__(self, fname, ttl, recheck=False, clock=time.time):
+        """Init.
+
+        :param fname: JSON file where cache is kept.
+        :param ttl: seconds for which failed check is remembered.
+        :param recheck: ignore remembered failures until the cache is saved,
+            but remember new ones.
+        """
+        self.fname = fname
+        self.ttl = ttl
+        self.recheck = recheck
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        if os.path.exists(fname):
+            try:
+                with open(fname, "r", encoding="utf-8") as fhandle:
+                    self._entries = {
+                        str(full_name): float(checked_at)
+                        for full_name, checked_at in json.load(fhandle).items()
+                    }
+            except (OSError, ValueError, AttributeError) as exception:
+                logging.warning(
+                    "Failed to read error cache '%s', starting empty: %s",
+                    fname,
+                    exception,
+                )
+
+    def has_error(self, full_name):
+        """Return True if failure of repository is remembered and fresh."""
+        if self.recheck:
+            return False
+
+        with self._lock:
+            checked_at = self._entries.get(full_name)
+
+        return checked_at is not None and (self.clock() - checked_at < self.ttl)
+
+    def update(self, full_name, alerts_error):
+        """Remember result of fresh check of repository."""
+        with self._lock:
+            if alerts_error:
+                self._entries[full_name] = self.clock()
+            else:
+                self._entries.pop(full_name, None)
+
+    def save(self):
+        """Write cache without expired entries into the file."""
+        now = self.clock()
+        with self._lock:
+            self._entries = {
+                full_name: checked_at
+                for full_name, checked_at in self._entries.items()
+                if now - checked_at < self.ttl
+            }
+            data = json.dumps(self._entries, indent=0, sort_keys=True)
+
+        write_atomic(self.fname, data)
+        # NOTE: all repos have been checked again by now, subsequent runs(see
+        # --watch) use the cache.
+        self.recheck = False
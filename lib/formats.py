@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Writers of report data in machine-readable formats.
+
+Writers get the same namespaces as HTML template, one at a time, and write
+them out right away, therefore any number of formats can be produced from
+a single fetch without holding extra data in memory.
+
+Each writer has begin(report_mtime), write_namespace(namespace, namespace
+data) and end() methods.
+"""
+import csv
+import json
+
+from lib import catalogs
+from lib.snapshot import get_value
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+TOOL_NAME = "dependabot-report"
+TOOL_URI = "https://github.com/zstyblik/dependabot-report"
+# NOTE: SARIF knows only error, warning and note levels.
+SARIF_LEVELS = {
+    "critical": "error",
+    "high": "error",
+    "medium": "warning",
+    "low": "note",
+}
+
+
+def alert_to_dict(alert):
+    """Return lib.alert.Alert as a dict suitable for JSON."""
+    return {
+        "number": alert.number,
+        "severity": alert.severity,
+        "summary": alert.summary,
+        "html_url": alert.html_url,
+        "package": alert.package,
+        "ecosystem": alert.ecosystem,
+        "manifest_path": alert.manifest_path,
+        "created_at": (
+            alert.created_at.isoformat() if alert.created_at else None
+        ),
+        "cwes": ["CWE-{:d}".format(cwe_id) for cwe_id in alert.cwes],
+        "tags": list(catalogs.get_registry().get_labels(alert.tags)),
+    }
+
+
+class JSONWriter:
+    """Write report as JSON document."""
+
+    extension = ".json"
+
+    def __init__(self, fhandle):
+        """Init."""
+        self.fhandle = fhandle
+        self._first = True
+
+    def begin(self, report_mtime):
+        """Write beginning of the document."""
+        self.fhandle.write(
+            '{{"report_mtime": {:s}, "namespaces": ['.format(
+                json.dumps(str(report_mtime))
+            )
+        )
+
+    def write_namespace(self, namespace, namespace_data):
+        """Write namespace and its repos."""
+        owner = namespace_data["owner"]
+        if not self._first:
+            self.fhandle.write(",")
+
+        self._first = False
+        self.fhandle.write(
+            '\n{{"namespace": {:s}, "owner": {:s}, "repos": ['.format(
+                json.dumps(namespace),
+                json.dumps(
+                    {
+                        "login": get_value(owner, "login"),
+                        "html_url": get_value(owner, "html_url"),
+                    }
+                ),
+            )
+        )
+        first_repo = True
+        for full_name, repo_detail in namespace_data["repos"].items():
+            if not first_repo:
+                self.fhandle.write(",")
+
+            first_repo = False
+            self.fhandle.write("\n")
+            self.fhandle.write(
+                json.dumps(
+                    {
+                        "full_name": full_name,
+                        "html_url": repo_detail["html_url"],
+                        "fork": repo_detail["fork"],
+                        "alerts_error": repo_detail["alerts_error"],
+                        "skip_reason": repo_detail.get("skip_reason"),
+                        "alerts_stats": repo_detail["alerts_stats"],
+                        "alerts": [
+                            alert_to_dict(alert)
+                            for alert in repo_detail["alerts"].values()
+                        ],
+                    }
+                )
+            )
+
+        self.fhandle.write("]}")
+
+    def end(self):
+        """Write end of the document."""
+        self.fhandle.write("\n]}\n")
+
+
+class CSVWriter:
+    """Write alerts as flat CSV, one alert per row."""
+
+    extension = ".csv"
+    header = [
+        "namespace",
+        "repository",
+        "number",
+        "severity",
+        "summary",
+        "package",
+        "ecosystem",
+        "manifest_path",
+        "created_at",
+        "cwes",
+        "tags",
+        "html_url",
+    ]
+
+    def __init__(self, fhandle):
+        """Init.
+
+        :param fhandle: file opened with newline="".
+        """
+        self.writer = csv.writer(fhandle)
+
+    def begin(self, report_mtime):
+        """Write header."""
+        self.writer.writerow(self.header)
+
+    def write_namespace(self, namespace, namespace_data):
+        """Write alerts of repos of namespace."""
+        for full_name, repo_detail in namespace_data["repos"].items():
+            for alert in repo_detail["alerts"].values():
+                data = alert_to_dict(alert)
+                self.writer.writerow(
+                    [
+                        namespace,
+                        full_name,
+                        data["number"],
+                        data["severity"],
+                        data["summary"],
+                        data["package"],
+                        data["ecosystem"],
+                        data["manifest_path"],
+                        data["created_at"],
+                        ";".join(data["cwes"]),
+                        ";".join(data["tags"]),
+                        data["html_url"],
+                    ]
+                )
+
+    def end(self):
+        """Do nothing, CSV has no footer."""
+
+
+class SARIFWriter:
+    """Write alerts as SARIF 2.1.0 log with one run.
+
+    Rules are known up front(one per severity), therefore results can be
+    written as they come.
+    """
+
+    extension = ".sarif"
+
+    def __init__(self, fhandle):
+        """Init."""
+        self.fhandle = fhandle
+        self._first = True
+
+    def begin(self, report_mtime):
+        """Write beginning of the log."""
+        rules = [
+            {
+                "id": get_rule_id(severity),
+                "shortDescription": {
+                    "text": "Dependabot alert of {:s} severity".format(severity)
+                },
+                "defaultConfiguration": {"level": level},
+            }
+            for severity, level in SARIF_LEVELS.items()
+        ]
+        tool = {
+            "driver": {
+                "name": TOOL_NAME,
+                "informationUri": TOOL_URI,
+                "rules": rules,
+            }
+        }
+        self.fhandle.write(
+            '{{"$schema": {:s}, "version": "2.1.0", "runs": [{{"tool": {:s}, '
+            '"properties": {:s}, "results": ['.format(
+                json.dumps(SARIF_SCHEMA),
+                json.dumps(tool),
+                json.dumps({"report_mtime": str(report_mtime)}),
+            )
+        )
+
+    def write_namespace(self, namespace, namespace_data):
+        """Write alerts of repos of namespace as results."""
+        for full_name, repo_detail in namespace_data["repos"].items():
+            for alert in repo_detail["alerts"].values():
+                if not self._first:
+                    self.fhandle.write(",")
+
+                self._first = False
+                self.fhandle.write("\n")
+                self.fhandle.write(
+                    json.dumps(
+                        alert_to_result(
+                            full_name, repo_detail["html_url"], alert
+                        )
+                    )
+                )
+
+    def end(self):
+        """Write end of the log."""
+        self.fhandle.write("\n]}]}\n")
+
+
+def get_rule_id(severity):
+    """Return SARIF rule ID for given severity."""
+    return "dependabot/{}".format(severity)
+
+
+def alert_to_result(full_name, repo_html_url, alert):
+    """Return lib.alert.Alert as SARIF result(dict)."""
+    data = alert_to_dict(alert)
+    result = {
+        "ruleId": get_rule_id(alert.severity),
+        "level": SARIF_LEVELS.get(alert.severity, "warning"),
+        "message": {"text": alert.summary or ""},
+        "properties": dict(data, repository=full_name),
+    }
+    if alert.manifest_path:
+        result["locations"] = [
+            {
+                "physicalLocation": {
+                    "artifactLocation": {
+                        "uri": "{:s}/blob/HEAD/{:s}".format(
+                            repo_html_url, alert.manifest_path
+                        )
+                    }
+                }
+            }
+        ]
+
+    return result
+
+
+WRITERS = {
+    "json": JSONWriter,
+    "csv": CSVWriter,
+    "sarif": SARIFWriter,
+}
+
+
+def tee(writers, namespaces):
+    """Write namespaces by all writers as they pass through and yield them."""
+    for namespace, namespace_data in namespaces:
+        if writers and not isinstance(namespace_data["repos"], dict):
+            # NOTE: repos might be read lazily(see lib.snapshot) and can be
+            # iterated over only once. Only one namespace is held in memory.
+            namespace_data = dict(
+                namespace_data, repos=dict(namespace_data["repos"].items())
+            )
+
+        for writer in writers:
+            writer.write_namespace(namespace, namespace_data)
+
+        yield namespace, namespace_data
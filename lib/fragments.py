@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Cache of rendered HTML fragments of repositories.
+
+Alerts of most repositories don't change between runs, yet each table row
+would be rendered again every time. `<tbody>` of each repository is rendered
+by its own template instead and kept on disk keyed by a hash of the template
+source, CWE catalogs, ecosystems and data of the repository. Fragment of
+unchanged repository is reused verbatim, therefore render time is
+proportional to the amount of change rather than number of repositories.
+"""
+import hashlib
+import json
+import threading
+
+from lib import catalogs
+from lib.cache import HTTPCache
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+class FragmentCache(HTTPCache):
+    """Size capped on-disk cache of rendered fragments with LRU eviction."""
+
+    extension = ".html"
+
+    def put(self, key, fragment):
+        """Store rendered fragment(str) in cache."""
+        self._store(key, fragment)
+
+    @staticmethod
+    def _load(fhandle):
+        """Return fragment read from file."""
+        return fhandle.read()
+
+    @staticmethod
+    def _dump(entry, fhandle):
+        """Write fragment into file."""
+        fhandle.write(entry)
+
+
+def get_cache():
+    """Return active FragmentCache or None."""
+    with _CACHE_LOCK:
+        return _CACHE
+
+
+def set_cache(cache):
+    """Set active FragmentCache, None disables caching of fragments."""
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = cache
+
+
+def get_template_version(template_fname):
+    """Return checksum of template source."""
+    with open(template_fname, "rb") as fhandle:
+        return hashlib.sha256(fhandle.read()).hexdigest()
+
+
+def get_key(template_version, ecosystems, repo_name, repo_detail):
+    """Return cache key of rendered repository.
+
+    Key covers everything fragment template renders, therefore fragment is
+    invalidated whenever any of it changes.
+    """
+    data = [
+        template_version,
+        [
+            (catalog.name, catalog.label)
+            for catalog in catalogs.get_registry().catalogs
+        ],
+        list(ecosystems),
+        repo_name,
+        repo_detail["html_url"],
+        sorted(repo_detail["html_filters"]),
+        repo_detail["alerts_error"],
+        repo_detail.get("skip_reason"),
+        repo_detail["alerts_stats"],
+        [
+            [
+                alert.number,
+                alert.severity,
+                alert.summary,
+                alert.html_url,
+                alert.package,
+                alert.ecosystem,
+                alert.manifest_path,
+                alert.created_at.isoformat() if alert.created_at else None,
+                alert.tags,
+            ]
+            for alert in repo_detail["alerts"].values()
+        ],
+    ]
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True).encode("utf-8")
+    ).hexdigest()
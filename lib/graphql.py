@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Fetch vulnerability alerts of many repositories via GitHub's GraphQL API.
+
+Repositories are queried in batches using aliased `repository` selections,
+therefore one request covers many repositories. Only fields used by the
+report are requested.
+"""
+import logging
+from datetime import datetime
+
+from lib.alert import Alert
+
+BATCH_SIZE = 25
+PAGE_SIZE = 100
+
+ALERT_FIELDS = """
+    pageInfo { hasNextPage endCursor }
+    nodes {
+        number
+        createdAt
+        vulnerableManifestPath
+        securityVulnerability { package { name ecosystem } }
+        securityAdvisory {
+            severity
+            summary
+            cwes(first: 20) { nodes { cweId } }
+        }
+    }
+"""
+
+# NOTE: GraphQL API uses different severity names than REST API.
+SEVERITIES = {
+    "CRITICAL": "critical",
+    "HIGH": "high",
+    "MODERATE": "medium",
+    "LOW": "low",
+}
+
+
+def build_query(batch):
+    """Return GraphQL query and variables for batch of repositories.
+
+    :param batch: list of tuples (full_name, cursor).
+    """
+    params = []
+    selections = []
+    variables = {}
+    for idx, (full_name, cursor) in enumerate(batch):
+        owner, name = full_name.split("/", 1)
+        params.append(
+            "$o{idx:d}: String!, $n{idx:d}: String!, $c{idx:d}: String".format(
+                idx=idx
+            )
+        )
+        selections.append(
+            "r{idx:d}: repository(owner: $o{idx:d}, name: $n{idx:d}) {{ "
+            "vulnerabilityAlerts(states: OPEN, first: {page_size:d}, "
+            "after: $c{idx:d}) {{ {fields} }} }}".format(
+                idx=idx, page_size=PAGE_SIZE, fields=ALERT_FIELDS
+            )
+        )
+        variables["o{:d}".format(idx)] = owner
+        variables["n{:d}".format(idx)] = name
+        variables["c{:d}".format(idx)] = cursor
+
+    query = "query({:s}) {{ {:s} }}".format(
+        ", ".join(params), " ".join(selections)
+    )
+    return query, variables
+
+
+def fetch_batch(requester, batch):
+    """Fetch one page of alerts for batch of repositories.
+
+    Return list of tuples (nodes, next_cursor, error), one per repository.
+    """
+    query, variables = build_query(batch)
+    _, data = requester.requestJsonAndCheck(
+        "POST",
+        requester.graphql_url,
+        input={"query": query, "variables": variables},
+    )
+    failed = set()
+    for error in data.get("errors") or []:
+        path = error.get("path") or []
+        if not path:
+            raise RuntimeError(
+                "GraphQL query failed: {}".format(error.get("message"))
+            )
+
+        logging.debug("GraphQL error for '%s': %s", path, error.get("message"))
+        failed.add(path[0])
+
+    results = []
+    for idx, _ in enumerate(batch):
+        alias = "r{:d}".format(idx)
+        repository = (data.get("data") or {}).get(alias)
+        if alias in failed or not repository:
+            results.append(([], None, True))
+            continue
+
+        alerts = repository["vulnerabilityAlerts"]
+        next_cursor = None
+        if alerts["pageInfo"]["hasNextPage"]:
+            next_cursor = alerts["pageInfo"]["endCursor"]
+
+        results.append((alerts["nodes"], next_cursor, False))
+
+    return results
+
+
+def get_alerts(requester, full_names, executor, batch_size=BATCH_SIZE):
+    """Get open alerts of given repositories.
+
+    Return dict with repository full name as a key and tuple(list of alert
+    nodes, error) as a value.
+    """
+    results = {full_name: ([], False) for full_name in full_names}
+    todo = [(full_name, None) for full_name in full_names]
+    while todo:
+        batches = []
+        for idx in range(0, len(todo), batch_size):
+            batches.append(todo[idx:][:batch_size])
+
+        todo = []
+        for batch, batch_results in zip(
+            batches,
+            executor.map(lambda batch: fetch_batch(requester, batch), batches),
+        ):
+            for (full_name, _), (nodes, cursor, error) in zip(
+                batch, batch_results
+            ):
+                results[full_name][0].extend(nodes)
+                if error:
+                    results[full_name] = ([], True)
+                elif cursor:
+                    todo.append((full_name, cursor))
+
+    return results
+
+
+def node_to_alert(node, repo_html_url):
+    """Convert GraphQL alert node into lib.alert.Alert."""
+    advisory = node.get("securityAdvisory") or {}
+    package = (node.get("securityVulnerability") or {}).get("package") or {}
+    cwes = (advisory.get("cwes") or {}).get("nodes") or []
+    return Alert(
+        number=node["number"],
+        severity=SEVERITIES.get(
+            advisory.get("severity"), advisory.get("severity")
+        ),
+        summary=advisory.get("summary"),
+        html_url="{:s}/security/dependabot/{:d}".format(
+            repo_html_url, node["number"]
+        ),
+        package=package.get("name"),
+        ecosystem=package.get("ecosystem"),
+        manifest_path=node.get("vulnerableManifestPath"),
+        created_at=datetime.fromisoformat(
+            node["createdAt"].replace("Z", "+00:00")
+        ),
+        cwes=[cwe["cweId"] for cwe in cwes],
+    )
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Instrumentation of report generation.
+
+Records time spent in phases(auth, repo listing, alerts fetch, render,
+write), latency of fetching alerts of each repository, API requests by
+response status, retries, bytes received and remaining rate limit.
+
+Metrics can be written as JSON or in Prometheus textfile collector format.
+Both files are written atomically, so a collector never reads partial file.
+"""
+import contextlib
+import json
+import threading
+import time
+
+from lib.atomic import write_atomic
+
+PROMETHEUS_PREFIX = "dependabot_report"
+# NOTE: keep cardinality in check, all repos are in JSON output.
+PROMETHEUS_TOP_REPOS = 20
+
+
+class Metrics:
+    """Collector of metrics of one report run."""
+
+    def __init__(self, clock=time.perf_counter, wall_clock=time.time):
+        """Init."""
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.started_at = wall_clock()
+        self.phases = {}
+        self.repos = {}
+        self.counters = {
+            "requests": 0,
+            "retries": 0,
+            "forbidden": 0,
+            "bytes_received": 0,
+            "cache_hits": 0,
+        }
+        self.responses = {}
+        self.rate_limit_remaining = None
+        self.rate_limit_limit = None
+        self._timer_start = clock()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Reset metrics before the next run, see --watch."""
+        with self._lock:
+            self.started_at = self.wall_clock()
+            self.phases = {}
+            self.repos = {}
+            self.counters = {name: 0 for name in self.counters}
+            self.responses = {}
+            self._timer_start = self.clock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Measure time spent in the block as phase of given name.
+
+        Time of repeated phases is summed up.
+        """
+        timer_start = self.clock()
+        try:
+            yield
+        finally:
+            self.add_phase(name, self.clock() - timer_start)
+
+    def add_phase(self, name, seconds):
+        """Add seconds to phase of given name."""
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def iter_phase(self, name, iterable):
+        """Yield items of iterable and measure time spent in getting them.
+
+        Useful for lazily paginated lists.
+        """
+        iterator = iter(iterable)
+        while True:
+            timer_start = self.clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.add_phase(name, self.clock() - timer_start)
+
+            yield item
+
+    def repo_timer(self, func):
+        """Return func(repo) wrapped to measure latency of each repo."""
+
+        def wrapper(repo):
+            timer_start = self.clock()
+            try:
+                return func(repo)
+            finally:
+                with self._lock:
+                    self.repos[repo.full_name] = self.clock() - timer_start
+
+        return wrapper
+
+    def incr(self, name, value=1):
+        """Increment counter of given name."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_response(self, status, headers, size):
+        """Record API response of given status, headers and size in bytes."""
+        headers = {key.lower(): value for key, value in headers.items()}
+        with self._lock:
+            self.counters["requests"] += 1
+            self.counters["bytes_received"] += size
+            if status == 403:
+                self.counters["forbidden"] += 1
+
+            self.responses[status] = self.responses.get(status, 0) + 1
+            if "x-ratelimit-remaining" in headers:
+                self.rate_limit_remaining = int(
+                    float(headers["x-ratelimit-remaining"])
+                )
+
+            if "x-ratelimit-limit" in headers:
+                self.rate_limit_limit = int(float(headers["x-ratelimit-limit"]))
+
+    def as_dict(self):
+        """Return metrics as a dict."""
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "duration_sec": self.clock() - self._timer_start,
+                "phases_sec": dict(self.phases),
+                "counters": dict(self.counters),
+                "responses": {
+                    str(status): count
+                    for status, count in sorted(self.responses.items())
+                },
+                "rate_limit": {
+                    "remaining": self.rate_limit_remaining,
+                    "limit": self.rate_limit_limit,
+                },
+                "repos_sec": dict(
+                    sorted(
+                        self.repos.items(),
+                        key=lambda item: item[1],
+                        reverse=True,
+                    )
+                ),
+            }
+
+    def write_json(self, fname):
+        """Write metrics into file as JSON."""
+        write_atomic(fname, json.dumps(self.as_dict(), indent=2) + "\n")
+
+    def write_prometheus(self, fname):
+        """Write metrics into file in Prometheus textfile collector format."""
+        data = self.as_dict()
+        lines = []
+        add_metric(
+            lines,
+            "last_run_timestamp_seconds",
+            "Unix time when the last report run started.",
+            [({}, data["started_at"])],
+        )
+        add_metric(
+            lines,
+            "duration_seconds",
+            "Duration of the last report run.",
+            [({}, data["duration_sec"])],
+        )
+        add_metric(
+            lines,
+            "phase_seconds",
+            "Time spent in phase of the last report run.",
+            [
+                ({"phase": phase}, seconds)
+                for phase, seconds in sorted(data["phases_sec"].items())
+            ],
+        )
+        for name, value in data["counters"].items():
+            add_metric(
+                lines,
+                "api_{:s}".format(name),
+                "Number of API {:s} in the last report run.".format(
+                    name.replace("_", " ")
+                ),
+                [({}, value)],
+            )
+
+        add_metric(
+            lines,
+            "api_responses",
+            "Number of API responses by status in the last report run.",
+            [
+                ({"status": status}, count)
+                for status, count in data["responses"].items()
+            ],
+        )
+        for name, value in data["rate_limit"].items():
+            if value is None:
+                continue
+
+            add_metric(
+                lines,
+                "rate_limit_{:s}".format(name),
+                "Rate limit {:s} as of the last API response.".format(name),
+                [({}, value)],
+            )
+
+        add_metric(
+            lines,
+            "repo_fetch_seconds",
+            "Time spent fetching alerts of the slowest repositories.",
+            [
+                ({"repo": full_name}, seconds)
+                for full_name, seconds in list(data["repos_sec"].items())[
+                    :PROMETHEUS_TOP_REPOS
+                ]
+            ],
+        )
+        write_atomic(fname, "\n".join(lines) + "\n")
+
+
+def add_metric(lines, name, help_text, samples):
+    """Append gauge with given samples(list of (labels, value)) to lines."""
+    if not samples:
+        return
+
+    full_name = "{:s}_{:s}".format(PROMETHEUS_PREFIX, name)
+    lines.append("# HELP {:s} {:s}".format(full_name, help_text))
+    lines.append("# TYPE {:s} gauge".format(full_name))
+    for labels, value in samples:
+        label_str = ""
+        if labels:
+            label_str = "{{{:s}}}".format(
+                ",".join(
+                    '{:s}="{:s}"'.format(key, escape_label(str(label)))
+                    for key, label in labels.items()
+                )
+            )
+
+        lines.append("{:s}{:s} {}".format(full_name, label_str, value))
+
+
+def escape_label(value):
+    """Escape value of Prometheus label."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
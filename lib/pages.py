@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Split HTML report into pages and build index of namespaces.
+
+Pages are built out of namespaces one at a time, therefore only one page is
+held in memory when namespaces are streamed. A namespace might span several
+pages when pages are capped by number of rows, however repository is never
+split.
+"""
+
+SEVERITIES = ["critical", "high", "medium", "low"]
+
+
+def count_rows(repo_detail):
+    """Return number of table rows of repository in the report."""
+    return max(len(repo_detail["alerts"]), 1)
+
+
+def iter_pages(namespaces, by_namespace=False, max_rows=None):
+    """Yield pages, each page is a list of tuples (namespace, namespace data).
+
+    :param namespaces: iterable of tuples (namespace, namespace data).
+    :param by_namespace: start new page with each namespace.
+    :param max_rows: max. number of table rows per page.
+    """
+    page = []
+    rows = 0
+    for namespace, namespace_data in namespaces:
+        if page and by_namespace:
+            yield page
+            page = []
+            rows = 0
+
+        owner = namespace_data["owner"]
+        current = None
+        for full_name, repo_detail in namespace_data["repos"].items():
+            repo_rows = count_rows(repo_detail)
+            if max_rows and rows and rows + repo_rows > max_rows:
+                yield page
+                page = []
+                rows = 0
+                current = None
+
+            if current is None:
+                current = {"owner": owner, "repos": {}}
+                page.append((namespace, current))
+
+            current["repos"][full_name] = repo_detail
+            rows += repo_rows
+
+        if current is None:
+            # NOTE: namespace without repos is rendered as a single row.
+            if max_rows and rows and rows + 1 > max_rows:
+                yield page
+                page = []
+                rows = 0
+
+            page.append((namespace, {"owner": owner, "repos": {}}))
+            rows += 1
+
+    if page:
+        yield page
+
+
+class Index:
+    """Index of namespaces with their alert totals and pages."""
+
+    def __init__(self):
+        """Init."""
+        self.namespaces = {}
+        self.totals = new_totals()
+
+    def add_page(self, page_fname, page):
+        """Add namespaces of page written into page_fname."""
+        for namespace, namespace_data in page:
+            if namespace not in self.namespaces:
+                self.namespaces[namespace] = {
+                    "owner": namespace_data["owner"],
+                    "pages": [],
+                    "totals": new_totals(),
+                }
+
+            entry = self.namespaces[namespace]
+            if page_fname not in entry["pages"]:
+                entry["pages"].append(page_fname)
+
+            for repo_detail in namespace_data["repos"].values():
+                for totals in (entry["totals"], self.totals):
+                    add_repo_totals(totals, repo_detail)
+
+
+def new_totals():
+    """Return empty totals of namespace."""
+    totals = {"repos": 0, "errors": 0}
+    for severity in SEVERITIES:
+        totals[severity] = 0
+
+    return totals
+
+
+def add_repo_totals(totals, repo_detail):
+    """Add alert stats of repository to totals."""
+    totals["repos"] += 1
+    if repo_detail["alerts_error"]:
+        totals["errors"] += 1
+
+    for severity in SEVERITIES:
+        totals[severity] += repo_detail["alerts_stats"].get(severity, 0)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""Rate limit aware scheduling of GitHub API requests.
+
+Requests are sent right away while rate limit budget is healthy. Once
+`X-RateLimit-Remaining` runs low for the time left until `X-RateLimit-Reset`,
+remaining requests are spread over the rest of the window, therefore the run
+finishes predictably instead of hitting the limit. Requests which hit
+primary or secondary rate limit(403/429) are retried after `Retry-After`,
+after the reset of the window or after exponential backoff with jitter.
+
+TokenPool schedules requests across several tokens, each with its own
+RateLimiter. It has the same interface as RateLimiter, except that acquire()
+returns token which the request should be sent with.
+"""
+import logging
+import random
+import threading
+import time
+
+LOG_EVERY = 100
+# NOTE: length of GitHub's rate limit window in seconds.
+WINDOW = 3600
+# NOTE: token whose budget is unknown yet is preferred, so its budget gets
+# known.
+UNKNOWN_BUDGET = float("inf")
+
+
+class RateLimiter:
+    """Schedule requests according to remaining rate limit budget."""
+
+    def __init__(
+        self,
+        reserve=0,
+        max_retries=5,
+        secondary_wait=60,
+        clock=time.time,
+        sleep=time.sleep,
+        pace_ratio=0.1,
+    ):
+        """Init.
+
+        :param reserve: number of requests which should be left unused.
+        :param max_retries: max. number of retries of rate limited request.
+        :param secondary_wait: base wait time in seconds for secondary
+            rate limit backoff.
+        :param pace_ratio: requests are paced once budget drops below this
+            ratio of the limit, scaled by time left in the window.
+        """
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self.secondary_wait = secondary_wait
+        self.pace_ratio = pace_ratio
+        self.clock = clock
+        self.sleep = sleep
+        self.remaining = None
+        self.limit = None
+        self.reset = None
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+        self._local = threading.local()
+
+    def is_low(self, budget, window):
+        """Return True if budget is low for the time left in the window.
+
+        Must be called with lock held.
+        """
+        if self.limit is None:
+            return False
+
+        low_water = self.limit * self.pace_ratio * min(window / WINDOW, 1)
+        return budget < low_water
+
+    def acquire(self):
+        """Wait until next request can be sent."""
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self._blocked_until)
+            if self.remaining is not None and self.reset is not None:
+                window = max(self.reset - now, 0)
+                budget = self.remaining - self.reserve
+                if budget <= 0 and window > 0:
+                    # NOTE: +1s as it's not clear when in that second the
+                    # reset occurs.
+                    slot = max(slot, self.reset + 1)
+                    spacing = 0.0
+                elif self.is_low(budget, window):
+                    spacing = window / max(budget, 1)
+                else:
+                    spacing = 0.0
+
+                slot = max(slot, self._next_slot)
+                self._next_slot = slot + spacing
+                # Assume request consumes quota until response says otherwise
+                # so concurrent requests don't overdraw the budget.
+                self.remaining -= 1
+                self._local.charge = spacing
+            else:
+                self._local.charge = None
+
+            self.requests += 1
+            if self.requests % LOG_EVERY == 0:
+                self.log_budget()
+
+        delay = slot - now
+        if delay > 0:
+            if delay >= 1:
+                logging.info("Throttling request for %.2fs.", delay)
+                self.log_budget()
+
+            self.sleep(delay)
+
+    def refund(self):
+        """Give back quota and pacing slot of the last request of thread.
+
+        Conditional request answered by 304 doesn't count against GitHub's
+        rate limit.
+        """
+        spacing = getattr(self._local, "charge", None)
+        self._local.charge = None
+        if spacing is None:
+            return
+
+        with self._lock:
+            if self.remaining is not None:
+                self.remaining += 1
+
+            self._next_slot = max(self._next_slot - spacing, 0.0)
+
+    def update(self, status, headers, body, attempt=0):
+        """Update budget from response and return retry delay or None.
+
+        None means that response isn't rate limited and shouldn't be retried.
+        """
+        headers = {key.lower(): value for key, value in headers.items()}
+        with self._lock:
+            now = self.clock()
+            if "x-ratelimit-remaining" in headers:
+                self.remaining = int(float(headers["x-ratelimit-remaining"]))
+
+            if "x-ratelimit-limit" in headers:
+                self.limit = int(float(headers["x-ratelimit-limit"]))
+
+            if "x-ratelimit-reset" in headers:
+                reset = int(float(headers["x-ratelimit-reset"]))
+                if reset != self.reset:
+                    self._next_slot = 0.0
+
+                self.reset = reset
+
+            if status not in (403, 429):
+                return None
+
+            if "retry-after" in headers:
+                delay = float(headers["retry-after"])
+                kind = "secondary"
+            elif self.remaining == 0 and self.reset is not None:
+                delay = max(self.reset - now, 0) + 1
+                kind = "primary"
+            elif "rate limit" in str(body).lower():
+                delay = self.secondary_wait * 2**attempt
+                kind = "secondary"
+            else:
+                return None
+
+            if kind == "secondary":
+                # NOTE: jitter, so workers don't retry all at once.
+                delay += random.uniform(0, delay / 4)
+
+            self._blocked_until = max(self._blocked_until, now + delay)
+
+        logging.warning(
+            "Hit %s rate limit, retry #%i in %.2fs.", kind, attempt + 1, delay
+        )
+        return delay
+
+    def get_budget(self):
+        """Return number of requests left above reserve or None if unknown."""
+        with self._lock:
+            if self.remaining is None:
+                return None
+
+            return self.remaining - self.reserve
+
+    def get_available_at(self):
+        """Return time when the next request can be sent."""
+        with self._lock:
+            available_at = max(self._blocked_until, self._next_slot)
+            if (
+                self.remaining is not None
+                and self.reset is not None
+                and self.remaining - self.reserve <= 0
+            ):
+                available_at = max(available_at, self.reset + 1)
+
+            return available_at
+
+    def log_budget(self):
+        """Log current rate limit budget."""
+        if self.remaining is None or self.reset is None:
+            logging.info(
+                "Rate limit budget: unknown, %i requests sent.", self.requests
+            )
+            return
+
+        logging.info(
+            "Rate limit budget: %i/%s remaining, reset in %is, %i requests "
+            "sent.",
+            max(self.remaining, 0),
+            self.limit,
+            max(self.reset - self.clock(), 0),
+            self.requests,
+        )
+
+
+class TokenPool:
+    """Schedule requests across several tokens according to their budget.
+
+    Request is sent with the token which can send it the soonest, ties are
+    broken by the most of remaining budget, therefore requests are spread
+    according to quota of each token. Each RateLimiter paces requests of its
+    token once its budget runs low. Exhausted tokens are skipped until
+    reset of their rate limit window and revoked tokens(401) are dropped for
+    good.
+    """
+
+    def __init__(
+        self,
+        tokens,
+        reserve=0,
+        max_retries=5,
+        secondary_wait=60,
+        clock=time.time,
+        sleep=time.sleep,
+        pace_ratio=0.1,
+    ):
+        """Init.
+
+        See RateLimiter for description of parameters.
+        """
+        # NOTE: the same token given twice would share quota.
+        self.tokens = list(dict.fromkeys(tokens))
+        self.limiters = {
+            token: RateLimiter(
+                reserve, max_retries, secondary_wait, clock, sleep, pace_ratio
+            )
+            for token in self.tokens
+        }
+        # NOTE: switching to another token counts as a retry too.
+        self.max_retries = max_retries + len(self.tokens)
+        self.clock = clock
+        self.revoked = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def acquire(self):
+        """Wait until next request can be sent and return token to use."""
+        token = self.select()
+        self._local.token = token
+        self.limiters[token].acquire()
+        return token
+
+    def refund(self):
+        """Give back quota of the last request of thread to its token."""
+        self.limiters[self._local.token].refund()
+
+    def select(self):
+        """Return token which the next request should be sent with."""
+        now = self.clock()
+        with self._lock:
+            # NOTE: if all tokens are revoked, let the request fail.
+            tokens = [
+                token for token in self.tokens if token not in self.revoked
+            ] or self.tokens
+
+        def sort_key(token):
+            limiter = self.limiters[token]
+            budget = limiter.get_budget()
+            return (
+                max(limiter.get_available_at(), now),
+                -(UNKNOWN_BUDGET if budget is None else budget),
+            )
+
+        return min(tokens, key=sort_key)
+
+    def update(self, status, headers, body, attempt=0):
+        """Update budget of token from response and return retry delay.
+
+        None means that response shouldn't be retried. Request which hit rate
+        limit is retried right away if another token is available.
+        """
+        token = self._local.token
+        if status == 401:
+            with self._lock:
+                if token not in self.revoked:
+                    self.revoked.add(token)
+                    logging.warning(
+                        "GitHub token #%i has been rejected, skipping it.",
+                        self.tokens.index(token) + 1,
+                    )
+
+                if len(self.revoked) == len(self.tokens):
+                    return None
+
+            return 0.0
+
+        delay = self.limiters[token].update(status, headers, body, attempt)
+        if delay is not None and self.has_available(exclude=token):
+            logging.info(
+                "GitHub token #%i is rate limited, switching to another one.",
+                self.tokens.index(token) + 1,
+            )
+            return 0.0
+
+        return delay
+
+    def has_available(self, exclude=None):
+        """Return True if any token except exclude is available right now."""
+        now = self.clock()
+        with self._lock:
+            tokens = [
+                token
+                for token in self.tokens
+                if token != exclude and token not in self.revoked
+            ]
+
+        return any(
+            self.limiters[token].get_available_at() <= now for token in tokens
+        )
+
+    def log_budget(self):
+        """Log current rate limit budget of each token."""
+        for limiter in self.limiters.values():
+            limiter.log_budget()
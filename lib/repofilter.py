@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Selection of repositories before any of their alerts is requested.
+
+Repositories are matched while their listing is being read, therefore
+neither excluded nor skipped repository costs any request. Excluded
+repositories(by owner, full name or because they're forks) are left out of
+the report. Skipped repositories(archived or disabled) are reported along
+with the reason why their alerts weren't fetched.
+
+Patterns are shell-style globs(see fnmatch) matched case-insensitively, as
+GitHub treats owners and repository names.
+"""
+import fnmatch
+
+SKIP_ARCHIVED = "archived"
+SKIP_DISABLED = "disabled"
+
+
+def match_any(value, patterns):
+    """Return True if value matches any of glob patterns."""
+    value = value.lower()
+    return any(
+        fnmatch.fnmatchcase(value, pattern.lower()) for pattern in patterns
+    )
+
+
+class RepoFilter:
+    """Decide which repositories are fetched, skipped or excluded."""
+
+    def __init__(
+        self,
+        include_owners=None,
+        exclude_owners=None,
+        include_repos=None,
+        exclude_repos=None,
+        exclude_forks=False,
+        skip_archived=False,
+        skip_disabled=False,
+    ):
+        """Init.
+
+        :param include_owners: globs of owners, all owners if empty.
+        :param exclude_owners: globs of owners to exclude.
+        :param include_repos: globs of full names, all repos if empty.
+        :param exclude_repos: globs of full names to exclude.
+        """
+        self.include_owners = list(include_owners or [])
+        self.exclude_owners = list(exclude_owners or [])
+        self.include_repos = list(include_repos or [])
+        self.exclude_repos = list(exclude_repos or [])
+        self.exclude_forks = exclude_forks
+        self.skip_archived = skip_archived
+        self.skip_disabled = skip_disabled
+
+    def is_owner_excluded(self, login):
+        """Return True if repos of given owner are left out."""
+        if self.include_owners and not match_any(login, self.include_owners):
+            return True
+
+        return match_any(login, self.exclude_owners)
+
+    def get_exclude_reason(self, repo):
+        """Return reason why repository is left out or None."""
+        if self.include_repos and not match_any(
+            repo.full_name, self.include_repos
+        ):
+            return "it doesn't match any of include patterns"
+
+        if match_any(repo.full_name, self.exclude_repos):
+            return "it matches exclude pattern"
+
+        if self.exclude_forks is True and repo.fork is True:
+            return "it's a fork"
+
+        return None
+
+    def get_skip_reason(self, repo):
+        """Return reason(SKIP_*) why alerts of repository aren't fetched.
+
+        Return None if alerts should be fetched.
+        """
+        # NOTE: both attributes are part of the repository listing, therefore
+        # reading them doesn't cost any request.
+        if self.skip_archived and getattr(repo, "archived", False) is True:
+            return SKIP_ARCHIVED
+
+        if self.skip_disabled and getattr(repo, "disabled", False) is True:
+            return SKIP_DISABLED
+
+        return None
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""Lean client of GitHub REST API endpoints used by the report.
+
+PyGithub wraps JSON into objects whose attributes go through property
+wrappers and might trigger extra requests in order to "complete" an object.
+Client below parses JSON straight into lib.alert.Alert and small records of
+owners and repositories instead, therefore every request is accounted for.
+
+Requests are sent over one pooled keep-alive requests.Session shared by
+worker threads. Lists are requested with per_page=100 and followed via
+`Link` header, which works for both page and cursor based pagination.
+Requests go through the same lib.transport as in lib.connection, i.e.
+lib.cache.HTTPCache, lib.ratelimit.RateLimiter and lib.metrics.Metrics are
+supported.
+"""
+import json
+import urllib.parse
+from datetime import datetime
+
+from lib.alert import Alert
+from lib.transport import send_request
+
+DEFAULT_BASE_URL = "https://api.github.com"
+PER_PAGE = 100
+TIMEOUT = 15
+USER_AGENT = "dependabot-report"
+
+
+class RestException(Exception):
+    """Custom exception in order to signal failed request to REST API."""
+
+    def __init__(self, *args, **kwargs):
+        """Init."""
+        super().__init__(*args)
+        self.message = kwargs.get("message")
+        self.status = kwargs.get("status")
+
+
+class Response:
+    """Status, headers and body of response."""
+
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status, headers, body):
+        """Init."""
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def read(self):
+        """Return body."""
+        return self.body
+
+
+class Owner:
+    """Owner of repository."""
+
+    __slots__ = ("login", "type", "avatar_url", "html_url")
+
+    def __init__(self, data):
+        """Init from JSON(dict) of user or organization."""
+        self.login = data["login"]
+        self.type = data.get("type")
+        self.avatar_url = data.get("avatar_url")
+        self.html_url = data.get("html_url")
+
+
+class Repo:
+    """Repository with only fields used by the report."""
+
+    __slots__ = (
+        "full_name",
+        "owner",
+        "fork",
+        "html_url",
+        "archived",
+        "disabled",
+    )
+
+    def __init__(self, data, owner=None):
+        """Init from JSON(dict) of repository.
+
+        :param owner: Owner to use instead of a new one, so consecutive
+            repos of the same namespace share it.
+        """
+        self.full_name = data["full_name"]
+        self.owner = owner or Owner(data["owner"])
+        self.fork = data.get("fork", False)
+        self.html_url = data.get("html_url")
+        self.archived = data.get("archived", False)
+        self.disabled = data.get("disabled", False)
+
+
+class AuthenticatedUser:
+    """Authenticated user, mimics PyGithub's AuthenticatedUser."""
+
+    def __init__(self, client, data):
+        """Init."""
+        self.client = client
+        self.login = data["login"]
+
+    def get_repos(self, affiliation, sort="full_name", direction="asc"):
+        """Return iterable of Repo of repositories user has access to."""
+        return self.client.iter_repos(
+            "/user/repos",
+            {"affiliation": affiliation, "sort": sort, "direction": direction},
+        )
+
+
+class RestClient:
+    """Client of GitHub REST API."""
+
+    def __init__(
+        self,
+        token,
+        base_url=None,
+        pool_size=1,
+        cache=None,
+        rate_limiter=None,
+        metrics=None,
+        retry=None,
+        timeout=TIMEOUT,
+    ):
+        """Init.
+
+        :param pool_size: max. number of kept-alive connections, should be
+            equal to number of workers.
+        :param retry: optional urllib3.util.Retry for failed requests.
+        """
+        import requests
+
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.host = urllib.parse.urlsplit(self.base_url).netloc
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.timeout = timeout
+        self.headers = {
+            "Accept": "application/vnd.github+json",
+            "Authorization": "token {:s}".format(token),
+            "User-Agent": USER_AGENT,
+        }
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max(pool_size, 1),
+            max_retries=retry or 0,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
+    def get_url(self, path, params=None):
+        """Return absolute URL of path with query params."""
+        url = path
+        if not path.startswith(("http://", "https://")):
+            url = "{:s}{:s}".format(self.base_url, path)
+
+        if params:
+            url = "{:s}?{:s}".format(url, urllib.parse.urlencode(params))
+
+        return url
+
+    def request(self, url):
+        """Send GET request and return Response."""
+        return send_request(
+            lambda verb, url, data, headers: self.send(url, headers),
+            self.host,
+            "GET",
+            url,
+            None,
+            self.headers,
+            self.cache,
+            self.rate_limiter,
+            self.metrics,
+        )
+
+    def send(self, url, headers):
+        """Send GET request via shared session and return Response."""
+        response = self.session.get(
+            url, headers=headers, timeout=self.timeout, allow_redirects=False
+        )
+        if self.metrics is not None:
+            self.metrics.record_response(
+                response.status_code, response.headers, len(response.content)
+            )
+
+        return Response(
+            response.status_code,
+            {key.lower(): value for key, value in response.headers.items()},
+            response.text,
+        )
+
+    def get_json(self, url):
+        """Return tuple (parsed JSON, Response) of GET request.
+
+        :raises RestException: if response status isn't 200.
+        """
+        response = self.request(url)
+        if response.status != 200:
+            message = "GET '{:s}' failed with status {:d}".format(
+                url, response.status
+            )
+            try:
+                message = "{:s}: {}".format(
+                    message, json.loads(response.body).get("message")
+                )
+            except (ValueError, AttributeError):
+                pass
+
+            raise RestException(message=message, status=response.status)
+
+        return json.loads(response.body), response
+
+    def iter_items(self, path, params=None):
+        """Yield items of paginated list.
+
+        :raises RestException: if any page can't be fetched.
+        """
+        url = self.get_url(path, dict(params or {}, per_page=PER_PAGE))
+        while url:
+            data, response = self.get_json(url)
+            yield from data
+            url = get_next_url(response.headers)
+
+    def iter_repos(self, path, params=None):
+        """Yield Repo of paginated list of repositories.
+
+        :raises RestException: if any page can't be fetched.
+        """
+        owner = None
+        for data in self.iter_items(path, params):
+            if owner is None or owner.login != data["owner"]["login"]:
+                owner = Owner(data["owner"])
+
+            yield Repo(data, owner)
+
+    def get_org_repos(self, org):
+        """Return iterable of Repo of repositories of organization.
+
+        :raises RestException: if repositories can't be listed.
+        """
+        return self.iter_repos(
+            "/orgs/{:s}/repos".format(org),
+            {"type": "all", "sort": "full_name", "direction": "asc"},
+        )
+
+    def get_user(self):
+        """Return AuthenticatedUser.
+
+        :raises RestException: if request fails, e.g. token is invalid.
+        """
+        data, _ = self.get_json(self.get_url("/user"))
+        return AuthenticatedUser(self, data)
+
+    def get_repo_alerts(self, full_name):
+        """Return list of open alerts(lib.alert.Alert) of repository.
+
+        :raises RestException: if alerts can't be fetched.
+        """
+        return [
+            alert_from_json(data)
+            for data in self.iter_items(
+                "/repos/{:s}/dependabot/alerts".format(full_name),
+                {"state": "open"},
+            )
+        ]
+
+    def get_alerts_by_repo(self, path):
+        """Get open alerts from org/enterprise endpoint grouped by repository.
+
+        Return dict with repository full name as a key and list of its alerts
+        as a value or None when endpoint isn't accessible(403) or doesn't
+        exist(404).
+        """
+        alerts_by_repo = {}
+        try:
+            for data in self.iter_items(path, {"state": "open"}):
+                full_name = data["repository"]["full_name"]
+                alerts_by_repo.setdefault(full_name, [])
+                alerts_by_repo[full_name].append(alert_from_json(data))
+        except RestException as exception:
+            if exception.status in (403, 404):
+                return None
+
+            raise
+
+        return alerts_by_repo
+
+
+def get_next_url(headers):
+    """Return URL of the next page from `Link` header or None."""
+    for link in headers.get("link", "").split(","):
+        parts = link.split(";")
+        if len(parts) < 2:
+            continue
+
+        rels = [part.strip().replace('"', "") for part in parts[1:]]
+        if "rel=next" in rels:
+            return parts[0].strip().lstrip("<").rstrip(">")
+
+    return None
+
+
+def alert_from_json(data):
+    """Convert JSON(dict) of dependabot alert into lib.alert.Alert."""
+    advisory = data.get("security_advisory") or {}
+    dependency = data.get("dependency") or {}
+    package = dependency.get("package") or {}
+    created_at = data.get("created_at")
+    return Alert(
+        number=data["number"],
+        severity=advisory.get("severity"),
+        summary=advisory.get("summary"),
+        html_url=data.get("html_url"),
+        package=package.get("name"),
+        ecosystem=package.get("ecosystem"),
+        manifest_path=dependency.get("manifest_path"),
+        created_at=(
+            datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+            if created_at
+            else None
+        ),
+        cwes=[cwe.get("cwe_id") for cwe in advisory.get("cwes") or []],
+    )
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Snapshot of fetched report data.
+
+Snapshot is a gzip-compressed JSON Lines file:
+
+* the first line is a header with format name, version and report time
+* `{"type": "namespace", ...}` line with namespace and its owner
+* `{"type": "repo", ...}` line for each repository of preceding namespace
+
+Snapshot is written and read line by line, therefore neither writing nor
+reading requires the whole report data to be held in memory. Alerts are
+stored as lists of values in order given by `alert_fields` in the header.
+CWE catalog tags aren't stored, they're computed again when snapshot is
+loaded.
+"""
+import gzip
+import json
+import os
+import zlib
+from datetime import datetime
+
+from lib.alert import Alert
+
+FORMAT = "dependabot-report-snapshot"
+VERSION = 1
+ALERT_FIELDS = [
+    "number",
+    "severity",
+    "summary",
+    "html_url",
+    "package",
+    "ecosystem",
+    "manifest_path",
+    "created_at",
+    "cwes",
+]
+
+
+class SnapshotException(Exception):
+    """Custom exception in order to signal problem with snapshot."""
+
+    def __init__(self, *args, **kwargs):
+        """Init."""
+        super().__init__(*args)
+        self.message = kwargs.get("message")
+
+
+class SnapshotWriter:
+    """Write report data into snapshot file.
+
+    Data are written into temporary file which replaces snapshot file only
+    when writer is closed without an error.
+    """
+
+    def __init__(self, fname, report_mtime):
+        """Init."""
+        self.fname = fname
+        self.tmp_fname = "{:s}.tmp".format(fname)
+        self.fhandle = gzip.open(self.tmp_fname, "wt", encoding="utf-8")
+        self._write_line(
+            {
+                "format": FORMAT,
+                "version": VERSION,
+                "report_mtime": report_mtime,
+                "alert_fields": ALERT_FIELDS,
+            }
+        )
+
+    def __enter__(self):
+        """Return self."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close writer, snapshot is discarded on exception."""
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _write_line(self, data):
+        """Write data as one line of JSON."""
+        self.fhandle.write(json.dumps(data, separators=(",", ":")))
+        self.fhandle.write("\n")
+
+    def write_namespace(self, namespace, namespace_data):
+        """Write namespace and its repos."""
+        owner = namespace_data["owner"]
+        self._write_line(
+            {
+                "type": "namespace",
+                "namespace": namespace,
+                "owner": {
+                    "login": get_value(owner, "login"),
+                    "type": get_value(owner, "type"),
+                    "avatar_url": get_value(owner, "avatar_url"),
+                    "html_url": get_value(owner, "html_url"),
+                },
+            }
+        )
+        for full_name, repo_detail in namespace_data["repos"].items():
+            self._write_line(repo_to_line(full_name, repo_detail))
+
+    def tee(self, namespaces):
+        """Write namespaces as they pass through and yield them."""
+        for namespace, namespace_data in namespaces:
+            self.write_namespace(namespace, namespace_data)
+            yield namespace, namespace_data
+
+    def close(self):
+        """Finish snapshot and move it in place."""
+        self.fhandle.close()
+        os.replace(self.tmp_fname, self.fname)
+
+    def abort(self):
+        """Discard snapshot."""
+        self.fhandle.close()
+        os.unlink(self.tmp_fname)
+
+
+class SnapshotReader:
+    """Read report data from snapshot file namespace by namespace."""
+
+    def __init__(self, fname):
+        """Init.
+
+        :raises SnapshotException: if snapshot can't be read or its format
+            isn't supported.
+        """
+        self.fname = fname
+        self._line_no = 0
+        self._pending = None
+        try:
+            self.fhandle = gzip.open(fname, "rt", encoding="utf-8")
+        except OSError as exc:
+            message = "Error reading snapshot '{:s}': {}".format(
+                fname, exc.strerror
+            )
+            raise SnapshotException(message=message) from exc
+
+        header = self._read_line()
+        if (
+            not header
+            or header.get("format") != FORMAT
+            or header.get("version") != VERSION
+        ):
+            self.close()
+            raise SnapshotException(
+                message="Snapshot '{:s}' isn't supported, expected {:s} "
+                "version {:d}".format(fname, FORMAT, VERSION)
+            )
+
+        self.report_mtime = header.get("report_mtime")
+        self._alert_fields = header["alert_fields"]
+        self._pending = self._read_line()
+
+    def __enter__(self):
+        """Return self."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close reader."""
+        self.close()
+
+    def _read_line(self):
+        """Return next line as parsed JSON or None at the end of file.
+
+        :raises SnapshotException: if line isn't valid.
+        """
+        try:
+            line = self.fhandle.readline()
+            self._line_no += 1
+            if not line:
+                return None
+
+            return json.loads(line)
+        except (OSError, EOFError, zlib.error, ValueError) as exc:
+            raise SnapshotException(
+                message="Invalid snapshot '{:s}' at line {:d}: {}".format(
+                    self.fname, self._line_no, exc
+                )
+            ) from exc
+
+    def iter_namespaces(self):
+        """Yield tuples (namespace, namespace data).
+
+        Repos of namespace are read as they're iterated over, therefore
+        namespace data must be consumed before the next namespace.
+
+        :raises SnapshotException: if snapshot isn't valid.
+        """
+        while self._pending is not None:
+            line = self._pending
+            if line.get("type") != "namespace":
+                raise SnapshotException(
+                    message="Invalid snapshot '{:s}' at line {:d}: "
+                    "expected namespace".format(self.fname, self._line_no)
+                )
+
+            self._pending = self._read_line()
+            repos = RepoStream(self)
+            yield line["namespace"], {"owner": line["owner"], "repos": repos}
+            # NOTE: skip repos which haven't been consumed.
+            for _ in repos.items():
+                pass
+
+    def has_repo(self):
+        """Return True if the next line is a repo."""
+        return self._pending is not None and self._pending.get("type") == "repo"
+
+    def next_repo(self):
+        """Return tuple (full name, repo detail) of the next repo."""
+        line = self._pending
+        self._pending = self._read_line()
+        return line["full_name"], line_to_repo(self._alert_fields, line)
+
+    def close(self):
+        """Close snapshot file."""
+        self.fhandle.close()
+
+
+class RepoStream:
+    """Repos of one namespace which are read from snapshot as iterated."""
+
+    def __init__(self, reader):
+        """Init."""
+        self.reader = reader
+
+    def __bool__(self):
+        """Return True if there are any repos left."""
+        return self.reader.has_repo()
+
+    def items(self):
+        """Yield tuples (full name, repo detail)."""
+        while self.reader.has_repo():
+            yield self.reader.next_repo()
+
+
+def get_value(obj, name):
+    """Return attribute or item of obj."""
+    if isinstance(obj, dict):
+        return obj.get(name)
+
+    return getattr(obj, name)
+
+
+def alert_to_list(alert):
+    """Convert lib.alert.Alert into list of values."""
+    values = [getattr(alert, name) for name in ALERT_FIELDS]
+    created_at_idx = ALERT_FIELDS.index("created_at")
+    if values[created_at_idx] is not None:
+        values[created_at_idx] = values[created_at_idx].isoformat()
+
+    values[ALERT_FIELDS.index("cwes")] = list(alert.cwes)
+    return values
+
+
+def list_to_alert(alert_fields, values):
+    """Convert list of values into lib.alert.Alert."""
+    kwargs = dict(zip(alert_fields, values))
+    if kwargs.get("created_at") is not None:
+        kwargs["created_at"] = datetime.fromisoformat(kwargs["created_at"])
+
+    return Alert(**kwargs)
+
+
+def repo_to_line(full_name, repo_detail):
+    """Return repo line(dict) of repository."""
+    line = {
+        "type": "repo",
+        "full_name": full_name,
+        "alerts": [
+            alert_to_list(alert) for alert in repo_detail["alerts"].values()
+        ],
+        "alerts_error": repo_detail["alerts_error"],
+        "alerts_stats": repo_detail["alerts_stats"],
+        "fork": repo_detail["fork"],
+        "html_url": repo_detail["html_url"],
+        "html_filters": sorted(repo_detail["html_filters"]),
+    }
+    # NOTE: optional, so snapshots stay readable by older versions.
+    if repo_detail.get("skip_reason"):
+        line["skip_reason"] = repo_detail["skip_reason"]
+
+    return line
+
+
+def line_to_repo(alert_fields, line):
+    """Return repo detail out of repo line(dict).
+
+    :param alert_fields: names of alert fields in order of their values.
+    """
+    alerts = {}
+    for values in line["alerts"]:
+        alert = list_to_alert(alert_fields, values)
+        alerts[alert.number] = alert
+
+    repo_detail = {
+        "alerts": alerts,
+        "alerts_error": line["alerts_error"],
+        "alerts_stats": line["alerts_stats"],
+        "fork": line["fork"],
+        "html_url": line["html_url"],
+        "html_filters": set(line["html_filters"]),
+    }
+    if line.get("skip_reason"):
+        repo_detail["skip_reason"] = line["skip_reason"]
+
+    return repo_detail
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Local SQLite store of dependabot alerts for incremental sync.
+
+Alerts are keyed by repository full name and alert number. Each repository
+has a high-water mark - the newest `updated_at` of its alerts seen so far.
+Subsequent syncs ask GitHub for alerts sorted by `updated_at` in descending
+order and stop as soon as an alert older than high-water mark is reached.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from lib.alert import Alert
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    full_name TEXT PRIMARY KEY,
+    alerts_error INTEGER NOT NULL DEFAULT 0,
+    high_water_mark TEXT
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    repo_full_name TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    severity TEXT,
+    summary TEXT,
+    html_url TEXT,
+    package_name TEXT,
+    ecosystem TEXT,
+    manifest_path TEXT,
+    cwes TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (repo_full_name, number)
+);
+CREATE INDEX IF NOT EXISTS alerts_repo_state
+    ON alerts (repo_full_name, state, number);
+CREATE INDEX IF NOT EXISTS alerts_repo_updated
+    ON alerts (repo_full_name, updated_at);
+"""
+
+
+class AlertStore:
+    """SQLite backed store of dependabot alerts."""
+
+    def __init__(self, db_fname):
+        """Init."""
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_fname, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close DB connection."""
+        with self._lock:
+            self._conn.close()
+
+    def get_high_water_mark(self, full_name):
+        """Return high-water mark(datetime) of repository or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT high_water_mark FROM repos WHERE full_name = ?",
+                (full_name,),
+            ).fetchone()
+
+        if not row or not row[0]:
+            return None
+
+        return datetime.fromisoformat(row[0])
+
+    def sync_repo(self, repo):
+        """Fetch alerts updated since last sync of repo and merge them in.
+
+        Return number of merged alerts.
+
+        :raises github.GithubException: when fetching of alerts fails.
+        """
+        high_water_mark = self.get_high_water_mark(repo.full_name)
+        if high_water_mark is None:
+            # NOTE: alerts which are already closed are of no interest.
+            dependabot_alerts = repo.get_dependabot_alerts(
+                state="open", sort="updated", direction="desc"
+            )
+        else:
+            dependabot_alerts = repo.get_dependabot_alerts(
+                sort="updated", direction="desc"
+            )
+
+        rows = []
+        for alert in dependabot_alerts:
+            if high_water_mark and alert.updated_at < high_water_mark:
+                break
+
+            rows.append(alert_to_row(repo.full_name, alert))
+
+        new_high_water_mark = high_water_mark
+        if rows:
+            # Alerts are sorted by updated_at, the first one is the newest.
+            new_high_water_mark = datetime.fromisoformat(rows[0][-1])
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """INSERT OR REPLACE INTO alerts VALUES
+                (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows,
+            )
+            self._conn.execute(
+                """INSERT OR REPLACE INTO repos
+                (full_name, alerts_error, high_water_mark) VALUES (?, 0, ?)""",
+                (
+                    repo.full_name,
+                    (
+                        new_high_water_mark.isoformat()
+                        if new_high_water_mark
+                        else None
+                    ),
+                ),
+            )
+
+        return len(rows)
+
+    def set_alerts_error(self, full_name):
+        """Mark that alerts of repository couldn't be fetched."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO repos (full_name, alerts_error) VALUES (?, 1)
+                ON CONFLICT (full_name) DO UPDATE SET alerts_error = 1""",
+                (full_name,),
+            )
+
+    def has_alerts_error(self, full_name):
+        """Return True if alerts of repository couldn't be fetched."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT alerts_error FROM repos WHERE full_name = ?",
+                (full_name,),
+            ).fetchone()
+
+        return bool(row and row[0])
+
+    def get_open_alerts(self, full_name):
+        """Return list of open alerts of repository."""
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT * FROM alerts
+                WHERE repo_full_name = ? AND state = 'open'
+                ORDER BY created_at DESC, number DESC""",
+                (full_name,),
+            ).fetchall()
+
+        return [row_to_alert(row) for row in rows]
+
+
+def alert_to_row(full_name, alert):
+    """Convert PyGithub's DependabotAlert into DB row(tuple)."""
+    advisory = alert.security_advisory
+    dependency = alert.dependency
+    package = dependency.package if dependency else None
+    cwes = []
+    if advisory and advisory.cwes:
+        cwes = [str(cwe.cwe_id) for cwe in advisory.cwes]
+
+    return (
+        full_name,
+        alert.number,
+        alert.state,
+        str(advisory.severity) if advisory else None,
+        advisory.summary if advisory else None,
+        alert.html_url,
+        package.name if package else None,
+        package.ecosystem if package else None,
+        dependency.manifest_path if dependency else None,
+        json.dumps(cwes),
+        alert.created_at.isoformat(),
+        alert.updated_at.isoformat(),
+    )
+
+
+def row_to_alert(row):
+    """Convert DB row into lib.alert.Alert."""
+    return Alert(
+        number=row[1],
+        severity=row[3],
+        summary=row[4],
+        html_url=row[5],
+        package=row[6],
+        ecosystem=row[7],
+        manifest_path=row[8],
+        created_at=datetime.fromisoformat(row[10]),
+        cwes=json.loads(row[9]),
+    )
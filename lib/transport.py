@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Request path shared by lib.connection and lib.rest.
+
+Requests sent via PyGithub's connection classes and via lib.rest.RestClient
+go through send_request(), i.e. they're scheduled and retried by
+lib.ratelimit.RateLimiter, sent conditionally when lib.cache.HTTPCache holds
+their response and cache hits are counted by lib.metrics.Metrics. Sending
+itself is left to a callable of the caller.
+"""
+import logging
+import urllib.parse
+
+
+def send_request(
+    send,
+    host,
+    verb,
+    url,
+    data,
+    headers,
+    cache=None,
+    rate_limiter=None,
+    metrics=None,
+):
+    """Send request and return response.
+
+    Rate limited requests are retried if rate limiter is set.
+
+    :param send: callable send(verb, url, data, headers) which sends request
+        and returns response with `status`, `headers` and read().
+    :param host: host which response is cached under.
+    :param url: absolute URL or path with query of request.
+    """
+    if rate_limiter is None:
+        return get_response(
+            send, host, verb, url, data, headers, cache, None, metrics
+        )
+
+    attempt = 0
+    while True:
+        token = rate_limiter.acquire()
+        response = get_response(
+            send,
+            host,
+            verb,
+            url,
+            data,
+            headers,
+            cache,
+            rate_limiter,
+            metrics,
+            token,
+        )
+        delay = rate_limiter.update(
+            response.status, response.headers, response.read(), attempt
+        )
+        if delay is None or attempt >= rate_limiter.max_retries:
+            return response
+
+        attempt += 1
+        if metrics is not None:
+            metrics.incr("retries")
+
+
+def get_response(
+    send,
+    host,
+    verb,
+    url,
+    data,
+    headers,
+    cache=None,
+    rate_limiter=None,
+    metrics=None,
+    token=None,
+):
+    """Return response either from cache or from GitHub API.
+
+    See send_request() for parameters.
+
+    :param token: token which request is sent with instead of the one in
+        headers.
+    """
+    # NOTE: cache key is computed from the token of client rather than the
+    # one lib.ratelimit.TokenPool picks for each request, so cached responses
+    # are shared by all tokens of the pool.
+    cache_key = None
+    if cache is not None and verb == "GET":
+        split_url = urllib.parse.urlsplit(url)
+        cache_key = cache.get_key(
+            host, urllib.parse.urlunsplit(("", "", *split_url[2:])), headers
+        )
+
+    if token is not None:
+        headers = dict(headers)
+        headers["Authorization"] = "token {:s}".format(token)
+
+    if cache_key is None:
+        return send(verb, url, data, headers)
+
+    entry = cache.get(cache_key)
+    if entry is not None:
+        headers = dict(headers)
+        headers.update(cache.get_conditional_headers(entry))
+
+    response = send(verb, url, data, headers)
+    if entry is not None and response.status == 304:
+        logging.debug("Cache hit for '%s'.", url)
+        if metrics is not None:
+            metrics.incr("cache_hits")
+
+        if rate_limiter is not None:
+            rate_limiter.refund()
+
+        return cache.get_response(entry, response.headers)
+
+    if response.status == 200:
+        cache.put(cache_key, response.headers, response.read())
+
+    return response
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Receiver of GitHub webhook events.
+
+Events are received by a local HTTP server, their `X-Hub-Signature-256`
+signature is verified with the shared secret and payloads of
+`dependabot_alert` events are queued for the consumer. Events are applied
+to report data by the consumer, see serve_webhooks() in
+dependabot_report.py. Requests with missing or invalid signature are
+rejected.
+
+Recorded payloads can be replayed against the receiver:
+
+python3 -m lib.webhook --url http://127.0.0.1:8080/ \
+    --secret-provider env:WEBHOOK_SECRET payload1.json payload2.json
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import queue
+import sys
+import urllib.request
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+EVENT = "dependabot_alert"
+# NOTE: GitHub caps payloads at 25 MB.
+MAX_BODY_SIZE = 25 * 1024 * 1024
+
+
+def get_signature(secret, body):
+    """Return signature of body as sent in `X-Hub-Signature-256` header."""
+    digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256)
+    return "sha256={:s}".format(digest.hexdigest())
+
+
+def verify_signature(secret, body, signature):
+    """Return True if signature matches body signed by secret."""
+    if not signature:
+        return False
+
+    return hmac.compare_digest(get_signature(secret, body), signature)
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Handle webhook delivery."""
+
+    def do_POST(self):  # noqa: N802
+        """Verify delivery and queue payload of dependabot_alert event."""
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+
+        if length < 0 or length > MAX_BODY_SIZE:
+            self.send_status(400)
+            return
+
+        body = self.rfile.read(length)
+        signature = self.headers.get("X-Hub-Signature-256")
+        if not verify_signature(self.server.secret, body, signature):
+            logging.warning(
+                "Rejected webhook delivery '%s' with invalid signature.",
+                self.headers.get("X-GitHub-Delivery"),
+            )
+            self.send_status(401)
+            return
+
+        event = self.headers.get("X-GitHub-Event")
+        if event != EVENT:
+            # NOTE: e.g. ping event sent when webhook is created.
+            logging.debug("Ignored webhook event '%s'.", event)
+            self.send_status(204)
+            return
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self.send_status(400)
+            return
+
+        self.server.events.put(payload)
+        self.send_status(202)
+
+    def send_status(self, status):
+        """Send empty response of given status."""
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):  # noqa: A002
+        """Log requests at debug level."""
+        logging.debug("Webhook receiver: " + format, *args)
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """HTTP server receiving webhook events.
+
+    Payloads of verified dependabot_alert events are put into `events`
+    queue.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, secret):
+        """Init.
+
+        :param address: tuple (host, port) to listen on.
+        :param secret: webhook secret shared with GitHub.
+        """
+        super().__init__(address, WebhookHandler)
+        self.secret = secret
+        self.events = queue.Queue()
+
+
+def send_event(url, secret, body, event=EVENT):
+    """Send signed webhook delivery with given body(bytes) to url.
+
+    Return HTTP status of the response.
+    """
+    request = urllib.request.Request(
+        url,
+        data=body,
+        headers={
+            "Content-Type": "application/json",
+            "X-GitHub-Event": event,
+            "X-Hub-Signature-256": get_signature(secret, body),
+        },
+        method="POST",
+    )
+    with urllib.request.urlopen(request) as response:
+        return response.status
+
+
+def main():
+    """Replay recorded webhook payloads against receiver."""
+    # NOTE: imported here, dependabot_report imports this module.
+    import dependabot_report
+
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    try:
+        secret = dependabot_report.get_secret(
+            args.secret_provider, "Webhook Secret"
+        )
+    except dependabot_report.GitHubProviderException as exception:
+        logging.error("%s", exception.message)
+        sys.exit(1)
+
+    for fname in args.payload:
+        with open(fname, "rb") as fhandle:
+            body = fhandle.read()
+
+        status = send_event(args.url, secret, body, args.event)
+        logging.info("Sent '%s', response status %i.", fname, status)
+
+
+def parse_args() -> argparse.Namespace:
+    """Return parsed CLI args."""
+    parser = argparse.ArgumentParser(allow_abbrev=False)
+    parser.add_argument(
+        "--url",
+        required=True,
+        type=str,
+        help="URL of webhook receiver.",
+    )
+    parser.add_argument(
+        "--secret-provider",
+        required=True,
+        type=str,
+        help="Provider of webhook secret, e.g. 'env:WEBHOOK_SECRET'.",
+    )
+    parser.add_argument(
+        "--event",
+        default=EVENT,
+        type=str,
+        help="Event type of payloads. Default is %(default)s.",
+    )
+    parser.add_argument(
+        "payload",
+        nargs="+",
+        type=str,
+        help="File with recorded payload(body of webhook delivery).",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
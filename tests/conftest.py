@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Fixtures shared by unit tests."""
+import threading
+
+import pytest
+
+from benchmarks import fake_github
+
+
+@pytest.fixture
+def start_fake_server():
+    """Return function which starts fake GitHub API server.
+
+    Keyword arguments of the function other than `latency` and `rate_limit`
+    are passed to fake_github.Estate. Started servers are shut down at
+    teardown.
+    """
+    servers = []
+
+    def start(latency=0.0, rate_limit=0, **estate_kwargs):
+        server = fake_github.FakeGitHubServer(
+            fake_github.Estate(**estate_kwargs),
+            latency=latency,
+            rate_limit=rate_limit,
+        )
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
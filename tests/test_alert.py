@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/alert.py."""
+import jinja2
+
+from lib.alert import Alert
+
+
+def test_alert_compat_properties():
+    """Test that nested fields of PyGithub's alert can still be accessed."""
+    alert = Alert(
+        number=1,
+        severity="HIGH",
+        summary="XSS in lodash",
+        html_url="https://github.com/zstyblik/repo/security/dependabot/1",
+        package="lodash",
+        ecosystem="NPM",
+        manifest_path="package-lock.json",
+        created_at=None,
+        cwes=["CWE-79", "NVD-CWE-Other"],
+    )
+
+    assert alert.security_advisory.severity == "high"
+    assert alert.security_advisory.summary == "XSS in lodash"
+    assert [cwe.cwe_id for cwe in alert.security_advisory.cwes] == ["CWE-79"]
+    assert alert.dependency.package.name == "lodash"
+    assert alert.dependency.package.ecosystem == "npm"
+    assert alert.dependency.manifest_path == "package-lock.json"
+
+    template = jinja2.Environment(undefined=jinja2.StrictUndefined).from_string(
+        "{{ alert.security_advisory.severity }} "
+        "{{ alert.dependency.package.name }}"
+    )
+    assert template.render(alert=alert) == "high lodash"
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/atomic.py."""
+import os
+import stat
+
+import pytest
+
+from lib import atomic
+
+
+def test_open_atomic(tmp_path):
+    """Test that file is replaced only when it's complete."""
+    fname = str(tmp_path / "report.html")
+    atomic.write_atomic(fname, "old")
+
+    with atomic.open_atomic(fname) as fhandle:
+        fhandle.write("new")
+        # Readers still see the old file.
+        with open(fname, "r", encoding="utf-8") as rhandle:
+            assert rhandle.read() == "old"
+
+    with open(fname, "r", encoding="utf-8") as fhandle:
+        assert fhandle.read() == "new"
+
+    assert stat.S_IMODE(os.stat(fname).st_mode) == 0o644
+    assert os.listdir(str(tmp_path)) == ["report.html"]
+
+
+def test_open_atomic_exception(tmp_path):
+    """Test that old file is kept and temporary file removed on error."""
+    fname = str(tmp_path / "report.html")
+    atomic.write_atomic(fname, "old")
+
+    with pytest.raises(RuntimeError):
+        with atomic.open_atomic(fname) as fhandle:
+            fhandle.write("partial")
+            raise RuntimeError("render failed")
+
+    with open(fname, "r", encoding="utf-8") as fhandle:
+        assert fhandle.read() == "old"
+
+    assert os.listdir(str(tmp_path)) == ["report.html"]
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Unit tests for benchmarks/fake_github.py."""
+import time
+from unittest.mock import Mock
+
+import pytest
+
+import dependabot_report
+from benchmarks import fake_github
+from benchmarks import run_benchmark
+from lib.cache import MemoryCache
+from lib.metrics import Metrics
+from lib.ratelimit import RateLimiter
+
+
+@pytest.fixture
+def fake_server(start_fake_server):
+    """Return running fake GitHub API server with small estate."""
+    return start_fake_server(
+        repos=5,
+        min_alerts=0,
+        max_alerts=150,
+        forbidden_ratio=0.3,
+        repos_per_owner=3,
+        seed=1,
+    )
+
+
+def test_estate_is_deterministic():
+    """Test that the same parameters produce the same estate."""
+    estate1 = fake_github.Estate(repos=20, forbidden_ratio=0.5, seed=42)
+    estate2 = fake_github.Estate(repos=20, forbidden_ratio=0.5, seed=42)
+
+    assert estate1.repos == estate2.repos
+    assert estate1.get_totals() == estate2.get_totals()
+    assert estate1.get_totals()["repos"] == 20
+
+
+def test_get_dependabot_data(fake_server):
+    """Test fetch of data from fake GitHub API server."""
+    estate = fake_server.estate
+    totals = estate.get_totals()
+    metrics = Metrics()
+
+    context = dependabot_report.get_dependabot_data(
+        "token",
+        "owner",
+        None,
+        False,
+        workers=2,
+        base_url=fake_server.base_url,
+        metrics=metrics,
+    )
+
+    assert list(context["namespaces"].keys()) == [
+        "bench-user",
+        "bench-org-0001",
+    ]
+    alerts = 0
+    errors = 0
+    for namespace_data in context["namespaces"].values():
+        for full_name, repo_detail in namespace_data["repos"].items():
+            repo = estate.repos_by_name[full_name]
+            assert repo_detail["alerts_error"] is repo["forbidden"]
+            assert list(repo_detail["alerts"].keys()) == list(
+                range(repo["alerts"] if not repo["forbidden"] else 0, 0, -1)
+            )
+            alerts += len(repo_detail["alerts"])
+            errors += repo_detail["alerts_error"]
+
+    assert alerts == totals["alerts"]
+    assert errors == totals["forbidden"]
+    # user, list of repos and alert pages of each repo
+    expected_requests = 2 + sum(
+        1 if repo["forbidden"] else max(1, -(-repo["alerts"] // 100))
+        for repo in estate.repos
+    )
+    assert fake_server.get_stats()["requests"] == expected_requests
+    assert run_benchmark.get_request_count(fake_server.base_url) == (
+        expected_requests
+    )
+    data = metrics.as_dict()
+    assert data["counters"]["requests"] == expected_requests
+    assert data["counters"]["forbidden"] == totals["forbidden"]
+    assert sorted(data["phases_sec"].keys()) == [
+        "alerts",
+        "auth",
+        "repo_listing",
+    ]
+    assert sorted(data["repos_sec"].keys()) == sorted(estate.repos_by_name)
+
+
+def test_rate_limit_headers(start_fake_server):
+    """Test that healthy rate limit budget doesn't slow down fetch."""
+    server = start_fake_server(
+        rate_limit=5000, repos=5, max_alerts=150, repos_per_owner=1, seed=1
+    )
+    rate_limiter = RateLimiter(sleep=Mock())
+    cache = MemoryCache(1024 * 1024)
+    for _ in range(2):
+        dependabot_report.get_dependabot_data(
+            "token",
+            "owner",
+            None,
+            False,
+            workers=4,
+            cache=cache,
+            rate_limiter=rate_limiter,
+            backend="rest",
+            base_url=server.base_url,
+        )
+
+    requests = server.get_stats()["requests"]
+    assert rate_limiter.sleep.call_count == 0
+    assert rate_limiter.limit == 5000
+    # NOTE: the second run is answered by 304s, which are free.
+    assert rate_limiter.remaining == 5000 - requests // 2
+    assert server.rate_limit_used == requests // 2
+
+
+@pytest.mark.parametrize("backend", ["pygithub", "rest"])
+def test_workers_scaling(start_fake_server, backend):
+    """Test that workers speed up fetch of many small namespaces."""
+    server = start_fake_server(
+        latency=0.05,
+        rate_limit=5000,
+        repos=12,
+        max_alerts=5,
+        repos_per_owner=1,
+        seed=1,
+    )
+    wall_sec = {}
+    for workers in (1, 8):
+        timer_start = time.perf_counter()
+        dependabot_report.get_dependabot_data(
+            "token",
+            "owner",
+            None,
+            False,
+            workers=workers,
+            backend=backend,
+            base_url=server.base_url,
+        )
+        wall_sec[workers] = time.perf_counter() - timer_start
+
+    # NOTE: 12 requests for alerts take at least 0.6s with one worker.
+    assert wall_sec[8] < wall_sec[1] / 3
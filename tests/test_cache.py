@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/cache.py."""
+import os
+import random
+import string
+
+from lib.cache import HTTPCache
+from lib.cache import MemoryCache
+
+
+def test_http_cache_put_get(tmp_path):
+    """Test that response with validator is cached and can be read back."""
+    cache = HTTPCache(str(tmp_path), 1024 * 1024)
+    key = cache.get_key("api.example.com", "/user", {"Authorization": "x"})
+    cache.put(key, {"etag": '"abc"', "link": "<next>"}, '{"login": "a"}')
+
+    entry = cache.get(key)
+    assert entry["etag"] == '"abc"'
+    assert cache.get_conditional_headers(entry) == {"If-None-Match": '"abc"'}
+
+    response = cache.get_response(entry, {"X-RateLimit-Remaining": "10"})
+    assert response.status == 200
+    assert response.read() == '{"login": "a"}'
+    assert dict(response.getheaders()) == {
+        "etag": '"abc"',
+        "link": "<next>",
+        "x-ratelimit-remaining": "10",
+    }
+    # Cache is persistent.
+    assert HTTPCache(str(tmp_path), 1024 * 1024).get(key) == entry
+
+
+def test_http_cache_no_validator(tmp_path):
+    """Test that response without ETag/Last-Modified isn't cached."""
+    cache = HTTPCache(str(tmp_path), 1024 * 1024)
+    cache.put("key", {"content-type": "application/json"}, "{}")
+    assert cache.get("key") is None
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_http_cache_key_per_token():
+    """Test that cache key depends on Authorization header."""
+    key1 = HTTPCache.get_key("api.example.com", "/user", {"Authorization": "a"})
+    key2 = HTTPCache.get_key("api.example.com", "/user", {"Authorization": "b"})
+    assert key1 != key2
+
+
+def test_http_cache_lru_eviction(tmp_path):
+    """Test that least recently used entries are evicted first."""
+    body = "x" * 1000
+    cache = HTTPCache(str(tmp_path), 2500)
+    cache.put("key1", {"etag": "1"}, body)
+    cache.put("key2", {"etag": "2"}, body)
+    os.utime(os.path.join(str(tmp_path), "key1.json"), (1, 1))
+    os.utime(os.path.join(str(tmp_path), "key2.json"), (2, 2))
+    # Use key1, therefore key2 becomes least recently used one.
+    assert cache.get("key1") is not None
+    cache.put("key3", {"etag": "3"}, body)
+
+    assert cache.get("key2") is None
+    assert cache.get("key1") is not None
+    assert cache.get("key3") is not None
+
+
+def test_memory_cache_put_get():
+    """Test that response is kept in memory and can be read back."""
+    cache = MemoryCache(1024 * 1024)
+    cache.put("key", {"etag": '"abc"'}, '{"login": "a"}')
+    cache.put("nokey", {"content-type": "application/json"}, "{}")
+
+    entry = cache.get("key")
+    assert entry["etag"] == '"abc"'
+    assert cache.get_response(entry, {}).read() == '{"login": "a"}'
+    assert cache.get("nokey") is None
+
+
+def test_memory_cache_lru_eviction():
+    """Test that least recently used entries are evicted first."""
+    rng = random.Random(0)
+    # NOTE: random body, so it doesn't compress well.
+    body = "".join(rng.choice(string.ascii_letters) for _ in range(1000))
+    cache = MemoryCache(2000)
+    cache.put("key1", {"etag": "1"}, body)
+    cache.put("key2", {"etag": "2"}, body)
+    # Use key1, therefore key2 becomes least recently used one.
+    assert cache.get("key1") is not None
+    cache.put("key3", {"etag": "3"}, body)
+
+    assert cache.get("key2") is None
+    assert cache.get("key1")["body"] == body
+    assert cache.get("key3") is not None
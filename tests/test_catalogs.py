@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/catalogs.py."""
+import pytest
+
+from lib import catalogs
+
+
+def test_load_file(tmp_path):
+    """Test that catalog is loaded from file including its label."""
+    catalog_fname = tmp_path / "my_catalog.txt"
+    catalog_fname.write_text(
+        "# label: Mine\n# comment\n\nCWE-79\n89\ncwe-20\n", encoding="utf-8"
+    )
+    registry = catalogs.CatalogRegistry()
+
+    catalog = registry.load_file(str(catalog_fname))
+
+    assert catalog.name == "my_catalog"
+    assert catalog.label == "Mine"
+    assert catalog.mask == 1
+    assert catalog.cwe_ids == frozenset([20, 79, 89])
+
+
+def test_load_file_invalid_cwe_id(tmp_path):
+    """Test that CatalogException is raised on invalid CWE ID."""
+    catalog_fname = tmp_path / "my_catalog.txt"
+    catalog_fname.write_text("CWE-79\nfoo\n", encoding="utf-8")
+    registry = catalogs.CatalogRegistry()
+
+    with pytest.raises(catalogs.CatalogException) as excinfo:
+        registry.load_file(str(catalog_fname))
+
+    assert excinfo.value.message == "Invalid CWE ID 'foo' at {:s}:2".format(
+        str(catalog_fname)
+    )
+
+
+def test_load_file_missing(tmp_path):
+    """Test that CatalogException is raised when file doesn't exist."""
+    registry = catalogs.CatalogRegistry()
+
+    with pytest.raises(catalogs.CatalogException):
+        registry.load_file(str(tmp_path / "missing.txt"))
+
+
+def test_add_duplicate():
+    """Test that CatalogException is raised on duplicate catalog name."""
+    registry = catalogs.CatalogRegistry()
+    registry.add("foo", "Foo", [79])
+
+    with pytest.raises(catalogs.CatalogException):
+        registry.add("foo", "Foo", [89])
+
+
+def test_classify_and_get_labels():
+    """Test classification of CWE IDs into bitmask and its labels."""
+    registry = catalogs.CatalogRegistry()
+    registry.add("foo", "Foo", [79, 89])
+    registry.add("bar", "Bar", [89, 20])
+
+    assert registry.classify([]) == 0
+    assert registry.classify([1]) == 0
+    assert registry.classify([79]) == 1
+    assert registry.classify([20]) == 2
+    assert registry.classify([89]) == 3
+    assert registry.classify([79, 20]) == 3
+    assert registry.get_mask("bar") == 2
+    assert registry.get_mask("nonexistent") == 0
+    assert registry.get_labels(0) == ()
+    assert registry.get_labels(2) == ("Bar",)
+    assert registry.get_labels(3) == ("Foo", "Bar")
+    assert registry.get_names(0) == ()
+    assert registry.get_names(3) == ("foo", "bar")
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("CWE-79", 79),
+        ("cwe-79", 79),
+        (" 79 ", 79),
+        (79, 79),
+        ("NVD-CWE-Other", None),
+        ("NVD-CWE-noinfo", None),
+        ("", None),
+    ],
+)
+def test_parse_cwe_id(value, expected):
+    """Test that parse_cwe_id() returns result as expected."""
+    assert catalogs.parse_cwe_id(value) == expected
+
+
+def test_load_registry(tmp_path):
+    """Test that custom catalogs are loaded along with default ones."""
+    catalog_fname = tmp_path / "custom.txt"
+    catalog_fname.write_text("# label: Custom\nCWE-1\n", encoding="utf-8")
+
+    registry = catalogs.load_registry([str(catalog_fname)])
+
+    assert [catalog.name for catalog in registry.catalogs] == [
+        "cisa_kev_2023",
+        "owasp_2021",
+        "custom",
+    ]
+    assert registry.get_labels(registry.classify([1])) == ("Custom",)
+    assert registry.get_labels(registry.classify([79])) == ("CISA", "OWASP")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/checkpoint.py."""
+import json
+import os
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import Mock
+
+import pytest
+
+import dependabot_report
+from lib.alert import Alert
+from lib.checkpoint import Checkpoint
+
+
+def get_repos():
+    """Return dict of repo details by full name."""
+    repos = {}
+    for idx in range(2):
+        full_name = "zstyblik/repo{:d}".format(idx)
+        repo = Mock(
+            full_name=full_name,
+            fork=bool(idx),
+            html_url="https://github.com/{:s}".format(full_name),
+        )
+        repo_detail = dependabot_report.new_repo_detail(repo)
+        for number in range(idx * 2, 0, -1):
+            dependabot_report.add_repo_alert(
+                repo_detail,
+                Alert(
+                    number=number,
+                    severity="high",
+                    summary="summary {:d}".format(number),
+                    html_url="https://alert.example.com",
+                    package="jinja2",
+                    ecosystem="pip",
+                    manifest_path="requirements.txt",
+                    created_at=datetime(2024, 1, number, tzinfo=timezone.utc),
+                    cwes=["CWE-79"],
+                ),
+            )
+
+        dependabot_report.set_html_filters(repo_detail)
+        repos[full_name] = repo_detail
+
+    return repos
+
+
+def test_checkpoint_resume(tmp_path):
+    """Test that recorded repos are restored on resume."""
+    fname = str(tmp_path / "checkpoint.jsonl")
+    repos = get_repos()
+    checkpoint = Checkpoint(fname)
+    for full_name, repo_detail in repos.items():
+        checkpoint.add(full_name, repo_detail)
+
+    checkpoint.close()
+
+    checkpoint = Checkpoint(fname, resume=True)
+
+    for full_name, repo_detail in repos.items():
+        assert checkpoint.pop_repo(full_name) == repo_detail
+        assert checkpoint.pop_repo(full_name) is None
+
+    checkpoint.finish()
+    assert not os.path.exists(fname)
+
+
+def test_checkpoint_no_resume(tmp_path):
+    """Test that checkpoint starts empty without resume."""
+    fname = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(fname)
+    checkpoint.add("zstyblik/repo0", get_repos()["zstyblik/repo0"])
+    checkpoint.close()
+
+    checkpoint = Checkpoint(fname)
+    checkpoint.close()
+
+    assert Checkpoint(fname, resume=True).pop_repo("zstyblik/repo0") is None
+
+
+def test_checkpoint_truncated_line(tmp_path):
+    """Test that partially written line is dropped before appending."""
+    fname = str(tmp_path / "checkpoint.jsonl")
+    repos = get_repos()
+    checkpoint = Checkpoint(fname)
+    checkpoint.add("zstyblik/repo0", repos["zstyblik/repo0"])
+    checkpoint.close()
+    with open(fname, "a", encoding="utf-8") as fhandle:
+        fhandle.write('{"type": "repo", "full_name": "zstyb')
+
+    checkpoint = Checkpoint(fname, resume=True)
+    checkpoint.add("zstyblik/repo1", repos["zstyblik/repo1"])
+    checkpoint.close()
+
+    checkpoint = Checkpoint(fname, resume=True)
+    assert checkpoint.pop_repo("zstyblik/repo0") == repos["zstyblik/repo0"]
+    assert checkpoint.pop_repo("zstyblik/repo1") == repos["zstyblik/repo1"]
+    checkpoint.close()
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        "",
+        "garbage\n",
+        '{"format": "dependabot-report-snapshot", "version": 1}\n',
+        '{"format": "dependabot-report-checkpoint", "version": 2}\n',
+    ],
+)
+def test_checkpoint_invalid_header(tmp_path, header):
+    """Test that checkpoint with invalid header is started from scratch."""
+    fname = str(tmp_path / "checkpoint.jsonl")
+    with open(fname, "w", encoding="utf-8") as fhandle:
+        fhandle.write(header)
+
+    checkpoint = Checkpoint(fname, resume=True)
+    checkpoint.close()
+
+    with open(fname, "r", encoding="utf-8") as fhandle:
+        lines = fhandle.readlines()
+
+    assert len(lines) == 1
+    assert json.loads(lines[0])["format"] == "dependabot-report-checkpoint"
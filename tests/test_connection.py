@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/connection.py."""
+import threading
+from unittest.mock import Mock
+
+from lib import connection
+from lib.cache import HTTPCache
+from lib.metrics import Metrics
+from lib.ratelimit import RateLimiter
+from lib.ratelimit import TokenPool
+
+
+def test_https_connection_thread_local():
+    """Test that pending requests of threads don't overwrite each other."""
+    cnx = connection.HTTPSConnection("api.example.com")
+    cnx.session = Mock()
+    cnx.session.get.side_effect = lambda url, **kwargs: Mock(
+        status_code=200, headers={}, text=url
+    )
+    barrier = threading.Barrier(2)
+    results = {}
+
+    def worker(path):
+        cnx.request("GET", path, None, {})
+        barrier.wait()
+        results[path] = cnx.getresponse().read()
+
+    threads = [
+        threading.Thread(target=worker, args=(path,))
+        for path in ["/repos/a", "/repos/b"]
+    ]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert results == {
+        "/repos/a": "https://api.example.com:443/repos/a",
+        "/repos/b": "https://api.example.com:443/repos/b",
+    }
+
+
+def test_https_connection_conditional_request(tmp_path):
+    """Test that cached response is used when server responds with 304."""
+    cache = HTTPCache(str(tmp_path), 1024 * 1024)
+    _, cnx_class = connection.get_connection_classes(cache)
+    cnx = cnx_class("api.example.com")
+    cnx.session = Mock()
+    cnx.session.get.side_effect = [
+        Mock(status_code=200, headers={"etag": '"v1"'}, text="[1, 2]"),
+        Mock(status_code=304, headers={"x-ratelimit-remaining": "9"}, text=""),
+    ]
+
+    cnx.request("GET", "/user/repos", None, {"Authorization": "token x"})
+    response = cnx.getresponse()
+    assert response.status == 200
+    assert response.read() == "[1, 2]"
+
+    cnx.request("GET", "/user/repos", None, {"Authorization": "token x"})
+    response = cnx.getresponse()
+    assert response.status == 200
+    assert response.read() == "[1, 2]"
+    assert dict(response.getheaders())["x-ratelimit-remaining"] == "9"
+    _, kwargs = cnx.session.get.call_args
+    assert kwargs["headers"]["If-None-Match"] == '"v1"'
+
+
+def test_https_connection_rate_limit_retry():
+    """Test that rate limited request is retried."""
+    rate_limiter = RateLimiter(sleep=Mock())
+    _, cnx_class = connection.get_connection_classes(rate_limiter=rate_limiter)
+    cnx = cnx_class("api.example.com")
+    cnx.session = Mock()
+    cnx.session.get.side_effect = [
+        Mock(status_code=429, headers={"Retry-After": "1"}, text=""),
+        Mock(status_code=200, headers={}, text="[]"),
+    ]
+
+    cnx.request("GET", "/user/repos", None, {})
+    response = cnx.getresponse()
+
+    assert response.status == 200
+    assert cnx.session.get.call_count == 2
+    rate_limiter.sleep.assert_called_once()
+
+
+def test_https_connection_metrics():
+    """Test that responses and retries are recorded in metrics."""
+    metrics = Metrics()
+    rate_limiter = RateLimiter(sleep=Mock())
+    _, cnx_class = connection.get_connection_classes(
+        rate_limiter=rate_limiter, metrics=metrics
+    )
+    cnx = cnx_class("api.example.com")
+    cnx.session = Mock()
+    cnx.session.get.side_effect = [
+        Mock(
+            status_code=429,
+            headers={"Retry-After": "1", "X-RateLimit-Remaining": "10"},
+            text="",
+            content=b"",
+        ),
+        Mock(
+            status_code=200,
+            headers={"X-RateLimit-Remaining": "9"},
+            text="[]",
+            content=b"[]",
+        ),
+    ]
+
+    cnx.request("GET", "/user/repos", None, {})
+    cnx.getresponse()
+
+    data = metrics.as_dict()
+    assert data["counters"]["requests"] == 2
+    assert data["counters"]["retries"] == 1
+    assert data["counters"]["bytes_received"] == 2
+    assert data["responses"] == {"200": 1, "429": 1}
+    assert data["rate_limit"]["remaining"] == 9
+
+
+def test_https_connection_token_pool():
+    """Test that request is retried with another token of token pool."""
+    token_pool = TokenPool(["t1", "t2"], sleep=Mock())
+    _, cnx_class = connection.get_connection_classes(rate_limiter=token_pool)
+    cnx = cnx_class("api.example.com")
+    cnx.session = Mock()
+    cnx.session.get.side_effect = [
+        Mock(status_code=401, headers={}, text="", content=b""),
+        Mock(status_code=200, headers={}, text="[]", content=b"[]"),
+    ]
+
+    cnx.request("GET", "/user/repos", None, {"Authorization": "token t0"})
+    response = cnx.getresponse()
+
+    assert response.status == 200
+    assert [
+        kwargs["headers"]["Authorization"]
+        for _, kwargs in cnx.session.get.call_args_list
+    ] == ["token t1", "token t2"]
+
+
+def test_https_connection_token_pool_cache(tmp_path):
+    """Test that cached responses are shared by tokens of token pool."""
+    cache = HTTPCache(str(tmp_path), 1024 * 1024)
+    token_pool = TokenPool(["t1", "t2"], sleep=Mock())
+    _, cnx_class = connection.get_connection_classes(
+        cache=cache, rate_limiter=token_pool
+    )
+    cnx = cnx_class("api.example.com")
+    cnx.session = Mock()
+    cnx.session.get.side_effect = [
+        Mock(
+            status_code=200,
+            headers={
+                "etag": '"v1"',
+                "x-ratelimit-remaining": "4000",
+                "x-ratelimit-reset": "9999999999",
+            },
+            text="[1]",
+        ),
+        Mock(status_code=304, headers={}, text=""),
+    ]
+
+    for _ in range(2):
+        cnx.request("GET", "/user/repos", None, {"Authorization": "token t1"})
+        response = cnx.getresponse()
+        assert response.status == 200
+        assert response.read() == "[1]"
+
+    # NOTE: token whose budget is unknown is picked for the second request.
+    calls = cnx.session.get.call_args_list
+    assert [kwargs["headers"]["Authorization"] for _, kwargs in calls] == [
+        "token t1",
+        "token t2",
+    ]
+    assert calls[1][1]["headers"]["If-None-Match"] == '"v1"'
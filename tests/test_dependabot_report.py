@@ -1,6 +1,15 @@
 #!/usr/bin/env python3
 """Unit tests for dependabot_report.py."""
+import contextlib
+import io
+import json
 import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from datetime import timezone
 from unittest.mock import call
 from unittest.mock import MagicMock  # noqa: I100
 from unittest.mock import Mock
@@ -10,10 +19,32 @@ import pytest
 from github import GithubException
 
 import dependabot_report
+from lib.alert import Alert
+from lib.cache import MemoryCache
+from lib.checkpoint import Checkpoint
+from lib.errorcache import ErrorCache
+from lib.metrics import Metrics
+from lib.repofilter import RepoFilter
+from lib.store import AlertStore
 
 SCRIPT_PATH = os.path.dirname(os.path.realpath(__file__))
 
 
+def new_alert(number, severity, cwes):
+    """Return Alert with given CWEs."""
+    return Alert(
+        number=number,
+        severity=severity,
+        summary="summary",
+        html_url="https://alert.example.com",
+        package="jinja2",
+        ecosystem="pip",
+        manifest_path="requirements.txt",
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        cwes=cwes,
+    )
+
+
 @pytest.mark.parametrize(
     "count,expected_log_level",
     [
@@ -83,7 +114,7 @@ def test_get_github_token_exceptions(input_data, expected_exc_msg):
     assert excinfo.value.message == expected_exc_msg
 
 
-@patch("dependabot_report.github.Github")
+@patch("github.Github")
 def test_get_dependabot_data_no_filter(mock_github):
     """Test get_dependabot_data() when no filtering is set.
 
@@ -93,10 +124,12 @@ def test_get_dependabot_data_no_filter(mock_github):
     mock_alert1 = Mock()
     mock_alert1.number = 10
     mock_alert1.security_advisory.severity = "critical"
+    mock_alert1.security_advisory.cwes = []
 
     mock_alert2 = Mock()
     mock_alert2.number = 21
     mock_alert2.security_advisory.severity = "high"
+    mock_alert2.security_advisory.cwes = []
     # Mocked Owners
     mock_owner1 = Mock(login="zstyblik1")
     mock_owner2 = Mock(login="zstyblik2")
@@ -153,8 +186,12 @@ def test_get_dependabot_data_no_filter(mock_github):
                 "repos": {
                     "dependabot-report1": {
                         "alerts": {
-                            mock_alert1.number: mock_alert1,
-                            mock_alert2.number: mock_alert2,
+                            mock_alert1.number: Alert.from_dependabot_alert(
+                                mock_alert1
+                            ),
+                            mock_alert2.number: Alert.from_dependabot_alert(
+                                mock_alert2
+                            ),
                         },
                         "alerts_error": False,
                         "alerts_stats": {
@@ -219,7 +256,7 @@ def test_get_dependabot_data_no_filter(mock_github):
     assert expected_guser_calls == mock_guser.mock_calls
 
 
-@patch("dependabot_report.github.Github")
+@patch("github.Github")
 def test_get_dependabot_data_filter_owner(mock_github):
     """Test get_dependabot_data() with owner filter.
 
@@ -229,10 +266,12 @@ def test_get_dependabot_data_filter_owner(mock_github):
     mock_alert1 = Mock()
     mock_alert1.number = 10
     mock_alert1.security_advisory.severity = "high"
+    mock_alert1.security_advisory.cwes = []
 
     mock_alert2 = Mock()
     mock_alert2.number = 21
     mock_alert2.security_advisory.severity = "low"
+    mock_alert2.security_advisory.cwes = []
     # Mocked Owners
     mock_owner1 = Mock(login="zstyblik1")
     mock_owner2 = Mock(login="zstyblik2")
@@ -305,7 +344,7 @@ def test_get_dependabot_data_filter_owner(mock_github):
     assert expected_guser_calls == mock_guser.mock_calls
 
 
-@patch("dependabot_report.github.Github")
+@patch("github.Github")
 def test_get_dependabot_data_filter_forks(mock_github):
     """Test get_dependabot_data() with fork filter.
 
@@ -314,8 +353,10 @@ def test_get_dependabot_data_filter_forks(mock_github):
     # Mocked Alerts
     mock_alert1 = Mock(number=10)
     mock_alert1.security_advisory.severity = "medium"
+    mock_alert1.security_advisory.cwes = []
     mock_alert2 = Mock(number=21)
     mock_alert2.security_advisory.severity = "critical"
+    mock_alert2.security_advisory.cwes = []
     # Mocked Owners
     mock_owner1 = Mock(login="zstyblik1")
     mock_owner2 = Mock(login="zstyblik2")
@@ -364,7 +405,11 @@ def test_get_dependabot_data_filter_forks(mock_github):
                 "owner": mock_owner1,
                 "repos": {
                     "dependabot-report1": {
-                        "alerts": {mock_alert1.number: mock_alert1},
+                        "alerts": {
+                            mock_alert1.number: Alert.from_dependabot_alert(
+                                mock_alert1
+                            )
+                        },
                         "alerts_error": False,
                         "alerts_stats": {
                             "critical": 0,
@@ -397,23 +442,23 @@ def test_get_dependabot_data_filter_forks(mock_github):
         # No CWEs
         ([], False),
         # Not on the list
-        ([Mock(cwe_id="CWE-788")], False),
+        (["CWE-788"], False),
         # One matching
         (
             [
-                Mock(cwe_id="CWE-788"),
-                Mock(cwe_id="CWE-787"),
-                Mock(cwe_id="CWE-999"),
+                "CWE-788",
+                "CWE-787",
+                "CWE-999",
             ],
             True,
         ),
         # Two matching(not that it matters)
         (
             [
-                Mock(cwe_id="CWE-788"),
-                Mock(cwe_id="CWE-787"),
-                Mock(cwe_id="CWE-999"),
-                Mock(cwe_id="CWE-79"),
+                "CWE-788",
+                "CWE-787",
+                "CWE-999",
+                "CWE-79",
             ],
             True,
         ),
@@ -421,9 +466,8 @@ def test_get_dependabot_data_filter_forks(mock_github):
 )
 def test_has_cisa_cwe(cwes, expected):
     """Test that has_cisa_cwe() returns result as expected."""
-    mock_alert = Mock()
-    mock_alert.security_advisory.cwes = cwes
-    result = dependabot_report.has_cisa_cwe(mock_alert)
+    alert = new_alert(1, "high", cwes)
+    result = dependabot_report.has_cisa_cwe(alert)
     assert result == expected
 
 
@@ -433,23 +477,23 @@ def test_has_cisa_cwe(cwes, expected):
         # No CWEs
         ([], False),
         # Not on the list
-        ([Mock(cwe_id="CWE-788")], False),
+        (["CWE-788"], False),
         # Match one
         (
             [
-                Mock(cwe_id="CWE-788"),
-                Mock(cwe_id="CWE-787"),
-                Mock(cwe_id="CWE-100"),
+                "CWE-788",
+                "CWE-787",
+                "CWE-100",
             ],
             True,
         ),
         # Two matching(not that it matters)
         (
             [
-                Mock(cwe_id="CWE-788"),
-                Mock(cwe_id="CWE-787"),
-                Mock(cwe_id="CWE-100"),
-                Mock(cwe_id="CWE-79"),
+                "CWE-788",
+                "CWE-787",
+                "CWE-100",
+                "CWE-79",
             ],
             True,
         ),
@@ -457,7 +501,1024 @@ def test_has_cisa_cwe(cwes, expected):
 )
 def test_has_owasp_cwe(cwes, expected):
     """Test that has_owasp_cwe() returns result as expected."""
-    mock_alert = Mock()
-    mock_alert.security_advisory.cwes = cwes
-    result = dependabot_report.has_owasp_cwe(mock_alert)
+    alert = new_alert(1, "high", cwes)
+    result = dependabot_report.has_owasp_cwe(alert)
     assert result == expected
+
+
+@patch("github.Github")
+def test_get_dependabot_data_workers(mock_github):
+    """Test that get_dependabot_data() with workers keeps repos ordering."""
+    mock_owner = Mock(login="zstyblik")
+    mock_repos = []
+    for idx in range(20):
+        mock_alert = Mock(number=idx)
+        mock_alert.security_advisory.severity = "low"
+        mock_alert.security_advisory.cwes = []
+        mock_repo = MagicMock()
+        mock_repo.owner = mock_owner
+        mock_repo.full_name = "zstyblik/repo{:02d}".format(idx)
+        mock_repo.fork = False
+        mock_repo.html_url = "https://dbr{:d}.example.com".format(idx)
+        mock_repo.get_dependabot_alerts.return_value.__iter__.return_value = [
+            mock_alert
+        ] * (idx % 3)
+        mock_repos.append(mock_repo)
+
+    mock_repos_iter = MagicMock()
+    mock_repos_iter.__iter__.return_value = mock_repos
+    mock_guser = Mock()
+    mock_guser.get_repos.return_value = mock_repos_iter
+    mock_github.return_value.get_user.return_value = mock_guser
+
+    ctx = dependabot_report.get_dependabot_data(
+        "pytest-token", "owner", [], False, workers=8
+    )
+
+    repos = ctx["namespaces"]["zstyblik"]["repos"]
+    assert list(repos.keys()) == [repo.full_name for repo in mock_repos]
+    for idx, repo_detail in enumerate(repos.values()):
+        assert repo_detail["alerts_stats"]["low"] == idx % 3
+
+
+@patch("github.Github")
+def test_get_dependabot_data_workers_exception(mock_github):
+    """Test that non-403 exception from worker is re-raised."""
+    mock_repo = MagicMock()
+    mock_repo.owner = Mock(login="zstyblik")
+    mock_repo.full_name = "zstyblik/dependabot-report"
+    mock_repo.fork = False
+    mock_repo.get_dependabot_alerts.return_value.__iter__.side_effect = [
+        GithubException(status=500)
+    ]
+    mock_repos_iter = MagicMock()
+    mock_repos_iter.__iter__.return_value = [mock_repo]
+    mock_guser = Mock()
+    mock_guser.get_repos.return_value = mock_repos_iter
+    mock_github.return_value.get_user.return_value = mock_guser
+
+    with pytest.raises(GithubException):
+        dependabot_report.get_dependabot_data(
+            "pytest-token", "owner", [], False, workers=4
+        )
+
+
+@patch("github.PaginatedList.PaginatedList")
+@patch("github.Github")
+def test_get_dependabot_data_bulk_fetch(mock_github, mock_paginated_list):
+    """Test get_dependabot_data() with organization-wide fetch."""
+    mock_org_owner = Mock(login="org1", type="Organization")
+    mock_org_owner_denied = Mock(login="org2", type="Organization")
+    mock_user_owner = Mock(login="zstyblik", type="User")
+
+    def new_repo(owner, name):
+        mock_repo = MagicMock()
+        mock_repo.owner = owner
+        mock_repo.full_name = "{:s}/{:s}".format(owner.login, name)
+        mock_repo.fork = False
+        mock_repo.html_url = "https://{:s}.example.com".format(name)
+        mock_repo.get_dependabot_alerts.return_value.__iter__.return_value = []
+        return mock_repo
+
+    mock_repo1 = new_repo(mock_org_owner, "repo1")
+    mock_repo2 = new_repo(mock_org_owner, "repo2")
+    mock_repo3 = new_repo(mock_org_owner_denied, "repo3")
+    mock_repo4 = new_repo(mock_user_owner, "repo4")
+
+    mock_alert1 = Mock(number=1)
+    mock_alert1.repository.full_name = "org1/repo2"
+    mock_alert1.security_advisory.severity = "high"
+    mock_alert1.security_advisory.cwes = []
+    mock_alert2 = Mock(number=2)
+    mock_alert2.repository.full_name = "org1/unaffiliated"
+    mock_alert2.security_advisory.severity = "low"
+    mock_alert2.security_advisory.cwes = []
+
+    def paginated_list(_, __, url, ___):
+        mock_alerts = MagicMock()
+        if url == "/orgs/org1/dependabot/alerts":
+            mock_alerts.__iter__.return_value = [mock_alert1, mock_alert2]
+        else:
+            mock_alerts.__iter__.side_effect = [GithubException(status=403)]
+
+        return mock_alerts
+
+    mock_paginated_list.side_effect = paginated_list
+    mock_repos_iter = MagicMock()
+    mock_repos_iter.__iter__.return_value = [
+        mock_repo1,
+        mock_repo2,
+        mock_repo3,
+        mock_repo4,
+    ]
+    mock_guser = Mock()
+    mock_guser.get_repos.return_value = mock_repos_iter
+    mock_github.return_value.get_user.return_value = mock_guser
+
+    ctx = dependabot_report.get_dependabot_data(
+        "pytest-token", "owner", [], False, bulk_fetch=True
+    )
+
+    org1_repos = ctx["namespaces"]["org1"]["repos"]
+    assert list(org1_repos.keys()) == ["org1/repo1", "org1/repo2"]
+    assert org1_repos["org1/repo1"]["alerts"] == {}
+    assert org1_repos["org1/repo2"]["alerts"] == {
+        1: Alert.from_dependabot_alert(mock_alert1)
+    }
+    assert org1_repos["org1/repo2"]["alerts_stats"]["high"] == 1
+    assert list(ctx["namespaces"]["org2"]["repos"].keys()) == ["org2/repo3"]
+    assert list(ctx["namespaces"]["zstyblik"]["repos"].keys()) == [
+        "zstyblik/repo4"
+    ]
+    mock_repo1.get_dependabot_alerts.assert_not_called()
+    mock_repo2.get_dependabot_alerts.assert_not_called()
+    mock_repo3.get_dependabot_alerts.assert_called_once_with(state="open")
+    mock_repo4.get_dependabot_alerts.assert_called_once_with(state="open")
+
+
+@patch("github.Github")
+def test_get_dependabot_data_alert_store(mock_github, tmp_path):
+    """Test get_dependabot_data() which renders alerts from the store."""
+    mock_alert = Mock(number=7, state="open", html_url="https://a.example.com")
+    mock_alert.security_advisory.severity = "critical"
+    mock_alert.security_advisory.cwes = []
+    mock_alert.security_advisory.summary = "XSS"
+    mock_alert.security_advisory.cwes = []
+    mock_alert.dependency = None
+    mock_alert.created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    mock_alert.updated_at = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    mock_repo1 = MagicMock()
+    mock_repo1.owner = Mock(login="zstyblik")
+    mock_repo1.full_name = "zstyblik/repo1"
+    mock_repo1.fork = False
+    mock_repo1.get_dependabot_alerts.return_value = [mock_alert]
+    mock_repo2 = MagicMock()
+    mock_repo2.owner = mock_repo1.owner
+    mock_repo2.full_name = "zstyblik/repo2"
+    mock_repo2.fork = False
+    mock_repo2.get_dependabot_alerts.side_effect = [GithubException(status=403)]
+    mock_repos_iter = MagicMock()
+    mock_repos_iter.__iter__.return_value = [mock_repo1, mock_repo2]
+    mock_guser = Mock()
+    mock_guser.get_repos.return_value = mock_repos_iter
+    mock_github.return_value.get_user.return_value = mock_guser
+    store = AlertStore(str(tmp_path / "alerts.db"))
+
+    ctx = dependabot_report.get_dependabot_data(
+        "pytest-token", "owner", [], False, store=store
+    )
+
+    repos = ctx["namespaces"]["zstyblik"]["repos"]
+    assert list(repos["zstyblik/repo1"]["alerts"].keys()) == [7]
+    assert repos["zstyblik/repo1"]["alerts_stats"]["critical"] == 1
+    assert repos["zstyblik/repo2"]["alerts_error"] is True
+    assert repos["zstyblik/repo2"]["html_filters"] == {
+        "github-repo-empty",
+        "github-repo-error",
+    }
+
+
+def test_render_template_stream():
+    """Test that namespaces are rendered and flushed one by one."""
+    output = io.StringIO()
+    fetched_at = []
+
+    def iter_namespaces():
+        for login in ["zstyblik1", "zstyblik2"]:
+            # Remember how much output was written when namespace is fetched.
+            fetched_at.append(output.getvalue().count("github-avatar"))
+            yield login, {
+                "owner": Mock(login=login, avatar_url="https://a.example.com"),
+                "repos": {
+                    "{:s}/repo".format(login): {
+                        "alerts": {
+                            1: new_alert(1, "critical", ["CWE-79"]),
+                        },
+                        "alerts_error": False,
+                        "alerts_stats": {
+                            "critical": 1,
+                            "high": 0,
+                            "medium": 0,
+                            "low": 0,
+                        },
+                        "fork": False,
+                        "html_url": "https://repo.example.com",
+                        "html_filters": set(),
+                    }
+                },
+            }
+
+    mock_flush = Mock()
+    context = {
+        "namespaces": dependabot_report.NamespaceStream(
+            iter_namespaces(), mock_flush
+        ),
+        "report_mtime": dependabot_report.LazyValue(lambda: "2024-01-01"),
+        "timing_sec": dependabot_report.LazyValue(lambda: "1.23"),
+    }
+
+    dependabot_report.render_template(
+        context, dependabot_report.TEMPLATE_FNAME, output
+    )
+
+    result = output.getvalue()
+    # NOTE: one avatar is in CSS, namespace data is fetched only after
+    # previous namespace has been rendered.
+    assert fetched_at == [1, 2]
+    assert mock_flush.call_count == 2
+    assert "zstyblik1/repo" in result
+    assert "zstyblik2/repo" in result
+    assert "CISA" in result
+    assert "Report as of 2024-01-01. Operation took 1.23 seconds." in result
+
+
+def test_render_template_filters():
+    """Test that rows are marked for client-side filters."""
+    low_alert = new_alert(2, "low", [])
+    low_alert.ecosystem = "cobol"
+    context = {
+        "namespaces": {
+            "zstyblik": {
+                "owner": Mock(login="zstyblik", avatar_url="https://a.a"),
+                "repos": {
+                    "zstyblik/repo": {
+                        "alerts": {
+                            1: new_alert(1, "critical", ["CWE-79"]),
+                            2: low_alert,
+                        },
+                        "alerts_error": False,
+                        "alerts_stats": {
+                            "critical": 1,
+                            "high": 0,
+                            "medium": 0,
+                            "low": 1,
+                        },
+                        "fork": True,
+                        "html_url": "https://repo.example.com",
+                        "html_filters": {"github-repo-fork"},
+                    },
+                },
+            },
+        },
+        "report_mtime": "2024-01-01",
+        "timing_sec": "0",
+    }
+    output = io.StringIO()
+
+    dependabot_report.render_template(
+        context, dependabot_report.TEMPLATE_FNAME, output
+    )
+
+    result = output.getvalue()
+    assert "FIXME" not in result
+    assert '<tbody class="github-repo-fork">' in result
+    assert (
+        '<tr data-severity="critical" data-ecosystem="pip" '
+        'data-tags="cisa_kev_2023 owasp_2021">'
+    ) in result
+    assert (
+        '<tr data-severity="low" data-ecosystem="other" data-tags="">' in result
+    )
+    assert '.hide-severity-low tr[data-severity="low"],' in result
+    assert '.hide-ecosystem-pip tr[data-ecosystem="pip"],' in result
+    assert (
+        '.only-tag-owasp_2021 tr[data-tags]:not([data-tags~="owasp_2021"]),'
+    ) in result
+    assert 'value="hide-severity-critical"' in result
+    assert 'value="hide-ecosystem-npm"' in result
+    assert 'value="only-tag-cisa_kev_2023"> CISA' in result
+
+
+def test_render_template_bytecode_cache(tmp_path):
+    """Test that compiled template is persisted and invalidated on change."""
+    template_fname = tmp_path / "report.html"
+    template_fname.write_text("{{ report_mtime }}", encoding="utf-8")
+    cache_dir = tmp_path / "cache"
+
+    output = io.StringIO()
+    dependabot_report.render_template(
+        {"report_mtime": "1"}, str(template_fname), output, str(cache_dir)
+    )
+    assert output.getvalue() == "1"
+    cache_files = os.listdir(str(cache_dir))
+    assert len(cache_files) == 1
+
+    # New environment must load compiled template from bytecode cache.
+    dependabot_report.get_jinja_env.cache_clear()
+    with patch("jinja2.Environment.compile", autospec=True) as mock_compile:
+        output = io.StringIO()
+        dependabot_report.render_template(
+            {"report_mtime": "2"}, str(template_fname), output, str(cache_dir)
+        )
+        mock_compile.assert_not_called()
+
+    assert output.getvalue() == "2"
+
+    # Changed template must be recompiled.
+    dependabot_report.get_jinja_env.cache_clear()
+    template_fname.write_text("v2 {{ report_mtime }}", encoding="utf-8")
+    output = io.StringIO()
+    dependabot_report.render_template(
+        {"report_mtime": "3"}, str(template_fname), output, str(cache_dir)
+    )
+    assert output.getvalue() == "v2 3"
+    dependabot_report.get_jinja_env.cache_clear()
+
+
+def test_catalog_labels():
+    """Test that alert is tagged with labels of CWE catalogs at ingest."""
+    alert = new_alert(1, "high", ["CWE-79", "NVD-CWE-Other"])
+
+    assert alert.cwes == (79,)
+    assert dependabot_report.catalog_labels(alert.tags) == ("CISA", "OWASP")
+    assert dependabot_report.catalog_labels(new_alert(2, "low", []).tags) == ()
+
+
+@pytest.mark.parametrize(
+    "code,expected",
+    [
+        (
+            # NOTE: --help must not import any of heavy modules.
+            "sys.argv = ['dependabot_report.py', '--help']\n"
+            "try:\n"
+            "    dependabot_report.parse_args()\n"
+            "except SystemExit:\n"
+            "    pass\n",
+            "",
+        ),
+        (
+            "context = {\n"
+            "    'namespaces': {},\n"
+            "    'report_mtime': '2024-01-01',\n"
+            "    'timing_sec': '0',\n"
+            "}\n"
+            "dependabot_report.render_template(\n"
+            "    context, dependabot_report.TEMPLATE_FNAME, io.StringIO()\n"
+            ")\n",
+            "jinja2",
+        ),
+    ],
+)
+def test_lazy_imports(code, expected):
+    """Test that PyGithub and Jinja2 are imported only when needed."""
+    code = (
+        "import io\n"
+        "import sys\n"
+        "import dependabot_report\n"
+        "{:s}"
+        "print(','.join("
+        "module for module in ('github', 'jinja2') if module in sys.modules"
+        "), file=sys.stderr)\n"
+    ).format(code)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(SCRIPT_PATH),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stderr.strip() == expected
+
+
+@pytest.mark.parametrize(
+    "output_file,output_format,expected",
+    [
+        ("report.html", "html", "report.html"),
+        ("out/report.html", "json", "out/report.json"),
+        ("report.html", "csv", "report.csv"),
+        ("report", "sarif", "report.sarif"),
+    ],
+)
+def test_get_output_fname(output_file, output_format, expected):
+    """Test that get_output_fname() returns file name as expected."""
+    result = dependabot_report.get_output_fname(output_file, output_format)
+    assert result == expected
+
+
+def test_parse_args_output_fname_collision(monkeypatch, capsys):
+    """Test that formats written into the same file are rejected."""
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "dependabot_report.py",
+            "--from-snapshot",
+            "snapshot.jsonl.gz",
+            "--output-file",
+            "report.json",
+            "--output-format",
+            "html",
+            "--output-format",
+            "json",
+        ],
+    )
+
+    with pytest.raises(SystemExit):
+        dependabot_report.parse_args()
+
+    assert (
+        "--output-format html and json would both be written into "
+        "'report.json'"
+    ) in capsys.readouterr().err
+
+    sys.argv[4] = "report.html"
+    sys.argv.extend(["--output-format", "json"])
+    args = dependabot_report.parse_args()
+    assert args.output_format == ["html", "json"]
+
+
+def test_write_sharded_html(tmp_path):
+    """Test that sharded HTML report consists of pages and index."""
+    output_file = str(tmp_path / "report.html")
+    args = Mock(
+        output_file=output_file,
+        shard_by_namespace=True,
+        shard_rows=None,
+        template_fname=dependabot_report.TEMPLATE_FNAME,
+        template_cache_dir=None,
+    )
+    namespaces = []
+    for namespace in ["zstyblik", "zstyblik-org"]:
+        owner = Mock(login=namespace, avatar_url="https://avatar.example.com")
+        repo = Mock(
+            full_name="{:s}/repo".format(namespace),
+            fork=False,
+            html_url="https://github.com/{:s}/repo".format(namespace),
+        )
+        repo_detail = dependabot_report.new_repo_detail(repo)
+        dependabot_report.add_repo_alert(
+            repo_detail, new_alert(1, "critical", ["CWE-79"])
+        )
+        namespaces.append(
+            (
+                namespace,
+                {"owner": owner, "repos": {repo.full_name: repo_detail}},
+            )
+        )
+
+    dependabot_report.write_sharded_html(
+        args, namespaces, "2024-01-01", time.perf_counter()
+    )
+
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "report-0001.html",
+        "report-0002.html",
+        "report.html",
+    ]
+    with open(output_file, "r", encoding="utf-8") as fhandle:
+        index = fhandle.read()
+
+    assert '<a href="report-0001.html">zstyblik</a>' in index
+    assert '<a href="report-0002.html">zstyblik-org</a>' in index
+    assert '<span title="Critical severity" class="badge text-bg-danger">2' in (
+        index
+    )
+    with open(
+        str(tmp_path / "report-0002.html"), "r", encoding="utf-8"
+    ) as fhandle:
+        page = fhandle.read()
+
+    assert "zstyblik-org/repo" in page
+    assert "zstyblik/repo<" not in page
+    assert '<a href="report.html">Index</a>' in page
+    assert '<a href="report-0001.html">Previous page</a>' in page
+
+
+def test_watch(start_fake_server, tmp_path, monkeypatch):
+    """Test that state is kept between runs and report is replaced."""
+    server = start_fake_server(repos=4, max_alerts=150, seed=3)
+    output_file = str(tmp_path / "report.html")
+    monkeypatch.setenv("WATCH_TOKEN", "token")
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "dependabot_report.py",
+            "--github-token-provider",
+            "env:WATCH_TOKEN",
+            "--include-repo-owner",
+            "--output-file",
+            output_file,
+            "--output-format",
+            "html",
+            "--output-format",
+            "json",
+            "--backend",
+            "rest",
+            "--watch",
+            "1",
+        ],
+    )
+    args = dependabot_report.parse_args()
+    metrics = Metrics()
+    stop = threading.Event()
+    runs = []
+    with contextlib.ExitStack() as stack:
+        fetcher = dependabot_report.new_fetcher(args, ["token"], metrics, stack)
+        fetcher.base_url = server.base_url
+        iter_namespaces = fetcher.iter_namespaces
+
+        def iter_namespaces_wrapper():
+            runs.append(fetcher.ghub)
+            if len(runs) == 2:
+                stop.set()
+
+            return iter_namespaces()
+
+        fetcher.iter_namespaces = iter_namespaces_wrapper
+        dependabot_report.watch(args, fetcher, metrics, stop)
+
+    assert len(runs) == 2
+    # NOTE: client is created in the first run and reused in the second.
+    assert runs[0] is None
+    assert runs[1] is fetcher.ghub
+    assert isinstance(fetcher.cache, MemoryCache)
+    # All responses of the second run are served from cache.
+    counters = metrics.as_dict()["counters"]
+    assert counters["requests"] > 0
+    assert counters["cache_hits"] == counters["requests"]
+    assert sorted(os.listdir(str(tmp_path))) == ["report.html", "report.json"]
+    with open(output_file, "r", encoding="utf-8") as fhandle:
+        assert "bench-user/repo-000003" in fhandle.read()
+
+
+def load_payload(fname):
+    """Return recorded webhook payload from tests/files."""
+    with open(os.path.join(SCRIPT_PATH, "files", fname), "rb") as fhandle:
+        return fhandle.read()
+
+
+def new_webhook_namespaces():
+    """Return namespaces with one repo each for webhook tests."""
+    namespaces = []
+    for namespace in ["zstyblik", "zstyblik-org"]:
+        owner = Mock(login=namespace, avatar_url="https://avatar.example.com")
+        repo = Mock(
+            full_name="{:s}/repo".format(namespace),
+            fork=False,
+            html_url="https://github.com/{:s}/repo".format(namespace),
+        )
+        repo_detail = dependabot_report.new_repo_detail(repo)
+        dependabot_report.add_repo_alert(
+            repo_detail, new_alert(1, "critical", ["CWE-79"])
+        )
+        dependabot_report.set_html_filters(repo_detail)
+        namespaces.append(
+            (
+                namespace,
+                {"owner": owner, "repos": {repo.full_name: repo_detail}},
+            )
+        )
+
+    return namespaces
+
+
+def test_apply_alert_event():
+    """Test that alerts are added and removed by webhook events."""
+    context = dependabot_report.merge_namespaces(new_webhook_namespaces())
+    created = json.loads(load_payload("webhook_dependabot_alert_created.json"))
+    fixed = json.loads(load_payload("webhook_dependabot_alert_fixed.json"))
+
+    result = dependabot_report.apply_alert_event(context, created)
+
+    assert result == "zstyblik"
+    repo_detail = context["namespaces"]["zstyblik"]["repos"]["zstyblik/repo"]
+    assert list(repo_detail["alerts"]) == [2, 1]
+    assert repo_detail["alerts"][2].summary == "Command Injection in lodash"
+    assert repo_detail["alerts_stats"] == {
+        "critical": 1,
+        "high": 1,
+        "medium": 0,
+        "low": 0,
+    }
+
+    # Redelivery of the same event doesn't duplicate the alert.
+    dependabot_report.apply_alert_event(context, created)
+    repo_detail = context["namespaces"]["zstyblik"]["repos"]["zstyblik/repo"]
+    assert repo_detail["alerts_stats"]["high"] == 1
+
+    result = dependabot_report.apply_alert_event(context, fixed)
+
+    assert result == "zstyblik"
+    repo_detail = context["namespaces"]["zstyblik"]["repos"]["zstyblik/repo"]
+    assert list(repo_detail["alerts"]) == [1]
+    assert repo_detail["alerts_stats"]["high"] == 0
+    assert repo_detail["html_filters"] == set()
+
+    fixed["alert"]["number"] = 1
+    dependabot_report.apply_alert_event(context, fixed)
+    repo_detail = context["namespaces"]["zstyblik"]["repos"]["zstyblik/repo"]
+    assert repo_detail["alerts"] == {}
+    assert repo_detail["html_filters"] == {"github-repo-empty"}
+
+    # Repo which isn't in the report is ignored.
+    created["repository"]["full_name"] = "zstyblik/other"
+    assert dependabot_report.apply_alert_event(context, created) is None
+    assert dependabot_report.apply_alert_event(context, {}) is None
+
+
+def test_apply_alert_event_invalid_severity():
+    """Test that event of alert without known severity is ignored."""
+    context = dependabot_report.merge_namespaces(new_webhook_namespaces())
+    created = json.loads(load_payload("webhook_dependabot_alert_created.json"))
+    del created["alert"]["security_advisory"]["severity"]
+    repo_detail = context["namespaces"]["zstyblik"]["repos"]["zstyblik/repo"]
+
+    assert dependabot_report.apply_alert_event(context, created) is None
+    assert context["namespaces"]["zstyblik"]["repos"]["zstyblik/repo"] is (
+        repo_detail
+    )
+    assert list(repo_detail["alerts"]) == [1]
+
+    created["alert"]["security_advisory"] = None
+    assert dependabot_report.apply_alert_event(context, created) is None
+
+
+def test_apply_alert_event_skipped_repo():
+    """Test that events of repos whose alerts weren't fetched are ignored."""
+    repo = Mock(full_name="zstyblik/repo", fork=False, html_url="")
+    repo_details = [
+        dependabot_report.new_skipped_repo_detail(repo, "archived"),
+        dependabot_report.new_error_repo_detail(repo),
+    ]
+    created = json.loads(load_payload("webhook_dependabot_alert_created.json"))
+    for repo_detail in repo_details:
+        context = dependabot_report.merge_namespaces(
+            [
+                (
+                    "zstyblik",
+                    {"owner": Mock(), "repos": {repo.full_name: repo_detail}},
+                )
+            ]
+        )
+
+        assert dependabot_report.apply_alert_event(context, created) is None
+        assert context["namespaces"]["zstyblik"]["repos"][repo.full_name] is (
+            repo_detail
+        )
+        assert repo_detail["alerts"] == {}
+
+
+def test_serve_webhooks(tmp_path):
+    """Test that report is updated by replayed webhook events."""
+    from lib import webhook
+
+    output_file = str(tmp_path / "report.html")
+    args = Mock(
+        output_file=output_file,
+        output_format=["html"],
+        stream=False,
+        from_snapshot=None,
+        save_snapshot=None,
+        shard_by_namespace=True,
+        shard_rows=None,
+        template_fname=dependabot_report.TEMPLATE_FNAME,
+        template_cache_dir=None,
+        metrics_json=None,
+        metrics_prom=None,
+        watch=None,
+    )
+    fetcher = Mock()
+    fetcher.iter_namespaces.return_value = iter(new_webhook_namespaces())
+    server = webhook.WebhookServer(("127.0.0.1", 0), "secret")
+    url = "http://127.0.0.1:{:d}/".format(server.server_address[1])
+    page_fname = str(tmp_path / "report-0001.html")
+    other_page_fname = str(tmp_path / "report-0002.html")
+    stop = threading.Event()
+    results = {}
+
+    def wait_for(fname, text, present=True):
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            with contextlib.suppress(OSError):
+                with open(fname, "r", encoding="utf-8") as fhandle:
+                    if (text in fhandle.read()) is present:
+                        return True
+
+            time.sleep(0.05)
+
+        return False
+
+    def replay():
+        try:
+            results["initial"] = wait_for(output_file, "zstyblik-org")
+            results["other_mtime"] = os.stat(other_page_fname).st_mtime_ns
+            results["created_status"] = webhook.send_event(
+                url,
+                "secret",
+                load_payload("webhook_dependabot_alert_created.json"),
+            )
+            results["created_page"] = wait_for(
+                page_fname, "Command Injection in lodash"
+            )
+            results["created_index"] = wait_for(
+                output_file,
+                '<span title="High severity" class="badge text-bg-warning">1<',
+            )
+            results["fixed_status"] = webhook.send_event(
+                url,
+                "secret",
+                load_payload("webhook_dependabot_alert_fixed.json"),
+            )
+            results["fixed_page"] = wait_for(
+                page_fname, "Command Injection in lodash", False
+            )
+        finally:
+            stop.set()
+
+    # NOTE: SIGTERM handler can be set only in the main thread.
+    thread = threading.Thread(target=replay, daemon=True)
+    thread.start()
+    dependabot_report.serve_webhooks(args, fetcher, Metrics(), server, stop)
+    thread.join(5)
+    server.server_close()
+
+    assert results == {
+        "initial": True,
+        "other_mtime": results["other_mtime"],
+        "created_status": 202,
+        "created_page": True,
+        "created_index": True,
+        "fixed_status": 202,
+        "fixed_page": True,
+    }
+    fetcher.iter_namespaces.assert_called_once_with()
+    # Page of unaffected namespace isn't written again.
+    assert os.stat(other_page_fname).st_mtime_ns == results["other_mtime"]
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "report-0001.html",
+        "report-0002.html",
+        "report.html",
+    ]
+
+
+def test_render_template_fragment_cache(tmp_path):
+    """Test that only changed repos are rendered with fragment cache."""
+    from lib import fragments
+
+    def render(context):
+        output = io.StringIO()
+        dependabot_report.render_template(
+            context, dependabot_report.TEMPLATE_FNAME, output
+        )
+        return output.getvalue()
+
+    context = dependabot_report.merge_namespaces(new_webhook_namespaces())
+    context.update({"report_mtime": "2024-01-01", "timing_sec": "1.23"})
+    expected = render(context)
+    cache = fragments.FragmentCache(str(tmp_path), 1024 * 1024)
+    fragments.set_cache(cache)
+    try:
+        with patch.object(cache, "put", wraps=cache.put) as mock_put:
+            assert render(context) == expected
+            assert mock_put.call_count == 2
+
+            mock_put.reset_mock()
+            assert render(context) == expected
+            assert mock_put.call_count == 0
+
+            dependabot_report.apply_alert_event(
+                context,
+                json.loads(
+                    load_payload("webhook_dependabot_alert_created.json")
+                ),
+            )
+            result = render(context)
+    finally:
+        fragments.set_cache(None)
+
+    # Only the changed repo is rendered again.
+    assert mock_put.call_count == 1
+    assert "Command Injection in lodash" in result
+    assert len(os.listdir(str(tmp_path))) == 3
+
+
+def test_get_dependabot_data_github_orgs(start_fake_server):
+    """Test that repos of orgs are listed and archived ones are skipped."""
+    server = start_fake_server(
+        repos=6, max_alerts=5, repos_per_owner=3, archived_ratio=0.5, seed=1
+    )
+    estate = server.estate
+    context = dependabot_report.get_dependabot_data(
+        "token",
+        "",
+        None,
+        False,
+        base_url=server.base_url,
+        repo_filter=RepoFilter(skip_archived=True),
+        github_orgs=["bench-org-0001"],
+    )
+
+    org_repos = estate.owners["bench-org-0001"]
+    assert any(repo["archived"] for repo in org_repos)
+    repos = context["namespaces"]["bench-org-0001"]["repos"]
+    assert list(context["namespaces"]) == ["bench-org-0001"]
+    assert list(repos) == [repo["full_name"] for repo in org_repos]
+    for repo in org_repos:
+        repo_detail = repos[repo["full_name"]]
+        if repo["archived"]:
+            assert repo_detail["skip_reason"] == "archived"
+        else:
+            assert "skip_reason" not in repo_detail
+            assert len(repo_detail["alerts"]) == repo["alerts"]
+
+    output = io.StringIO()
+    context.update({"report_mtime": "2024-01-01", "timing_sec": "1.23"})
+    dependabot_report.render_template(
+        context, dependabot_report.TEMPLATE_FNAME, output
+    )
+    assert "Alerts weren't fetched, repository is archived." in (
+        output.getvalue()
+    )
+
+
+def test_get_dependabot_data_repo_filter(start_fake_server):
+    """Test that filtered repos cost no request and skipped are reported."""
+    server = start_fake_server(
+        repos=9, max_alerts=50, repos_per_owner=3, archived_ratio=0.4, seed=5
+    )
+    estate = server.estate
+    metrics = Metrics()
+    context = dependabot_report.get_dependabot_data(
+        "token",
+        "",
+        None,
+        False,
+        backend="rest",
+        base_url=server.base_url,
+        metrics=metrics,
+        repo_filter=RepoFilter(
+            exclude_repos=["*/repo-000005"], skip_archived=True
+        ),
+        github_orgs=["bench-org-0001", "bench-org-0002"],
+    )
+
+    org_repos = [
+        repo
+        for repo in estate.repos
+        if repo["owner"]["login"] != "bench-user"
+        and repo["full_name"] != "bench-org-0001/repo-000005"
+    ]
+    archived = [repo for repo in org_repos if repo["archived"]]
+    assert archived
+    # user, one page of repos of each org and alerts of active repos
+    assert metrics.as_dict()["counters"]["requests"] == (
+        3 + len(org_repos) - len(archived)
+    )
+    assert list(context["namespaces"]) == ["bench-org-0001", "bench-org-0002"]
+    repos = {}
+    for namespace_data in context["namespaces"].values():
+        repos.update(namespace_data["repos"])
+
+    assert list(repos) == [repo["full_name"] for repo in org_repos]
+    for repo in archived:
+        repo_detail = repos[repo["full_name"]]
+        assert repo_detail["skip_reason"] == "archived"
+        assert repo_detail["alerts"] == {}
+        assert repo_detail["html_filters"] == {"github-repo-skipped"}
+
+
+def test_get_dependabot_data_error_cache(start_fake_server, tmp_path):
+    """Test that remembered 403 repos cost no request in the next run."""
+    server = start_fake_server(
+        repos=8, max_alerts=20, forbidden_ratio=0.4, repos_per_owner=4, seed=4
+    )
+    estate = server.estate
+    fname = str(tmp_path / "errors.json")
+    forbidden = [repo for repo in estate.repos if repo["forbidden"]]
+    assert forbidden
+
+    def run(recheck=False):
+        metrics = Metrics()
+        context = dependabot_report.get_dependabot_data(
+            "token",
+            "owner",
+            None,
+            False,
+            backend="rest",
+            base_url=server.base_url,
+            metrics=metrics,
+            error_cache=ErrorCache(fname, 3600, recheck),
+        )
+        return context, metrics.as_dict()["counters"]["requests"]
+
+    context, requests = run()
+    cached_context, cached_requests = run()
+    _, recheck_requests = run(recheck=True)
+
+    assert cached_requests == requests - len(forbidden)
+    assert recheck_requests == requests
+    assert cached_context["namespaces"].keys() == context["namespaces"].keys()
+    for namespace, namespace_data in context["namespaces"].items():
+        cached_repos = cached_context["namespaces"][namespace]["repos"]
+        assert list(cached_repos) == list(namespace_data["repos"])
+        assert cached_repos == namespace_data["repos"]
+
+
+class InterruptedCheckpoint(Checkpoint):
+    """Checkpoint which interrupts fetch after given number of repos."""
+
+    def __init__(self, fname, limit):
+        """Init."""
+        super().__init__(fname)
+        self.limit = limit
+
+    def add(self, full_name, repo_detail):
+        """Record repo detail and interrupt fetch once limit is reached."""
+        super().add(full_name, repo_detail)
+        self.limit -= 1
+        if self.limit == 0:
+            raise KeyboardInterrupt
+
+
+def test_get_dependabot_data_resume(start_fake_server, tmp_path):
+    """Test that resumed fetch equals uninterrupted one."""
+    fake_server = start_fake_server(
+        repos=6,
+        min_alerts=0,
+        max_alerts=250,
+        forbidden_ratio=0.3,
+        repos_per_owner=3,
+        seed=2,
+    )
+    fname = str(tmp_path / "checkpoint.jsonl")
+    kwargs = {
+        "backend": "rest",
+        "base_url": fake_server.base_url,
+    }
+    metrics = Metrics()
+    expected_context = dependabot_report.get_dependabot_data(
+        "token", "owner", None, False, metrics=metrics, **kwargs
+    )
+    requests = metrics.as_dict()["counters"]["requests"]
+
+    with pytest.raises(KeyboardInterrupt):
+        dependabot_report.get_dependabot_data(
+            "token",
+            "owner",
+            None,
+            False,
+            checkpoint=InterruptedCheckpoint(fname, 4),
+            **kwargs,
+        )
+
+    metrics = Metrics()
+    context = dependabot_report.get_dependabot_data(
+        "token",
+        "owner",
+        None,
+        False,
+        metrics=metrics,
+        checkpoint=Checkpoint(fname, resume=True),
+        **kwargs,
+    )
+
+    restored_requests = sum(
+        1 if repo["forbidden"] else max(1, -(-repo["alerts"] // 100))
+        for repo in fake_server.estate.repos[:4]
+    )
+    assert (
+        metrics.as_dict()["counters"]["requests"]
+        == requests - restored_requests
+    )
+    assert not os.path.exists(fname)
+    assert list(context["namespaces"]) == list(expected_context["namespaces"])
+    for namespace, namespace_data in context["namespaces"].items():
+        expected_repos = expected_context["namespaces"][namespace]["repos"]
+        assert list(namespace_data["repos"]) == list(expected_repos)
+        assert namespace_data["repos"] == expected_repos
+
+
+def test_get_dependabot_data_workers_namespaces(start_fake_server):
+    """Test that workers aren't serialized by namespaces of one repo."""
+    server = start_fake_server(
+        latency=0.05, repos=24, max_alerts=5, repos_per_owner=1, seed=1
+    )
+
+    def run(workers):
+        timer_start = time.perf_counter()
+        context = dependabot_report.get_dependabot_data(
+            "token",
+            "owner",
+            None,
+            False,
+            workers=workers,
+            backend="rest",
+            base_url=server.base_url,
+        )
+        return context, time.perf_counter() - timer_start
+
+    context, serial_sec = run(1)
+    concurrent_context, concurrent_sec = run(8)
+
+    assert len(context["namespaces"]) == 24
+    assert list(concurrent_context["namespaces"]) == list(context["namespaces"])
+    for namespace, namespace_data in context["namespaces"].items():
+        assert (
+            concurrent_context["namespaces"][namespace]["repos"]
+            == namespace_data["repos"]
+        )
+
+    # NOTE: 24 requests for alerts take at least 1.2s serially.
+    assert concurrent_sec < serial_sec / 3
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/errorcache.py."""
+import json
+
+from lib.errorcache import ErrorCache
+
+
+class FakeClock:
+    """Clock which is moved forward by hand."""
+
+    def __init__(self):
+        """Init."""
+        self.now = 1000.0
+
+    def __call__(self):
+        """Return current time."""
+        return self.now
+
+
+def test_error_cache_ttl(tmp_path):
+    """Test that failure is remembered until TTL expires."""
+    clock = FakeClock()
+    cache = ErrorCache(str(tmp_path / "errors.json"), 60, clock=clock)
+
+    cache.update("zstyblik/repo1", True)
+    cache.update("zstyblik/repo2", False)
+
+    assert cache.has_error("zstyblik/repo1") is True
+    assert cache.has_error("zstyblik/repo2") is False
+    clock.now += 60
+    assert cache.has_error("zstyblik/repo1") is False
+
+
+def test_error_cache_update_clears_error(tmp_path):
+    """Test that successful check forgets remembered failure."""
+    cache = ErrorCache(str(tmp_path / "errors.json"), 60)
+    cache.update("zstyblik/repo", True)
+
+    cache.update("zstyblik/repo", False)
+
+    assert cache.has_error("zstyblik/repo") is False
+
+
+def test_error_cache_save(tmp_path):
+    """Test that cache is persisted without expired entries."""
+    fname = str(tmp_path / "errors.json")
+    clock = FakeClock()
+    cache = ErrorCache(fname, 60, clock=clock)
+    cache.update("zstyblik/old", True)
+    clock.now += 30
+    cache.update("zstyblik/new", True)
+    clock.now += 40
+
+    cache.save()
+
+    with open(fname, "r", encoding="utf-8") as fhandle:
+        assert json.load(fhandle) == {"zstyblik/new": 1030.0}
+
+    cache = ErrorCache(fname, 60, clock=clock)
+    assert cache.has_error("zstyblik/new") is True
+    assert cache.has_error("zstyblik/old") is False
+
+
+def test_error_cache_recheck(tmp_path):
+    """Test that recheck ignores remembered failures until saved."""
+    fname = str(tmp_path / "errors.json")
+    cache = ErrorCache(fname, 60)
+    cache.update("zstyblik/repo", True)
+    cache.save()
+
+    cache = ErrorCache(fname, 60, recheck=True)
+
+    assert cache.has_error("zstyblik/repo") is False
+    cache.update("zstyblik/repo", True)
+    cache.save()
+    assert cache.has_error("zstyblik/repo") is True
+
+
+def test_error_cache_invalid_file(tmp_path):
+    """Test that unreadable cache file is treated as empty."""
+    fname = str(tmp_path / "errors.json")
+    with open(fname, "w", encoding="utf-8") as fhandle:
+        fhandle.write("[not a dict")
+
+    cache = ErrorCache(fname, 60)
+
+    assert cache.has_error("zstyblik/repo") is False
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/formats.py."""
+import csv
+import io
+import json
+from datetime import datetime
+from datetime import timezone
+
+import pytest
+
+from lib import formats
+from lib.alert import Alert
+
+
+class LazyRepos:
+    """Repos which can be iterated over only once, like lib.snapshot's."""
+
+    def __init__(self, repos):
+        """Init."""
+        self.repos = iter(repos.items())
+
+    def items(self):
+        """Yield repos."""
+        yield from self.repos
+
+
+def new_namespaces():
+    """Return list of tuples (namespace, namespace data)."""
+    alert = Alert(
+        number=3,
+        severity="critical",
+        summary='Bad "thing", really',
+        html_url="https://github.com/org/repo1/security/dependabot/3",
+        package="jinja2",
+        ecosystem="pip",
+        manifest_path="requirements.txt",
+        created_at=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        cwes=["CWE-79"],
+    )
+    return [
+        (
+            "org",
+            {
+                "owner": {"login": "org", "html_url": "https://github.com/org"},
+                "repos": {
+                    "org/repo1": {
+                        "alerts": {3: alert},
+                        "alerts_error": False,
+                        "alerts_stats": {
+                            "critical": 1,
+                            "high": 0,
+                            "medium": 0,
+                            "low": 0,
+                        },
+                        "fork": False,
+                        "html_url": "https://github.com/org/repo1",
+                        "html_filters": set(),
+                    },
+                    "org/repo2": {
+                        "alerts": {},
+                        "alerts_error": True,
+                        "alerts_stats": {
+                            "critical": 0,
+                            "high": 0,
+                            "medium": 0,
+                            "low": 0,
+                        },
+                        "fork": False,
+                        "html_url": "https://github.com/org/repo2",
+                        "html_filters": {"github-repo-error"},
+                    },
+                },
+            },
+        ),
+        ("empty", {"owner": {"login": "empty"}, "repos": {}}),
+    ]
+
+
+def write(writer_class, namespaces):
+    """Write namespaces with writer of given class and return output."""
+    output = io.StringIO(newline="")
+    writer = writer_class(output)
+    writer.begin("2024-01-01")
+    for namespace, namespace_data in namespaces:
+        writer.write_namespace(namespace, namespace_data)
+
+    writer.end()
+    return output.getvalue()
+
+
+def test_json_writer():
+    """Test that JSON writer writes valid JSON document."""
+    data = json.loads(write(formats.JSONWriter, new_namespaces()))
+
+    assert data["report_mtime"] == "2024-01-01"
+    assert [item["namespace"] for item in data["namespaces"]] == [
+        "org",
+        "empty",
+    ]
+    repos = data["namespaces"][0]["repos"]
+    assert [repo["full_name"] for repo in repos] == ["org/repo1", "org/repo2"]
+    assert repos[0]["alerts"] == [
+        {
+            "number": 3,
+            "severity": "critical",
+            "summary": 'Bad "thing", really',
+            "html_url": "https://github.com/org/repo1/security/dependabot/3",
+            "package": "jinja2",
+            "ecosystem": "pip",
+            "manifest_path": "requirements.txt",
+            "created_at": "2024-01-02T00:00:00+00:00",
+            "cwes": ["CWE-79"],
+            "tags": ["CISA", "OWASP"],
+        }
+    ]
+    assert repos[1]["alerts_error"] is True
+    assert data["namespaces"][1]["repos"] == []
+
+
+def test_csv_writer():
+    """Test that CSV writer writes one row per alert."""
+    rows = list(csv.reader(io.StringIO(write(formats.CSVWriter, []))))
+    assert rows == [formats.CSVWriter.header]
+
+    output = write(formats.CSVWriter, new_namespaces())
+    rows = list(csv.reader(io.StringIO(output)))
+
+    assert rows == [
+        formats.CSVWriter.header,
+        [
+            "org",
+            "org/repo1",
+            "3",
+            "critical",
+            'Bad "thing", really',
+            "jinja2",
+            "pip",
+            "requirements.txt",
+            "2024-01-02T00:00:00+00:00",
+            "CWE-79",
+            "CISA;OWASP",
+            "https://github.com/org/repo1/security/dependabot/3",
+        ],
+    ]
+
+
+@pytest.mark.parametrize("with_alerts", [True, False])
+def test_sarif_writer(with_alerts):
+    """Test that SARIF writer writes valid SARIF log."""
+    namespaces = new_namespaces() if with_alerts else []
+
+    data = json.loads(write(formats.SARIFWriter, namespaces))
+
+    assert data["version"] == "2.1.0"
+    run = data["runs"][0]
+    rule_ids = [rule["id"] for rule in run["tool"]["driver"]["rules"]]
+    assert rule_ids == [
+        "dependabot/critical",
+        "dependabot/high",
+        "dependabot/medium",
+        "dependabot/low",
+    ]
+    if not with_alerts:
+        assert run["results"] == []
+        return
+
+    assert len(run["results"]) == 1
+    result = run["results"][0]
+    assert result["ruleId"] == "dependabot/critical"
+    assert result["level"] == "error"
+    assert result["message"]["text"] == 'Bad "thing", really'
+    assert result["properties"]["repository"] == "org/repo1"
+    location = result["locations"][0]["physicalLocation"]
+    assert location["artifactLocation"]["uri"] == (
+        "https://github.com/org/repo1/blob/HEAD/requirements.txt"
+    )
+
+
+def test_tee_lazy_repos():
+    """Test that lazily read repos are seen by writers and consumer."""
+    namespaces = [
+        (
+            namespace,
+            dict(namespace_data, repos=LazyRepos(namespace_data["repos"])),
+        )
+        for namespace, namespace_data in new_namespaces()
+    ]
+    output = io.StringIO(newline="")
+    writer = formats.CSVWriter(output)
+    writer.begin("2024-01-01")
+
+    result = [
+        list(namespace_data["repos"].items())
+        for _, namespace_data in formats.tee([writer], namespaces)
+    ]
+
+    assert [[full_name for full_name, _ in repos] for repos in result] == [
+        ["org/repo1", "org/repo2"],
+        [],
+    ]
+    assert len(list(csv.reader(io.StringIO(output.getvalue())))) == 2
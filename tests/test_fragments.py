@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/fragments.py."""
+import os
+from datetime import datetime
+from datetime import timezone
+
+from lib import fragments
+from lib.alert import Alert
+
+
+def new_repo_detail(summary="summary"):
+    """Return repo detail with one alert."""
+    alert = Alert(
+        number=1,
+        severity="high",
+        summary=summary,
+        html_url="https://alert.example.com",
+        package="jinja2",
+        ecosystem="pip",
+        manifest_path="requirements.txt",
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        cwes=["CWE-79"],
+    )
+    return {
+        "alerts": {1: alert},
+        "alerts_error": False,
+        "alerts_stats": {"critical": 0, "high": 1, "medium": 0, "low": 0},
+        "fork": False,
+        "html_url": "https://github.com/zstyblik/repo",
+        "html_filters": set(),
+    }
+
+
+def test_get_key():
+    """Test that key changes whenever rendered data changes."""
+    key = fragments.get_key("v1", ["pip"], "zstyblik/repo", new_repo_detail())
+
+    assert key == fragments.get_key(
+        "v1", ["pip"], "zstyblik/repo", new_repo_detail()
+    )
+    assert key != fragments.get_key(
+        "v2", ["pip"], "zstyblik/repo", new_repo_detail()
+    )
+    assert key != fragments.get_key(
+        "v1", ["pip", "npm"], "zstyblik/repo", new_repo_detail()
+    )
+    assert key != fragments.get_key(
+        "v1", ["pip"], "zstyblik/other", new_repo_detail()
+    )
+    assert key != fragments.get_key(
+        "v1", ["pip"], "zstyblik/repo", new_repo_detail("changed")
+    )
+    repo_detail = new_repo_detail()
+    repo_detail["html_filters"].add("github-repo-fork")
+    assert key != fragments.get_key("v1", ["pip"], "zstyblik/repo", repo_detail)
+
+
+def test_fragment_cache(tmp_path):
+    """Test that fragments are persisted and capped in size."""
+    cache = fragments.FragmentCache(str(tmp_path), 1000)
+    cache.put("a", "<tbody>a</tbody>")
+
+    assert cache.get("a") == "<tbody>a</tbody>"
+    assert cache.get("b") is None
+    assert os.listdir(str(tmp_path)) == ["a.html"]
+    assert fragments.FragmentCache(str(tmp_path), 1000).get("a") == (
+        "<tbody>a</tbody>"
+    )
+
+    cache.put("b", "x" * 999)
+
+    assert cache.get("a") is None
+    assert os.listdir(str(tmp_path)) == ["b.html"]
+
+
+def test_get_template_version(tmp_path):
+    """Test that template version is checksum of its source."""
+    fname = str(tmp_path / "template.html")
+    with open(fname, "w", encoding="utf-8") as fhandle:
+        fhandle.write("a")
+
+    version = fragments.get_template_version(fname)
+    with open(fname, "w", encoding="utf-8") as fhandle:
+        fhandle.write("b")
+
+    assert fragments.get_template_version(fname) != version
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/graphql.py."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import Mock
+
+from lib import graphql
+
+
+def new_node(number):
+    """Return GraphQL alert node."""
+    return {
+        "number": number,
+        "createdAt": "2024-01-0{:d}T10:00:00Z".format(number),
+        "vulnerableManifestPath": "requirements.txt",
+        "securityVulnerability": {
+            "package": {"name": "jinja2", "ecosystem": "PIP"}
+        },
+        "securityAdvisory": {
+            "severity": "MODERATE",
+            "summary": "XSS in jinja2",
+            "cwes": {"nodes": [{"cweId": "CWE-79"}]},
+        },
+    }
+
+
+def new_page(nodes, cursor=None):
+    """Return GraphQL vulnerabilityAlerts page."""
+    return {
+        "vulnerabilityAlerts": {
+            "pageInfo": {"hasNextPage": bool(cursor), "endCursor": cursor},
+            "nodes": nodes,
+        }
+    }
+
+
+def test_build_query():
+    """Test that repositories are aliased and passed as variables."""
+    query, variables = graphql.build_query(
+        [("zstyblik/repo1", None), ("org/repo2", "abc")]
+    )
+    assert "r0: repository(owner: $o0, name: $n0)" in query
+    assert "r1: repository(owner: $o1, name: $n1)" in query
+    assert variables == {
+        "o0": "zstyblik",
+        "n0": "repo1",
+        "c0": None,
+        "o1": "org",
+        "n1": "repo2",
+        "c1": "abc",
+    }
+
+
+def test_get_alerts():
+    """Test batching, pagination and errors in get_alerts()."""
+    mock_requester = Mock(graphql_url="https://api.example.com/graphql")
+    mock_requester.requestJsonAndCheck.side_effect = [
+        (
+            {},
+            {
+                "data": {
+                    "r0": new_page([new_node(1)], cursor="next"),
+                    "r1": None,
+                },
+                "errors": [{"path": ["r1"], "message": "disabled"}],
+            },
+        ),
+        ({}, {"data": {"r0": new_page([])}}),
+        ({}, {"data": {"r0": new_page([new_node(2)])}}),
+    ]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        result = graphql.get_alerts(
+            mock_requester,
+            ["zstyblik/repo1", "zstyblik/repo2", "zstyblik/repo3"],
+            executor,
+            batch_size=2,
+        )
+
+    assert result == {
+        "zstyblik/repo1": ([new_node(1), new_node(2)], False),
+        "zstyblik/repo2": ([], True),
+        "zstyblik/repo3": ([], False),
+    }
+    assert mock_requester.requestJsonAndCheck.call_count == 3
+    _, kwargs = mock_requester.requestJsonAndCheck.call_args
+    assert kwargs["input"]["variables"]["c0"] == "next"
+
+
+def test_node_to_alert():
+    """Test that GraphQL node is converted into alert-like object."""
+    alert = graphql.node_to_alert(
+        new_node(3), "https://github.com/zstyblik/repo"
+    )
+    assert alert.number == 3
+    assert alert.html_url == (
+        "https://github.com/zstyblik/repo/security/dependabot/3"
+    )
+    assert alert.severity == "medium"
+    assert alert.cwes == (79,)
+    assert alert.package == "jinja2"
+    assert alert.ecosystem == "pip"
+    assert alert.created_at == datetime(2024, 1, 3, 10, tzinfo=timezone.utc)
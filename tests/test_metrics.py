@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/metrics.py."""
+import json
+import os
+from unittest.mock import Mock
+
+from lib.metrics import Metrics
+
+
+class FakeClock:
+    """Clock which advances by one second on each call."""
+
+    def __init__(self):
+        """Init."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Return current time and advance it."""
+        self.now += 1
+        return self.now
+
+
+def test_metrics_phases():
+    """Test that time of phases is recorded and repeated phases summed up."""
+    metrics = Metrics(clock=FakeClock(), wall_clock=lambda: 1700000000)
+
+    with metrics.phase("auth"):
+        pass
+
+    assert list(metrics.iter_phase("repo_listing", ["a", "b"])) == ["a", "b"]
+    with metrics.phase("render"):
+        pass
+
+    with metrics.phase("render"):
+        pass
+
+    # NOTE: three calls of next() including StopIteration
+    assert metrics.phases == {"auth": 1, "repo_listing": 3, "render": 2}
+
+
+def test_metrics_repo_timer():
+    """Test that latency of repos is recorded even on exception."""
+    metrics = Metrics(clock=FakeClock())
+    func = Mock(side_effect=["detail", RuntimeError("boom")])
+    wrapper = metrics.repo_timer(func)
+
+    assert wrapper(Mock(full_name="a/repo1")) == "detail"
+    try:
+        wrapper(Mock(full_name="a/repo2"))
+    except RuntimeError:
+        pass
+
+    assert metrics.repos == {"a/repo1": 1, "a/repo2": 1}
+
+
+def test_metrics_record_response():
+    """Test that API responses are counted."""
+    metrics = Metrics()
+
+    metrics.record_response(200, {"X-RateLimit-Remaining": "4999"}, 100)
+    metrics.record_response(
+        403, {"x-ratelimit-remaining": "4998", "x-ratelimit-limit": "5000"}, 10
+    )
+    metrics.incr("retries")
+
+    data = metrics.as_dict()
+    assert data["counters"] == {
+        "requests": 2,
+        "retries": 1,
+        "forbidden": 1,
+        "bytes_received": 110,
+        "cache_hits": 0,
+    }
+    assert data["responses"] == {"200": 1, "403": 1}
+    assert data["rate_limit"] == {"remaining": 4998, "limit": 5000}
+
+
+def test_metrics_write(tmp_path):
+    """Test that metrics are written as JSON and Prometheus textfile."""
+    metrics = Metrics(clock=FakeClock(), wall_clock=lambda: 1700000000)
+    metrics.add_phase("render", 1.5)
+    metrics.repos['a/"repo"'] = 2.5
+    metrics.record_response(200, {}, 100)
+    json_fname = str(tmp_path / "metrics.json")
+    prom_fname = str(tmp_path / "metrics.prom")
+
+    metrics.write_json(json_fname)
+    metrics.write_prometheus(prom_fname)
+
+    with open(json_fname, "r", encoding="utf-8") as fhandle:
+        data = json.load(fhandle)
+
+    assert data["phases_sec"] == {"render": 1.5}
+    assert data["repos_sec"] == {'a/"repo"': 2.5}
+    assert data["counters"]["requests"] == 1
+
+    with open(prom_fname, "r", encoding="utf-8") as fhandle:
+        lines = fhandle.read().splitlines()
+
+    assert "dependabot_report_last_run_timestamp_seconds 1700000000" in lines
+    assert "# TYPE dependabot_report_phase_seconds gauge" in lines
+    assert 'dependabot_report_phase_seconds{phase="render"} 1.5' in lines
+    assert "dependabot_report_api_requests 1" in lines
+    assert 'dependabot_report_api_responses{status="200"} 1' in lines
+    assert (
+        'dependabot_report_repo_fetch_seconds{repo="a/\\"repo\\""} 2.5' in lines
+    )
+    # NOTE: rate limit is unknown, therefore it's not written at all.
+    assert not [line for line in lines if "rate_limit" in line]
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "metrics.json",
+        "metrics.prom",
+    ]
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/pages.py."""
+import pytest
+
+from lib import pages
+
+
+def new_repo_detail(alerts, severity="high", alerts_error=False):
+    """Return repo detail with given number of alerts."""
+    alerts_stats = {"critical": 0, "high": 0, "medium": 0, "low": 0}
+    alerts_stats[severity] = alerts
+    return {
+        "alerts": {number: None for number in range(alerts)},
+        "alerts_error": alerts_error,
+        "alerts_stats": alerts_stats,
+    }
+
+
+def new_namespaces():
+    """Return list of tuples (namespace, namespace data)."""
+    return [
+        (
+            "ns1",
+            {
+                "owner": "owner1",
+                "repos": {
+                    "ns1/a": new_repo_detail(2),
+                    "ns1/b": new_repo_detail(0),
+                    "ns1/c": new_repo_detail(5, "critical"),
+                },
+            },
+        ),
+        ("ns2", {"owner": "owner2", "repos": {}}),
+        (
+            "ns3",
+            {
+                "owner": "owner3",
+                "repos": {"ns3/a": new_repo_detail(0, alerts_error=True)},
+            },
+        ),
+    ]
+
+
+def summarize(page_iter):
+    """Return pages as lists of tuples (namespace, list of repos)."""
+    return [
+        [
+            (namespace, list(namespace_data["repos"].keys()))
+            for namespace, namespace_data in page
+        ]
+        for page in page_iter
+    ]
+
+
+@pytest.mark.parametrize(
+    "by_namespace,max_rows,expected",
+    [
+        (
+            True,
+            None,
+            [
+                [("ns1", ["ns1/a", "ns1/b", "ns1/c"])],
+                [("ns2", [])],
+                [("ns3", ["ns3/a"])],
+            ],
+        ),
+        (
+            False,
+            3,
+            [
+                [("ns1", ["ns1/a", "ns1/b"])],
+                # NOTE: repository is never split.
+                [("ns1", ["ns1/c"])],
+                [("ns2", []), ("ns3", ["ns3/a"])],
+            ],
+        ),
+        (
+            True,
+            3,
+            [
+                [("ns1", ["ns1/a", "ns1/b"])],
+                [("ns1", ["ns1/c"])],
+                [("ns2", [])],
+                [("ns3", ["ns3/a"])],
+            ],
+        ),
+        (
+            False,
+            100,
+            [
+                [
+                    ("ns1", ["ns1/a", "ns1/b", "ns1/c"]),
+                    ("ns2", []),
+                    ("ns3", ["ns3/a"]),
+                ],
+            ],
+        ),
+    ],
+)
+def test_iter_pages(by_namespace, max_rows, expected):
+    """Test that namespaces are split into pages as expected."""
+    result = summarize(
+        pages.iter_pages(new_namespaces(), by_namespace, max_rows)
+    )
+    assert result == expected
+
+
+def test_iter_pages_empty():
+    """Test that no page is yielded when there are no namespaces."""
+    assert not list(pages.iter_pages([], True, 10))
+
+
+def test_index():
+    """Test that index sums up totals of namespaces across pages."""
+    index = pages.Index()
+    for page_num, page in enumerate(
+        pages.iter_pages(new_namespaces(), False, 3), start=1
+    ):
+        index.add_page("page{:d}.html".format(page_num), page)
+
+    assert list(index.namespaces.keys()) == ["ns1", "ns2", "ns3"]
+    assert index.namespaces["ns1"]["owner"] == "owner1"
+    assert index.namespaces["ns1"]["pages"] == ["page1.html", "page2.html"]
+    assert index.namespaces["ns1"]["totals"] == {
+        "repos": 3,
+        "errors": 0,
+        "critical": 5,
+        "high": 2,
+        "medium": 0,
+        "low": 0,
+    }
+    assert index.namespaces["ns2"]["pages"] == ["page3.html"]
+    assert index.totals == {
+        "repos": 4,
+        "errors": 1,
+        "critical": 5,
+        "high": 2,
+        "medium": 0,
+        "low": 0,
+    }
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/ratelimit.py."""
+import pytest
+
+from lib.ratelimit import RateLimiter
+from lib.ratelimit import TokenPool
+
+
+class FakeClock:
+    """Fake clock which advances only by sleeping."""
+
+    def __init__(self):
+        """Init."""
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        """Return current time."""
+        return self.now
+
+    def sleep(self, seconds):
+        """Advance time."""
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def new_rate_limiter(**kwargs):
+    """Return RateLimiter with fake clock."""
+    clock = FakeClock()
+    rate_limiter = RateLimiter(clock=clock.time, sleep=clock.sleep, **kwargs)
+    return rate_limiter, clock
+
+
+def test_rate_limiter_unknown_budget():
+    """Test that requests aren't delayed when budget is unknown."""
+    rate_limiter, clock = new_rate_limiter()
+    rate_limiter.acquire()
+    rate_limiter.acquire()
+    assert clock.sleeps == []
+    assert rate_limiter.requests == 2
+
+
+def test_rate_limiter_full_budget():
+    """Test that requests aren't delayed while budget is healthy."""
+    rate_limiter, clock = new_rate_limiter()
+    headers = {
+        "X-RateLimit-Remaining": "4900",
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Reset": "4600",
+    }
+    rate_limiter.update(200, headers, "")
+    for _ in range(100):
+        rate_limiter.acquire()
+
+    assert clock.sleeps == []
+    assert rate_limiter.remaining == 4800
+
+
+def test_rate_limiter_paces_low_budget():
+    """Test that pacing starts once budget is low for the time left."""
+    rate_limiter, clock = new_rate_limiter()
+    headers = {"X-RateLimit-Limit": "5000", "X-RateLimit-Reset": "1360"}
+    # 10% of limit scaled by 360s of 3600s window is 50 requests
+    rate_limiter.update(200, {"X-RateLimit-Remaining": "51", **headers}, "")
+    rate_limiter.acquire()
+    rate_limiter.acquire()
+    assert clock.sleeps == []
+
+    rate_limiter.update(200, {"X-RateLimit-Remaining": "40", **headers}, "")
+    rate_limiter.acquire()
+    rate_limiter.acquire()
+    assert clock.sleeps == [pytest.approx(360 / 40)]
+
+
+def test_rate_limiter_refund():
+    """Test that refunded request costs neither quota nor pacing slot."""
+    rate_limiter, clock = new_rate_limiter()
+    headers = {
+        "X-RateLimit-Remaining": "10",
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Reset": "1100",
+    }
+    rate_limiter.update(200, headers, "")
+    rate_limiter.acquire()
+    rate_limiter.refund()
+    rate_limiter.acquire()
+
+    assert clock.sleeps == []
+    assert rate_limiter.remaining == 9
+
+
+def test_rate_limiter_spreads_requests():
+    """Test that low remaining budget is spread over remaining window."""
+    rate_limiter, clock = new_rate_limiter()
+    headers = {
+        "X-RateLimit-Remaining": "10",
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Reset": "1100",
+    }
+    assert rate_limiter.update(200, headers, "") is None
+    for _ in range(3):
+        rate_limiter.acquire()
+
+    # 100s window / 10 requests, then 100s window / 9 requests
+    assert clock.sleeps == [pytest.approx(100 / 10), pytest.approx(100 / 9)]
+
+
+def test_rate_limiter_reserve_exhausted():
+    """Test that requests wait for reset when budget is exhausted."""
+    rate_limiter, clock = new_rate_limiter(reserve=5)
+    headers = {"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "1060"}
+    rate_limiter.update(200, headers, "")
+    rate_limiter.acquire()
+    assert clock.now == 1061
+
+
+def test_rate_limiter_primary_rate_limit():
+    """Test that primary rate limit is retried after reset."""
+    rate_limiter, clock = new_rate_limiter()
+    headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1030"}
+    delay = rate_limiter.update(403, headers, '{"message": "API rate limit"}')
+    assert delay == 31
+
+
+def test_rate_limiter_secondary_rate_limit():
+    """Test that secondary rate limit is retried with backoff and jitter."""
+    rate_limiter, clock = new_rate_limiter(secondary_wait=60)
+    body = '{"message": "You have exceeded a secondary rate limit."}'
+    delay = rate_limiter.update(403, {}, body, attempt=1)
+    assert 120 <= delay <= 150
+
+    rate_limiter.acquire()
+    assert clock.now == pytest.approx(1000 + delay)
+
+
+def test_rate_limiter_retry_after():
+    """Test that Retry-After is respected on 429."""
+    rate_limiter, _ = new_rate_limiter()
+    delay = rate_limiter.update(429, {"Retry-After": "8"}, "")
+    assert 8 <= delay <= 10
+
+
+def test_rate_limiter_not_rate_limited():
+    """Test that 403 which isn't rate limit isn't retried."""
+    rate_limiter, _ = new_rate_limiter()
+    headers = {"X-RateLimit-Remaining": "4000", "X-RateLimit-Reset": "1030"}
+    body = '{"message": "Dependabot alerts are disabled for this repository."}'
+    assert rate_limiter.update(403, headers, body) is None
+
+
+def new_token_pool(tokens, **kwargs):
+    """Return TokenPool with fake clock."""
+    clock = FakeClock()
+    token_pool = TokenPool(
+        tokens, clock=clock.time, sleep=clock.sleep, **kwargs
+    )
+    return token_pool, clock
+
+
+def test_token_pool_spreads_by_budget():
+    """Test that requests are spread according to budget of tokens."""
+    token_pool, clock = new_token_pool(["t1", "t2"])
+    used = []
+    for remaining in (100, 300):
+        used.append(token_pool.acquire())
+        token_pool.update(
+            200,
+            {
+                "X-RateLimit-Remaining": remaining,
+                "X-RateLimit-Limit": "5000",
+                "X-RateLimit-Reset": "4600",
+            },
+            "",
+        )
+
+    # NOTE: tokens whose budget is unknown are tried first.
+    assert used == ["t1", "t2"]
+    used = [token_pool.acquire() for _ in range(12)]
+    # t2 has 3 times more budget than t1
+    assert used.count("t2") == 3 * used.count("t1")
+    # 3600s window / 400 requests
+    assert clock.now == pytest.approx(1000 + 12 * 3600 / 400, rel=0.1)
+
+
+def test_token_pool_exhausted_token():
+    """Test that exhausted token is skipped until its window resets."""
+    token_pool, clock = new_token_pool(["t1", "t2"])
+    assert token_pool.acquire() == "t1"
+    headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1030"}
+    # NOTE: t2 is available, therefore retry right away.
+    assert token_pool.update(403, headers, "API rate limit") == 0.0
+    assert token_pool.acquire() == "t2"
+    assert token_pool.update(403, headers, "API rate limit") == 31
+    # Both tokens are exhausted, wait for reset of the first one.
+    assert token_pool.acquire() == "t1"
+    assert clock.now == 1031
+    assert clock.sleeps == [31]
+
+
+def test_token_pool_revoked_token():
+    """Test that revoked token is dropped for good."""
+    token_pool, _ = new_token_pool(["t1", "t2", "t1"])
+    assert token_pool.tokens == ["t1", "t2"]
+    assert token_pool.acquire() == "t1"
+    assert token_pool.update(401, {}, "Bad credentials") == 0.0
+    assert [token_pool.acquire() for _ in range(3)] == ["t2", "t2", "t2"]
+    assert token_pool.update(401, {}, "Bad credentials") is None
+    assert token_pool.revoked == {"t1", "t2"}
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/repofilter.py."""
+from unittest.mock import Mock
+
+import pytest
+
+from lib import repofilter
+
+
+@pytest.mark.parametrize(
+    "value,patterns,expected",
+    [
+        ("zstyblik", [], False),
+        ("zstyblik", ["zstyblik"], True),
+        ("Zstyblik", ["zstyblik"], True),
+        ("zstyblik-org", ["zstyblik"], False),
+        ("zstyblik-org", ["other", "zstyblik-*"], True),
+        ("zstyblik/repo", ["*/re?o"], True),
+    ],
+)
+def test_match_any(value, patterns, expected):
+    """Test that value is matched against glob patterns."""
+    assert repofilter.match_any(value, patterns) is expected
+
+
+def test_is_owner_excluded():
+    """Test that owners are included and excluded by patterns."""
+    repo_filter = repofilter.RepoFilter(
+        include_owners=["zstyblik*"], exclude_owners=["*-archive"]
+    )
+
+    assert repo_filter.is_owner_excluded("zstyblik") is False
+    assert repo_filter.is_owner_excluded("zstyblik-archive") is True
+    assert repo_filter.is_owner_excluded("other") is True
+    assert repofilter.RepoFilter().is_owner_excluded("other") is False
+
+
+@pytest.mark.parametrize(
+    "full_name,fork,expected",
+    [
+        ("zstyblik/api-v1", False, None),
+        ("zstyblik/web", False, "it doesn't match any of include patterns"),
+        ("zstyblik/api-old", False, "it matches exclude pattern"),
+        ("zstyblik/api-v2", True, "it's a fork"),
+    ],
+)
+def test_get_exclude_reason(full_name, fork, expected):
+    """Test that repos are excluded by patterns and forks."""
+    repo_filter = repofilter.RepoFilter(
+        include_repos=["zstyblik/api-*"],
+        exclude_repos=["*/api-old"],
+        exclude_forks=True,
+    )
+    repo = Mock(full_name=full_name, fork=fork)
+
+    assert repo_filter.get_exclude_reason(repo) == expected
+
+
+def test_get_skip_reason():
+    """Test that archived and disabled repos are skipped only if asked."""
+    archived = Mock(archived=True, disabled=False)
+    disabled = Mock(archived=False, disabled=True)
+    active = Mock(archived=False, disabled=False)
+    repo_filter = repofilter.RepoFilter(skip_archived=True, skip_disabled=True)
+
+    assert repo_filter.get_skip_reason(archived) == repofilter.SKIP_ARCHIVED
+    assert repo_filter.get_skip_reason(disabled) == repofilter.SKIP_DISABLED
+    assert repo_filter.get_skip_reason(active) is None
+    assert repofilter.RepoFilter().get_skip_reason(archived) is None
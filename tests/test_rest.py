@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/rest.py."""
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import Mock
+
+import pytest
+
+import dependabot_report
+from lib import rest
+from lib.cache import HTTPCache
+from lib.metrics import Metrics
+from lib.ratelimit import TokenPool
+
+
+@pytest.fixture
+def fake_server(start_fake_server):
+    """Return running fake GitHub API server with small estate."""
+    return start_fake_server(
+        repos=6,
+        min_alerts=0,
+        max_alerts=250,
+        forbidden_ratio=0.3,
+        repos_per_owner=3,
+        seed=2,
+    )
+
+
+@pytest.mark.parametrize(
+    "headers,expected",
+    [
+        ({}, None),
+        (
+            {
+                "link": (
+                    '<https://api.example.com/x?after=abc>; rel="next", '
+                    '<https://api.example.com/x?page=1>; rel="first"'
+                )
+            },
+            "https://api.example.com/x?after=abc",
+        ),
+        (
+            {"link": '<https://api.example.com/x?page=1>; rel="prev"'},
+            None,
+        ),
+    ],
+)
+def test_get_next_url(headers, expected):
+    """Test that URL of the next page is parsed out of Link header."""
+    assert rest.get_next_url(headers) == expected
+
+
+def test_alert_from_json():
+    """Test conversion of alert JSON into Alert."""
+    alert = rest.alert_from_json(
+        {
+            "number": 3,
+            "html_url": "https://alert.example.com",
+            "created_at": "2024-01-02T03:04:05Z",
+            "dependency": {
+                "package": {"ecosystem": "pip", "name": "jinja2"},
+                "manifest_path": "requirements.txt",
+            },
+            "security_advisory": {
+                "severity": "high",
+                "summary": "summary",
+                "cwes": [{"cwe_id": "CWE-79"}, {"cwe_id": "NVD-CWE-Other"}],
+            },
+        }
+    )
+
+    assert alert.number == 3
+    assert alert.severity == "high"
+    assert alert.package == "jinja2"
+    assert alert.ecosystem == "pip"
+    assert alert.manifest_path == "requirements.txt"
+    assert alert.created_at == datetime(
+        2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc
+    )
+    assert alert.cwes == (79,)
+
+
+def test_get_dependabot_data_request_count(fake_server):
+    """Test that each repo costs exactly one request per page of alerts."""
+    estate = fake_server.estate
+    metrics = Metrics()
+
+    context = dependabot_report.get_dependabot_data(
+        "token",
+        "owner",
+        None,
+        False,
+        workers=2,
+        backend="rest",
+        base_url=fake_server.base_url,
+        metrics=metrics,
+    )
+    expected_context = dependabot_report.get_dependabot_data(
+        "token",
+        "owner",
+        None,
+        False,
+        base_url=fake_server.base_url,
+    )
+
+    # user, one page of repos and alert pages of each repo
+    expected_requests = 2 + sum(
+        1 if repo["forbidden"] else max(1, -(-repo["alerts"] // 100))
+        for repo in estate.repos
+    )
+    assert metrics.as_dict()["counters"]["requests"] == expected_requests
+    assert list(context["namespaces"].keys()) == list(
+        expected_context["namespaces"].keys()
+    )
+    for namespace, namespace_data in context["namespaces"].items():
+        expected_data = expected_context["namespaces"][namespace]
+        assert namespace_data["owner"].login == expected_data["owner"].login
+        assert namespace_data["owner"].type == expected_data["owner"].type
+        assert namespace_data["repos"] == expected_data["repos"]
+
+
+def test_get_dependabot_data_bulk_fetch(fake_server):
+    """Test that alerts of orgs are fetched via organization endpoint."""
+    estate = fake_server.estate
+    metrics = Metrics()
+
+    context = dependabot_report.get_dependabot_data(
+        "token",
+        "owner",
+        None,
+        False,
+        bulk_fetch=True,
+        backend="rest",
+        base_url=fake_server.base_url,
+        metrics=metrics,
+    )
+
+    org_repos = estate.owners["bench-org-0001"]
+    org_alerts = sum(
+        repo["alerts"] for repo in org_repos if not repo["forbidden"]
+    )
+    expected_requests = (
+        2
+        + sum(
+            1 if repo["forbidden"] else max(1, -(-repo["alerts"] // 100))
+            for repo in estate.owners["bench-user"]
+        )
+        + max(1, -(-org_alerts // 100))
+    )
+    assert metrics.as_dict()["counters"]["requests"] == expected_requests
+    repos = context["namespaces"]["bench-org-0001"]["repos"]
+    for repo in org_repos:
+        repo_detail = repos[repo["full_name"]]
+        assert len(repo_detail["alerts"]) == (
+            0 if repo["forbidden"] else repo["alerts"]
+        )
+
+
+def test_get_json_error(fake_server):
+    """Test that RestException is raised when request fails."""
+    client = rest.RestClient("token", base_url=fake_server.base_url)
+
+    with pytest.raises(rest.RestException) as excinfo:
+        client.get_json(client.get_url("/nonexistent"))
+
+    assert excinfo.value.status == 404
+    assert excinfo.value.message == (
+        "GET '{:s}/nonexistent' failed with status 404: Not Found".format(
+            fake_server.base_url
+        )
+    )
+
+
+def test_get_response_cache(fake_server, tmp_path):
+    """Test that 304 response is served from cache."""
+    cache = HTTPCache(str(tmp_path), 1024 * 1024)
+    metrics = Metrics()
+    client = rest.RestClient(
+        "token", base_url=fake_server.base_url, cache=cache, metrics=metrics
+    )
+    url = client.get_url("/user")
+    entry_key = cache.get_key(client.host, "/user", client.headers)
+    cache.put(entry_key, {"etag": '"abc"'}, '{"login": "cached"}')
+    original_send = client.send
+
+    def send(url, headers):
+        assert headers["If-None-Match"] == '"abc"'
+        response = original_send(url, headers)
+        return rest.Response(304, response.headers, "")
+
+    client.send = send
+
+    data, _ = client.get_json(url)
+
+    assert data == {"login": "cached"}
+    assert metrics.as_dict()["counters"]["cache_hits"] == 1
+
+
+def test_get_response_cache_token_pool(fake_server, tmp_path):
+    """Test that responses cached for one token are reused by another."""
+    cache = HTTPCache(str(tmp_path), 1024 * 1024)
+    metrics = Metrics()
+    token_pool = TokenPool(["t1", "t2"])
+    client = rest.RestClient(
+        "t1",
+        base_url=fake_server.base_url,
+        cache=cache,
+        rate_limiter=token_pool,
+        metrics=metrics,
+    )
+    url = client.get_url("/user")
+    tokens = []
+    original_send = client.send
+
+    def send(url, headers):
+        tokens.append(headers["Authorization"])
+        return original_send(url, headers)
+
+    client.send = send
+
+    for token in ["t1", "t2"]:
+        # NOTE: pool would stick to the first token of unknown budget.
+        token_pool.select = Mock(return_value=token)
+        client.get_json(url)
+
+    assert tokens == ["token t1", "token t2"]
+    assert metrics.as_dict()["counters"]["cache_hits"] == 1
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/snapshot.py."""
+import gzip
+import io
+import os
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import Mock
+
+import pytest
+
+import dependabot_report
+from lib import snapshot
+from lib.alert import Alert
+
+
+def new_namespaces():
+    """Return list of tuples (namespace, namespace data)."""
+    namespaces = []
+    for namespace in ["zstyblik", "zstyblik-org"]:
+        owner = Mock()
+        owner.login = namespace
+        owner.type = "User"
+        owner.avatar_url = "https://avatar.example.com/{:s}".format(namespace)
+        owner.html_url = "https://github.com/{:s}".format(namespace)
+        repos = {}
+        for idx in range(2):
+            full_name = "{:s}/repo{:d}".format(namespace, idx)
+            repo = Mock(
+                full_name=full_name,
+                fork=bool(idx),
+                html_url="https://github.com/{:s}".format(full_name),
+            )
+            repo_detail = dependabot_report.new_repo_detail(repo)
+            for number in range(idx * 2, 0, -1):
+                dependabot_report.add_repo_alert(
+                    repo_detail,
+                    Alert(
+                        number=number,
+                        severity="high",
+                        summary="summary {:d}".format(number),
+                        html_url="https://alert.example.com",
+                        package="jinja2",
+                        ecosystem="pip",
+                        manifest_path="requirements.txt",
+                        created_at=datetime(
+                            2024, 1, number, tzinfo=timezone.utc
+                        ),
+                        cwes=["CWE-79"],
+                    ),
+                )
+
+            dependabot_report.set_html_filters(repo_detail)
+            repos[full_name] = repo_detail
+
+        namespaces.append((namespace, {"owner": owner, "repos": repos}))
+
+    return namespaces
+
+
+def test_snapshot_roundtrip(tmp_path):
+    """Test that snapshot is read back as it was written."""
+    fname = str(tmp_path / "snapshot.jsonl.gz")
+    namespaces = new_namespaces()
+
+    with snapshot.SnapshotWriter(fname, "2024-01-01 00:00:00+0000") as writer:
+        assert list(writer.tee(namespaces)) == namespaces
+
+    assert os.listdir(str(tmp_path)) == ["snapshot.jsonl.gz"]
+    with snapshot.SnapshotReader(fname) as reader:
+        assert reader.report_mtime == "2024-01-01 00:00:00+0000"
+        result = [
+            (
+                namespace,
+                namespace_data["owner"],
+                dict(namespace_data["repos"].items()),
+            )
+            for namespace, namespace_data in reader.iter_namespaces()
+        ]
+
+    assert [item[0] for item in result] == ["zstyblik", "zstyblik-org"]
+    assert result[0][1] == {
+        "login": "zstyblik",
+        "type": "User",
+        "avatar_url": "https://avatar.example.com/zstyblik",
+        "html_url": "https://github.com/zstyblik",
+    }
+    for (_, expected), (_, _, repos) in zip(namespaces, result):
+        assert repos == expected["repos"]
+
+
+def test_snapshot_render(tmp_path):
+    """Test that report rendered from snapshot is the same."""
+    fname = str(tmp_path / "snapshot.jsonl.gz")
+    namespaces = new_namespaces()
+    with snapshot.SnapshotWriter(fname, "2024-01-01") as writer:
+        for namespace, namespace_data in namespaces:
+            writer.write_namespace(namespace, namespace_data)
+
+    context = dependabot_report.merge_namespaces(namespaces)
+    context["report_mtime"] = "2024-01-01"
+    expected = io.StringIO()
+    dependabot_report.render_template(
+        context, dependabot_report.TEMPLATE_FNAME, expected
+    )
+
+    output = io.StringIO()
+    with snapshot.SnapshotReader(fname) as reader:
+        context = {
+            "namespaces": dependabot_report.NamespaceStream(
+                reader.iter_namespaces(), output.flush
+            ),
+            "report_mtime": reader.report_mtime,
+            "timing_sec": "0",
+        }
+        dependabot_report.render_template(
+            context, dependabot_report.TEMPLATE_FNAME, output
+        )
+
+    assert "zstyblik-org/repo1" in output.getvalue()
+    assert output.getvalue() == expected.getvalue()
+
+
+def test_snapshot_skip_unconsumed_repos(tmp_path):
+    """Test that repos which weren't consumed are skipped."""
+    fname = str(tmp_path / "snapshot.jsonl.gz")
+    with snapshot.SnapshotWriter(fname, "2024-01-01") as writer:
+        for namespace, namespace_data in new_namespaces():
+            writer.write_namespace(namespace, namespace_data)
+
+    with snapshot.SnapshotReader(fname) as reader:
+        result = [
+            (namespace, bool(namespace_data["repos"]))
+            for namespace, namespace_data in reader.iter_namespaces()
+        ]
+
+    assert result == [("zstyblik", True), ("zstyblik-org", True)]
+
+
+def test_snapshot_writer_abort(tmp_path):
+    """Test that snapshot isn't created when writing fails."""
+    fname = str(tmp_path / "snapshot.jsonl.gz")
+
+    with pytest.raises(RuntimeError):
+        with snapshot.SnapshotWriter(fname, "2024-01-01"):
+            raise RuntimeError("fetch failed")
+
+    assert os.listdir(str(tmp_path)) == []
+
+
+@pytest.mark.parametrize(
+    "content,expected",
+    [
+        (
+            '{"format": "foo", "version": 1}\n',
+            "isn't supported",
+        ),
+        (
+            '{"format": "dependabot-report-snapshot", "version": 999}\n',
+            "isn't supported",
+        ),
+        ("not json\n", "at line 1"),
+    ],
+)
+def test_snapshot_reader_invalid(tmp_path, content, expected):
+    """Test that SnapshotException is raised on invalid snapshot."""
+    fname = str(tmp_path / "snapshot.jsonl.gz")
+    with gzip.open(fname, "wt", encoding="utf-8") as fhandle:
+        fhandle.write(content)
+
+    with pytest.raises(snapshot.SnapshotException) as excinfo:
+        snapshot.SnapshotReader(fname)
+
+    assert expected in excinfo.value.message
+
+
+def test_snapshot_reader_missing(tmp_path):
+    """Test that SnapshotException is raised when snapshot doesn't exist."""
+    with pytest.raises(snapshot.SnapshotException):
+        snapshot.SnapshotReader(str(tmp_path / "missing.jsonl.gz"))
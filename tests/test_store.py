@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/store.py."""
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import Mock
+
+from lib.store import AlertStore
+
+
+def new_alert(number, state, updated_day, severity="high"):
+    """Return mocked DependabotAlert."""
+    mock_alert = Mock(number=number, state=state)
+    mock_alert.html_url = "https://alert{:d}.example.com".format(number)
+    mock_alert.security_advisory.severity = severity
+    mock_alert.security_advisory.summary = "summary {:d}".format(number)
+    mock_alert.security_advisory.cwes = [Mock(cwe_id="CWE-79")]
+    mock_alert.dependency.manifest_path = "requirements.txt"
+    mock_alert.dependency.package.name = "jinja2"
+    mock_alert.dependency.package.ecosystem = "pip"
+    mock_alert.created_at = datetime(2024, 1, number, tzinfo=timezone.utc)
+    mock_alert.updated_at = datetime(2024, 2, updated_day, tzinfo=timezone.utc)
+    return mock_alert
+
+
+def test_alert_store_sync(tmp_path):
+    """Test initial and incremental sync of alerts."""
+    store = AlertStore(str(tmp_path / "alerts.db"))
+    mock_repo = Mock(full_name="zstyblik/dependabot-report")
+    mock_repo.get_dependabot_alerts.return_value = [
+        new_alert(2, "open", 5),
+        new_alert(1, "open", 3),
+    ]
+
+    assert store.sync_repo(mock_repo) == 2
+    mock_repo.get_dependabot_alerts.assert_called_once_with(
+        state="open", sort="updated", direction="desc"
+    )
+    assert store.get_high_water_mark(mock_repo.full_name) == datetime(
+        2024, 2, 5, tzinfo=timezone.utc
+    )
+
+    # Alert 1 has been fixed, alert 3 is new. Alert 2 is older than
+    # high-water mark and must stop the iteration.
+    mock_repo.get_dependabot_alerts.reset_mock()
+    mock_repo.get_dependabot_alerts.return_value = [
+        new_alert(3, "open", 9, severity="low"),
+        new_alert(1, "fixed", 8),
+        new_alert(2, "open", 4),
+        Mock(side_effect=AssertionError("must not be reached")),
+    ]
+    assert store.sync_repo(mock_repo) == 2
+    mock_repo.get_dependabot_alerts.assert_called_once_with(
+        sort="updated", direction="desc"
+    )
+
+    alerts = store.get_open_alerts(mock_repo.full_name)
+    assert [alert.number for alert in alerts] == [3, 2]
+    assert alerts[0].severity == "low"
+    assert alerts[0].cwes == (79,)
+    assert alerts[0].package == "jinja2"
+    assert alerts[0].created_at == datetime(2024, 1, 3, tzinfo=timezone.utc)
+    store.close()
+
+
+def test_alert_store_alerts_error(tmp_path):
+    """Test that alerts error is set and cleared by successful sync."""
+    store = AlertStore(str(tmp_path / "alerts.db"))
+    store.set_alerts_error("zstyblik/repo")
+    assert store.has_alerts_error("zstyblik/repo") is True
+
+    mock_repo = Mock(full_name="zstyblik/repo")
+    mock_repo.get_dependabot_alerts.return_value = []
+    store.sync_repo(mock_repo)
+    assert store.has_alerts_error("zstyblik/repo") is False
+    assert store.get_high_water_mark("zstyblik/repo") is None
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/transport.py."""
+from unittest.mock import Mock
+
+from lib import transport
+from lib.cache import MemoryCache
+from lib.metrics import Metrics
+from lib.ratelimit import RateLimiter
+
+
+class FakeResponse:
+    """Response returned by fake send()."""
+
+    def __init__(self, status, headers, body):
+        """Init."""
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def read(self):
+        """Return body."""
+        return self.body
+
+
+def test_send_request_cache():
+    """Test that response is cached and then requested conditionally."""
+    cache = MemoryCache(1024 * 1024)
+    rate_limiter = RateLimiter(sleep=Mock())
+    rate_limiter.refund = Mock()
+    metrics = Metrics()
+    send = Mock(
+        side_effect=[
+            FakeResponse(200, {"etag": '"abc"'}, "[1]"),
+            FakeResponse(304, {"x-ratelimit-remaining": "9"}, ""),
+        ]
+    )
+    headers = {"Authorization": "token x"}
+
+    responses = [
+        transport.send_request(
+            send,
+            "api.example.com",
+            "GET",
+            "https://api.example.com/user/repos?per_page=100",
+            None,
+            headers,
+            cache,
+            rate_limiter,
+            metrics,
+        ),
+        transport.send_request(
+            send,
+            "api.example.com",
+            "GET",
+            "/user/repos?per_page=100",
+            None,
+            headers,
+            cache,
+            rate_limiter,
+            metrics,
+        ),
+    ]
+
+    assert [(resp.status, resp.read()) for resp in responses] == [
+        (200, "[1]"),
+        (200, "[1]"),
+    ]
+    assert send.call_args_list[1].args[3] == {
+        "Authorization": "token x",
+        "If-None-Match": '"abc"',
+    }
+    assert metrics.as_dict()["counters"]["cache_hits"] == 1
+    rate_limiter.refund.assert_called_once_with()
+
+
+def test_send_request_no_cache_for_post():
+    """Test that only GET requests are cached."""
+    cache = MemoryCache(1024 * 1024)
+    send = Mock(return_value=FakeResponse(200, {"etag": '"abc"'}, "{}"))
+
+    for _ in range(2):
+        transport.send_request(
+            send, "api.example.com", "POST", "/graphql", "{}", {}, cache
+        )
+
+    assert [call.args[3] for call in send.call_args_list] == [{}, {}]
+
+
+def test_send_request_retry():
+    """Test that rate limited request is retried."""
+    send = Mock(
+        side_effect=[
+            FakeResponse(429, {"retry-after": "1"}, ""),
+            FakeResponse(200, {}, "[]"),
+        ]
+    )
+    metrics = Metrics()
+
+    response = transport.send_request(
+        send,
+        "api.example.com",
+        "GET",
+        "/user/repos",
+        None,
+        {},
+        rate_limiter=RateLimiter(sleep=Mock()),
+        metrics=metrics,
+    )
+
+    assert response.status == 200
+    assert send.call_count == 2
+    assert metrics.as_dict()["counters"]["retries"] == 1
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Unit tests for lib/webhook.py."""
+import os
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from lib import webhook
+
+SCRIPT_PATH = os.path.dirname(os.path.realpath(__file__))
+PAYLOAD_FNAME = os.path.join(
+    SCRIPT_PATH, "files", "webhook_dependabot_alert_created.json"
+)
+
+
+@pytest.fixture
+def server():
+    """Return running webhook server listening on random port."""
+    server = webhook.WebhookServer(("127.0.0.1", 0), "secret")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = "http://127.0.0.1:{:d}/".format(server.server_address[1])
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_signature():
+    """Test signature against example from GitHub docs."""
+    assert webhook.get_signature(
+        "It's a Secret to Everybody", b"Hello, World!"
+    ) == (
+        "sha256="
+        "757107ea0eb2509fc211221cce984b8a37570b6d7586c22c46f4379c8b043e17"
+    )
+
+
+@pytest.mark.parametrize(
+    "secret,body,signature,expected",
+    [
+        ("secret", b"body", None, False),
+        ("secret", b"body", "", False),
+        ("secret", b"body", "sha256=abc", False),
+        ("other", b"body", webhook.get_signature("secret", b"body"), False),
+        ("secret", b"body2", webhook.get_signature("secret", b"body"), False),
+        ("secret", b"body", webhook.get_signature("secret", b"body"), True),
+    ],
+)
+def test_verify_signature(secret, body, signature, expected):
+    """Test that only signature of body by the same secret is valid."""
+    assert webhook.verify_signature(secret, body, signature) is expected
+
+
+def test_receive_event(server):
+    """Test that payload of signed dependabot_alert event is queued."""
+    with open(PAYLOAD_FNAME, "rb") as fhandle:
+        body = fhandle.read()
+
+    status = webhook.send_event(server.url, "secret", body)
+
+    assert status == 202
+    payload = server.events.get_nowait()
+    assert payload["action"] == "created"
+    assert payload["repository"]["full_name"] == "zstyblik/repo"
+    assert server.events.empty()
+
+
+def test_receive_event_other(server):
+    """Test that events other than dependabot_alert are ignored."""
+    status = webhook.send_event(server.url, "secret", b'{"zen": "x"}', "ping")
+
+    assert status == 204
+    assert server.events.empty()
+
+
+@pytest.mark.parametrize(
+    "headers,expected_status",
+    [
+        ({"X-GitHub-Event": "dependabot_alert"}, 401),
+        (
+            {
+                "X-GitHub-Event": "dependabot_alert",
+                "X-Hub-Signature-256": webhook.get_signature("other", b"{}"),
+            },
+            401,
+        ),
+        (
+            {
+                "X-GitHub-Event": "dependabot_alert",
+                "X-Hub-Signature-256": webhook.get_signature("secret", b"{}"),
+            },
+            202,
+        ),
+    ],
+)
+def test_receive_event_signature(server, headers, expected_status):
+    """Test that deliveries with invalid signature are rejected."""
+    request = urllib.request.Request(
+        server.url, data=b"{}", headers=headers, method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            status = response.status
+    except urllib.error.HTTPError as exception:
+        status = exception.code
+
+    assert status == expected_status
+    assert server.events.empty() is (expected_status != 202)